@@ -1,15 +1,55 @@
+import threading
+from contextlib import nullcontext
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 
-from src.data import get_price_history, load_financials, load_uploaded_csv
-from src.ratios import compute_ratios
-from src.sentiment import load_news_and_score
+from src.analytics import BENCHMARK
+from src.cache import upload_cache
+from src.charts import POINT_BUDGET, line_figure, scatter_figure, zoom
+from src.data import REQUIRED_COLUMNS, get_price_history, load_financials
+from src.framestore import resolve, share
+from src.perf import Trace, enable_json_logging, span
+from src.pipeline import run_stages
+from src.singleflight import single_flight
+from src.ratios import compute_ratios, ratio_names
+from src.rollups import sentiment_rollups
+from src.sentiment import load_news_and_score, warm_up
 from src.summary import generate_summary
 
 
 st.set_page_config(page_title="Company Financial Health Analyzer", layout="wide", page_icon="💹")
 
+
+@st.cache_resource(show_spinner=False)
+def _start_warm_up() -> threading.Thread:
+    # Once per server process: load VADER in the background while the first page renders
+    thread = threading.Thread(target=warm_up, name="vader-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+_start_warm_up()
+
+
+def render_kpis(ratio_df: pd.DataFrame) -> None:
+    cols = st.columns(3)
+    with cols[0]:
+        st.metric("Gross Margin", f"{ratio_df['gross_margin'].iloc[-1]*100:.1f}%")
+    with cols[1]:
+        st.metric("Operating Margin", f"{ratio_df['operating_margin'].iloc[-1]*100:.1f}%")
+    with cols[2]:
+        st.metric("Net Margin", f"{ratio_df['net_margin'].iloc[-1]*100:.1f}%")
+
+    cols = st.columns(3)
+    with cols[0]:
+        st.metric("Current Ratio", f"{ratio_df['current_ratio'].iloc[-1]:.2f}")
+    with cols[1]:
+        st.metric("Debt-to-Equity", f"{ratio_df['debt_to_equity'].iloc[-1]:.2f}")
+    with cols[2]:
+        st.metric("ROE", f"{ratio_df['roe'].iloc[-1]*100:.1f}%")
+
+
 # ------------ Sidebar: Professional Inputs ------------
 st.sidebar.title("⚙️ Settings")
 
@@ -31,11 +71,14 @@ if source_choice == "Upload my own CSV":
     uploaded_file = st.sidebar.file_uploader("Choose CSV", type=["csv"])
     if uploaded_file is not None:
         try:
-            uploaded_preview_df = pd.read_csv(uploaded_file, nrows=5)
+            # Reads just the first rows; Analyze parses (or reuses) the whole upload
+            uploaded_preview_df = upload_cache.preview(
+                uploaded_file, nrows=5, digests=st.session_state.setdefault("upload_digests", {}))
             st.sidebar.success(f"✅ Loaded: {uploaded_file.name}")
             st.sidebar.caption("Preview (first 5 rows):")
             st.sidebar.dataframe(uploaded_preview_df, use_container_width=True)
-            uploaded_file.seek(0)  # reset pointer for full read later
+            stats = upload_cache.stats()
+            st.sidebar.caption(f"Upload cache: {stats['hits']} hits • {stats['misses']} misses")
         except Exception as e:
             st.sidebar.error(f"❌ Could not read CSV preview: {e}")
 
@@ -55,6 +98,9 @@ period = st.sidebar.selectbox("Price history period", ["6mo", "1y", "2y", "5y"],
 # 5) Action
 run = st.sidebar.button("Analyze", type="primary", use_container_width=True)
 
+# 6) Optional per-stage timings (tracing is off, and free, unless enabled)
+show_perf = st.sidebar.toggle("Performance panel", value=False)
+
 # ------------ Header / Hero ------------
 st.markdown(
     """
@@ -75,40 +121,116 @@ if source_choice == "Upload my own CSV" and uploaded_file is None:
 
 # ------------ Run analysis ------------
 if run:
-    with st.spinner("Crunching numbers…"):
+    if show_perf:
+        enable_json_logging()
+    tracer = Trace("analyze") if show_perf else nullcontext()
+    with st.spinner("Crunching numbers…"), tracer:
         try:
             # Data source selection
-            if uploaded_file is not None:
-                fin_df = load_uploaded_csv(uploaded_file)
-            else:
-                fin_df = load_financials(ticker)
+            ratio_df = None
+            with span("load_financials", source="upload" if uploaded_file is not None else "sample") as s:
+                if uploaded_file is not None:
+                    digests = st.session_state.setdefault("upload_digests", {})
+                    fin_df, ratio_df = upload_cache.load(uploaded_file, digests)
+                else:
+                    fin_df = load_financials(ticker)
+                    s.set(rows=len(fin_df))
 
             # Extra schema guard (friendly message if bad)
-            required = {
-                "date", "revenue", "cogs", "operating_income", "net_income",
-                "current_assets", "current_liabilities", "total_assets",
-                "total_liabilities", "shareholders_equity", "inventory"
-            }
-            missing = [c for c in required if c not in fin_df.columns]
+            missing = [c for c in REQUIRED_COLUMNS if c not in fin_df.columns]
             if missing:
                 st.error(f"Your data is missing columns: {missing}")
                 st.stop()
 
-            # Compute + fetch
-            ratio_df = compute_ratios(fin_df)
-            sentiment_df = load_news_and_score(ticker)
-            prices = get_price_history(ticker, period)
+            # Compute + fetch: the stages are independent, so run them together
+            def ratios_stage(fin_df=fin_df, cached=ratio_df):
+                with span("compute_ratios", rows=len(fin_df)) as s:
+                    if cached is not None:
+                        s.set(cache="hit")
+                        return cached
+                    return compute_ratios(fin_df)
 
-            # Stash in session state
+            def news_stage(ticker=ticker):
+                with span("load_news_and_score") as s:
+                    df = load_news_and_score(ticker)
+                    s.set(rows=len(df))
+                    return df
+
+            def prices_stage(ticker=ticker, period=period):
+                with span("get_price_history", ticker=ticker, period=period):
+                    return get_price_history(ticker, period)
+
+            def benchmark_stage(period=period):
+                # For beta on the Overview page, which must not fetch on its own
+                with span("get_benchmark_history", ticker=BENCHMARK, period=period):
+                    return get_price_history(BENCHMARK, period)
+
+            labels = {"compute_ratios": "Ratios", "load_news_and_score": "News sentiment",
+                      "get_price_history": "Price history", "get_benchmark_history": f"{BENCHMARK} prices",
+                      "sentiment_rollups": "Sentiment rollups"}
+
+            def report(res):
+                label = labels[res.name]
+                if res.ok:
+                    status.write(f"✅ {label} ({res.seconds:.2f}s)")
+                else:
+                    why = f"timed out after {res.seconds:.0f}s" if res.timed_out else f"failed: {res.error}"
+                    status.write(f"⚠️ {label} {why}")
+                    degraded.append(f"{label} {why}")
+            sentiment_df, prices, benchmark = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+            degraded = []
+            early = st.empty()
+            with st.status("Running analysis…", expanded=False) as status:
+                for res in run_stages({"compute_ratios": ratios_stage,
+                                       "load_news_and_score": news_stage,
+                                       "get_price_history": prices_stage,
+                                       "get_benchmark_history": benchmark_stage}):
+                    report(res)
+                    if res.name == "compute_ratios":
+                        if not res.ok:
+                            raise res.error or TimeoutError("Ratio computation timed out.")
+                        ratio_df = res.value
+                        # Show the headline numbers while news and prices are still loading
+                        with early.container():
+                            st.caption("Ratios ready — loading news and prices…")
+                            render_kpis(ratio_df)
+                    elif res.name == "load_news_and_score" and res.ok:
+                        sentiment_df = res.value
+                    elif res.name == "get_price_history" and res.ok:
+                        prices = res.value
+                    elif res.name == "get_benchmark_history" and res.ok:
+                        benchmark = res.value
+
+                # Fold new headlines into the shared sentiment rollups and line them up with
+                # prices; that needs both, so it is a stage of its own once they are in
+                sentiment_ref = share(sentiment_df)
+
+                def rollups_stage(ticker=ticker, news=sentiment_df, prices=prices, token=sentiment_ref.key):
+                    with span("sentiment_rollups"):
+                        sentiment_rollups.ingest(ticker, news, token=token)
+                        sentiment_rollups.join_prices(ticker, prices, token=token)
+
+                for res in run_stages({"sentiment_rollups": rollups_stage}):
+                    report(res)
+                status.update(label="Analysis finished", state="complete")
+            early.empty()
+
+            # Stash in session state: frames go to the shared store, sessions keep references
             st.session_state.update(
                 ticker=ticker,
                 currency=currency,
-                prices=prices,
-                fin_df=fin_df,
-                ratio_df=ratio_df,
-                sentiment_df=sentiment_df,
+                period=period,
+                prices=share(prices),
+                benchmark=share(benchmark),
+                fin_df=share(fin_df),
+                ratio_df=share(ratio_df),
+                sentiment_df=sentiment_ref,
             )
+            if show_perf:
+                st.session_state["perf"] = tracer.records()
             st.success("✅ Analysis complete. Explore the dashboard below or use the pages on the left.")
+            for note in degraded:
+                st.warning(f"{note}. Showing the rest of the analysis without it.")
         except Exception as e:
             st.error("⚠️ Something went wrong while processing the data.")
             with st.expander("Show technical details"):
@@ -117,10 +239,11 @@ if run:
 
 # ------------ Home summary (shows after first run) ------------
 if "ratio_df" in st.session_state and st.session_state["ratio_df"] is not None:
-    ratio_df = st.session_state["ratio_df"]
-    prices = st.session_state.get("prices")
+    ratio_df = resolve(st.session_state["ratio_df"])
+    prices = resolve(st.session_state.get("prices"))
     tck = st.session_state.get("ticker", "")
     cur = st.session_state.get("currency", "")
+    per = st.session_state.get("period", "")
 
     tab1, tab2, tab3 = st.tabs(["📊 Overview", "📈 Ratios", "📰 Sentiment"])
 
@@ -128,28 +251,19 @@ if "ratio_df" in st.session_state and st.session_state["ratio_df"] is not None:
         st.subheader(f"Snapshot — {tck} ({cur})")
 
         # KPI cards
-        cols = st.columns(3)
-        with cols[0]:
-            st.metric("Gross Margin", f"{ratio_df['gross_margin'].iloc[-1]*100:.1f}%")
-        with cols[1]:
-            st.metric("Operating Margin", f"{ratio_df['operating_margin'].iloc[-1]*100:.1f}%")
-        with cols[2]:
-            st.metric("Net Margin", f"{ratio_df['net_margin'].iloc[-1]*100:.1f}%")
-
-        cols = st.columns(3)
-        with cols[0]:
-            st.metric("Current Ratio", f"{ratio_df['current_ratio'].iloc[-1]:.2f}")
-        with cols[1]:
-            st.metric("Debt-to-Equity", f"{ratio_df['debt_to_equity'].iloc[-1]:.2f}")
-        with cols[2]:
-            st.metric("ROE", f"{ratio_df['roe'].iloc[-1]*100:.1f}%")
+        render_kpis(ratio_df)
 
         st.markdown("### 📈 Price history")
         if prices is not None and not prices.empty:
             # extra guard: ensure 1-D numeric
-            prices = prices.copy()
+            prices = prices.reset_index()
             prices["Close"] = pd.to_numeric(prices["Close"], errors="coerce")
-            fig = px.line(prices.reset_index(), x="Date", y="Close", title=f"{tck} — Closing Prices")
+            window = None
+            if len(prices) > POINT_BUDGET:
+                lo, hi = prices["Date"].iloc[0].date(), prices["Date"].iloc[-1].date()
+                window = st.slider("Zoom", lo, hi, (lo, hi), key="home_price_zoom")
+                prices = zoom(prices, "Date", *window)
+            fig = line_figure(prices, "Date", "Close", f"{tck} — Closing Prices", key=(tck, per, window))
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("No price data available for this ticker/period.")
@@ -158,24 +272,38 @@ if "ratio_df" in st.session_state and st.session_state["ratio_df"] is not None:
         st.subheader("Selected ratio over time")
         metric = st.selectbox(
             "Pick a ratio",
-            ["gross_margin", "operating_margin", "net_margin", "current_ratio",
-             "quick_ratio", "debt_to_equity", "asset_turnover", "inventory_turnover", "roe", "roa"],
+            [c for c in ratio_names() if c in ratio_df.columns],
             index=0
         )
-        fig = px.line(ratio_df.reset_index(), x="date", y=metric, markers=True, title=metric)
+        fig = line_figure(ratio_df, "date", metric, metric, markers=True)
         st.plotly_chart(fig, use_container_width=True)
         st.dataframe(ratio_df.tail(12), use_container_width=True)
 
     with tab3:
-        sdf = st.session_state.get("sentiment_df")
+        sdf = resolve(st.session_state.get("sentiment_df"))
         if sdf is None or sdf.empty or "compound" not in sdf.columns:
             st.info("No sentiment data available. Add headlines to `data/sample_news.csv` or integrate a news API.")
         else:
             st.dataframe(sdf[["date", "source", "headline", "compound"]].tail(20), use_container_width=True)
-            fig = px.scatter(
-                sdf, x="date", y="compound", hover_data=["headline", "source"],
-                title="Headline Sentiment (VADER compound)"
+            fig = scatter_figure(
+                sdf, "date", "compound", "Headline Sentiment (VADER compound)",
+                hover=["headline", "source"], key=(tck, "news")
             )
             st.plotly_chart(fig, use_container_width=True)
 else:
     st.info("➜ Pick a data source, choose Ticker & Currency from the sidebar, then click **Analyze**.")
+
+# ------------ Performance panel ------------
+if show_perf:
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        records = st.session_state.get("perf")
+        if records:
+            perf_df = pd.DataFrame(records).set_index("span")
+            st.dataframe(perf_df, use_container_width=True)
+            st.caption(f"Total: {perf_df['seconds'].sum():.3f}s")
+        else:
+            st.caption("Click **Analyze** to record stage timings.")
+        flights = single_flight.stats()
+        if flights:
+            st.caption("Shared loads across sessions: " + " • ".join(
+                f"{kind} {s['coalesced']}/{s['calls']} coalesced" for kind, s in flights.items()))
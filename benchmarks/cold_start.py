@@ -0,0 +1,74 @@
+"""
+Cold-start timings, each measured in a fresh interpreter.
+
+    python benchmarks/cold_start.py [--repeat 5] [--json out.json]
+
+- import_src: importing the src modules app.py depends on
+- vader_init: first analyzer load (what the first Analyze click pays)
+- first_render: Streamlit AppTest run of app.py up to the first rendered page
+- first_analyze: first render plus one Analyze click on the sample data
+"""
+from __future__ import annotations
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+_SNIPPETS = {
+    "import_src": """
+import src.data, src.ratios, src.sentiment, src.summary
+""",
+    "vader_init": """
+from src.sentiment import _get_vader
+_get_vader()
+""",
+    "first_render": """
+from streamlit.testing.v1 import AppTest
+AppTest.from_file(APP, default_timeout=120).run()
+""",
+    "first_analyze": """
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(APP, default_timeout=120).run()
+at.button[0].click().run()
+""",
+}
+
+_TEMPLATE = """
+import sys, time
+sys.path.insert(0, {root!r})
+APP = {app!r}
+t0 = time.perf_counter()
+{body}
+print(time.perf_counter() - t0)
+"""
+
+
+def measure(name: str) -> float:
+    code = _TEMPLATE.format(root=str(ROOT), app=str(ROOT / "app.py"), body=_SNIPPETS[name])
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in _SNIPPETS:
+        runs = [measure(name) for _ in range(args.repeat)]
+        results[name] = {"median_s": round(statistics.median(runs), 4), "runs_s": [round(r, 4) for r in runs]}
+        print(f"{name:>14}: {results[name]['median_s']:.3f}s (median of {args.repeat})")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
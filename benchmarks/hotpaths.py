@@ -0,0 +1,185 @@
+"""
+Time and memory benchmarks for the data, ratio, sentiment and summary hot paths.
+
+    python benchmarks/hotpaths.py                          # default scales, print + JSON
+    python benchmarks/hotpaths.py --fin-rows 1000 --headlines 1000 --json out.json
+    python benchmarks/hotpaths.py --compare baseline.json --threshold 0.25
+
+Each stage is timed (best of --repeat runs) and, in a separate run under
+tracemalloc, profiled for peak Python-allocated memory. With --compare the
+run fails (exit 1) when a stage is slower or hungrier than the baseline by
+more than --threshold.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+import synthetic  # noqa: E402
+from src import data, sentiment  # noqa: E402
+from src.ratios import compute_ratios  # noqa: E402
+from src.summary import generate_summary  # noqa: E402
+
+DEFAULT_FIN_ROWS = [1_000, 100_000, 10_000_000]
+DEFAULT_HEADLINES = [1_000, 1_000_000]
+
+# Differences below these floors are treated as noise when comparing
+MIN_SECONDS = 0.005
+MIN_MB = 1.0
+
+
+def _quarters_per_ticker(rows: int) -> int:
+    # Keep dates inside pandas' range: ~40 quarters per company at large scales
+    return max(1, rows // 40)
+
+
+def _stages(fin_rows: list[int], headline_rows: list[int], workdir: Path):
+    """Yield (name, rows, fn) triples; fn runs the stage once on prepared inputs."""
+    for rows in fin_rows:
+        fin = synthetic.financials(rows, tickers=_quarters_per_ticker(rows))
+        fin = fin.drop(columns="ticker", errors="ignore")
+        raw = fin.to_csv(index=False).encode()
+        yield "load_uploaded_csv", rows, lambda raw=raw: data.load_uploaded_csv(io.BytesIO(raw))
+
+        sample_dir = workdir / f"fin-{rows}"
+        sample_dir.mkdir()
+        (sample_dir / "sample_financials.csv").write_bytes(raw)
+        del raw
+
+        def load_financials(sample_dir=sample_dir):
+            data.DATA_DIR, saved = sample_dir, data.DATA_DIR
+            try:
+                return data.load_financials("BENCH")
+            finally:
+                data.DATA_DIR = saved
+
+        yield "load_financials", rows, load_financials
+        yield "compute_ratios", rows, lambda fin=fin: compute_ratios(fin)
+
+        ratios = compute_ratios(fin)
+        news = synthetic.headlines(30)
+        news["compound"] = 0.1
+        yield "generate_summary", rows, lambda ratios=ratios, news=news: generate_summary(ratios, news, "BENCH", "USD")
+        del fin, ratios
+
+    for rows in headline_rows:
+        path = workdir / f"news-{rows}.csv"
+        synthetic.headlines(rows).to_csv(path, index=False)
+
+        def score(path=path):
+            # Fresh memo each run, so every headline is really scored
+            sentiment._memo = sentiment.ScoreMemo(workdir / f"memo-{time.perf_counter_ns()}.sqlite")
+            return sentiment.load_news_and_score("BENCH", news_path=path, incremental=False)
+
+        yield "load_news_and_score", rows, score
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _peak_mb(fn) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def run(fin_rows: list[int], headline_rows: list[int], repeat: int = 3, memory: bool = True) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        saved_memo = sentiment._memo
+        try:
+            for name, rows, fn in _stages(fin_rows, headline_rows, Path(tmp)):
+                key = f"{name}@{rows}"
+                entry = {"stage": name, "rows": rows, "seconds": round(_time(fn, repeat), 6)}
+                if memory:
+                    entry["peak_mb"] = round(_peak_mb(fn), 3)
+                results[key] = entry
+                print(f"{key:>32}: {entry['seconds']:9.4f}s" + (f"  {entry['peak_mb']:9.1f} MB" if memory else ""),
+                      flush=True)
+        finally:
+            sentiment._memo = saved_memo
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Human-readable regressions of `current` against `baseline`."""
+    problems = []
+    for key, base in baseline["results"].items():
+        now = current["results"].get(key)
+        if now is None:
+            continue
+        for metric, floor in (("seconds", MIN_SECONDS), ("peak_mb", MIN_MB)):
+            if metric not in now or metric not in base:
+                continue
+            limit = base[metric] * (1 + threshold)
+            if now[metric] > limit and now[metric] - base[metric] > floor:
+                problems.append(f"{key} {metric}: {base[metric]:.4f} -> {now[metric]:.4f} (limit {limit:.4f})")
+    return problems
+
+
+def _sizes(text: str) -> list[int]:
+    return [int(float(x)) for x in text.split(",") if x.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fin-rows", type=_sizes, default=DEFAULT_FIN_ROWS,
+                        help="comma-separated financial row counts (default: 1e3,1e5,1e7)")
+    parser.add_argument("--headlines", type=_sizes, default=DEFAULT_HEADLINES,
+                        help="comma-separated headline counts (default: 1e3,1e6)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--json", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative slowdown (0.25 = +25%%)")
+    args = parser.parse_args(argv)
+
+    current = run(args.fin_rows, args.headlines, repeat=args.repeat, memory=not args.no_memory)
+    args.json.write_text(json.dumps(current, indent=2))
+    print(f"wrote {args.json}")
+
+    if args.compare:
+        problems = compare(current, json.loads(args.compare.read_text()), args.threshold)
+        for line in problems:
+            print(f"REGRESSION {line}")
+        if problems:
+            return 1
+        print("no regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
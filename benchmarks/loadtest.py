@@ -0,0 +1,428 @@
+"""
+Concurrent-session load test: how many simultaneous analysts one app process serves.
+
+    python benchmarks/loadtest.py                                  # concurrency 1,2,4,8,16
+    python benchmarks/loadtest.py --concurrency 1,8,32 --sessions 64 --json load.json
+    python benchmarks/loadtest.py --mode apptest --concurrency 1,4  # drive app.py itself
+
+Each simulated session goes through the app's flow: load financials (sample
+data, or an upload for --upload-share of the sessions), Analyze (ratios,
+news sentiment and prices run together as in app.py), then the Overview,
+Ratios, Sentiment and AI Summary pages. Sessions run on threads, as
+Streamlit runs each session's script on its own thread.
+
+Everything runs offline in a scratch directory: yfinance.download is replaced
+by synthetic bars (with --fetch-latency of simulated network time), VADER
+uses a lexicon fixture (the vendored one unless --lexicon is given), and the
+price, news, upload and columnar stores point at empty temporary roots.
+
+For each concurrency level it reports p50/p95/p99 latency per stage,
+sessions per second, and resident memory before and after the level.
+"""
+from __future__ import annotations
+import argparse
+import io
+import json
+import logging
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import synthetic  # noqa: E402
+
+DEFAULT_CONCURRENCY = [1, 2, 4, 8, 16]
+PERCENTILES = (50, 95, 99)
+PAGES = ["1_📊_Overview.py", "2_📈_Ratios.py", "3_📰_Sentiment.py", "4_🤖_AI_Summary.py"]
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process (Linux /proc)."""
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# -------------------------------------------------------------------
+# ✅ Offline stand-ins
+# -------------------------------------------------------------------
+class FakeYahoo:
+    """Module-shaped stand-in for yfinance: download() serves synthetic daily bars."""
+
+    def __init__(self, latency: float = 0.0, days: int = 1260):
+        self.latency = latency
+        self.days = days
+        self.calls = 0
+        self._bars: dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+
+    def _ticker_bars(self, ticker: str) -> pd.DataFrame:
+        with self._lock:
+            if ticker not in self._bars:
+                seed = zlib.crc32(ticker.encode())
+                self._bars[ticker] = synthetic.prices([ticker], self.days, seed=seed)[ticker]
+            return self._bars[ticker]
+
+    def download(self, tickers, period=None, start=None, end=None, progress=False, **kwargs) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        names = [tickers] if isinstance(tickers, str) else list(tickers)
+        frames = {}
+        for t in names:
+            bars = self._ticker_bars(t)
+            if start is not None:
+                bars = bars[bars.index >= pd.Timestamp(start)]
+            if end is not None:
+                bars = bars[bars.index < pd.Timestamp(end)]
+            frames[t] = bars
+        # Same layout as recent yfinance: (field, ticker) columns
+        out = pd.concat(frames, axis=1).swaplevel(axis=1)
+        return out.sort_index(axis=1)
+
+    def as_module(self) -> types.ModuleType:
+        module = types.ModuleType("yfinance")
+        module.download = self.download
+        return module
+
+
+def _offline_nltk_download(*args, **kwargs):
+    raise RuntimeError("The load test runs offline; nltk.download() must not be called.")
+
+
+@contextmanager
+def _patched(obj, name: str, value):
+    old = getattr(obj, name)
+    setattr(obj, name, value)
+    try:
+        yield
+    finally:
+        setattr(obj, name, old)
+
+
+@contextmanager
+def sandbox(workdir: Path, yahoo: FakeYahoo, headlines: int, lexicon: Path | None = None):
+    """Point every cache and external dependency of the app at local fixtures under `workdir`."""
+    from src import cache, data, prices, sentiment, store
+
+    news_path = workdir / "news.csv"
+    synthetic.headlines(headlines, seed=1).to_csv(news_path, index=False)
+    compiled = sentiment._compile_lexicon(lexicon or sentiment.LEXICON_PATH, workdir / "vader_lexicon.marshal")
+
+    with ExitStack() as stack:
+        stack.enter_context(_patched_modules({"yfinance": yahoo.as_module()}))
+        try:
+            import nltk
+            stack.enter_context(_patched(nltk, "download", _offline_nltk_download))
+        except ImportError:
+            pass
+        stack.enter_context(_patched(sentiment, "_compile_lexicon", lambda *a, **k: compiled))
+        stack.enter_context(_patched(sentiment, "_vader", None))
+        stack.enter_context(_patched(sentiment, "_memo_salt", None))
+        stack.enter_context(_patched(sentiment, "_memo", sentiment.ScoreMemo(workdir / "memo.sqlite")))
+        stack.enter_context(_patched(sentiment, "NEWS_PATH", news_path))
+        stack.enter_context(_patched(sentiment, "_news_stores", {
+            news_path: sentiment.ScoredNewsStore(news_path, root=workdir / "news")}))
+        stack.enter_context(_patched(prices.price_store, "root", workdir / "prices"))
+        stack.enter_context(_patched(prices.price_store, "fetcher", prices.YahooFetcher()))
+        stack.enter_context(_patched(store.columnar_store, "root", workdir / "store"))
+        stack.enter_context(_patched(cache.upload_cache, "root", workdir / "uploads"))
+        assert data.price_store is prices.price_store
+        yield
+
+
+@contextmanager
+def _patched_modules(modules: dict[str, types.ModuleType]):
+    saved = {name: sys.modules.get(name) for name in modules}
+    sys.modules.update(modules)
+    try:
+        yield
+    finally:
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+
+# -------------------------------------------------------------------
+# ✅ Sessions
+# -------------------------------------------------------------------
+class Fixtures:
+    """Tickers and upload files the simulated sessions draw from."""
+
+    def __init__(self, tickers: int, upload_rows: int):
+        self.tickers = [f"T{i:03d}" for i in range(tickers)]
+        self.uploads = {
+            t: synthetic.financials(upload_rows, seed=i).to_csv(index=False).encode()
+            for i, t in enumerate(self.tickers)
+        }
+
+    def upload(self, ticker: str) -> io.BytesIO:
+        file = io.BytesIO(self.uploads[ticker])
+        file.name = f"{ticker}.csv"
+        return file
+
+
+def headless_session(ticker: str, period: str, upload: io.BytesIO | None) -> tuple[dict[str, float], list]:
+    """
+    One session's flow against the src functions app.py and the pages call.
+    Returns stage -> seconds, plus the FrameRefs the session keeps alive.
+    """
+    from src.analytics import BENCHMARK, session_analytics
+    from src.cache import upload_cache
+    from src.charts import line_figure, scatter_figure
+    from src.data import get_price_history, load_financials
+    from src.framestore import resolve, share
+    from src.metrics import compute_metrics
+    from src.pipeline import run_stages
+    from src.ratios import compute_ratios
+    from src.rollups import sentiment_rollups
+    from src.sentiment import load_news_and_score
+    from src.summary import cached_summary
+
+    timings = {}
+    t0 = time.perf_counter()
+    ratio_df = None
+    if upload is not None:
+        upload_cache.preview(upload, nrows=5)
+        fin_df, ratio_df = upload_cache.load(upload)
+    else:
+        fin_df = load_financials(ticker)
+    timings["load_financials"] = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    results = {}
+    for res in run_stages({
+        "compute_ratios": lambda: ratio_df if ratio_df is not None else compute_ratios(fin_df),
+        "load_news_and_score": lambda: load_news_and_score(ticker),
+        "get_price_history": lambda: get_price_history(ticker, period),
+        "get_benchmark_history": lambda: get_price_history(BENCHMARK, period),
+    }):
+        timings[res.name] = res.seconds
+        if res.name == "compute_ratios" and not res.ok:
+            raise res.error or TimeoutError("compute_ratios timed out")
+        results[res.name] = res.value if res.ok else pd.DataFrame()
+    state = {"fin_df": share(fin_df), "ratio_df": share(results["compute_ratios"]),
+             "sentiment_df": share(results["load_news_and_score"]),
+             "prices": share(results["get_price_history"]),
+             "benchmark": share(results["get_benchmark_history"])}
+
+    def rollups_stage(token=state["sentiment_df"].key):
+        sentiment_rollups.ingest(ticker, results["load_news_and_score"], token=token)
+        sentiment_rollups.join_prices(ticker, results["get_price_history"], token=token)
+
+    for res in run_stages({"sentiment_rollups": rollups_stage}):
+        timings[res.name] = res.seconds
+    timings["analyze"] = time.perf_counter() - t1
+
+    def page(name, render):
+        t = time.perf_counter()
+        render()
+        timings[name] = time.perf_counter() - t
+
+    def overview():
+        prices = resolve(state["prices"])
+        if not prices.empty:
+            session_analytics(ticker, prices, resolve(state["benchmark"]), period)
+            line_figure(prices.reset_index(), "Date", "Close", ticker, key=(ticker, period, None))
+
+    def ratios():
+        df = resolve(state["ratio_df"])
+        compute_metrics(df)
+        line_figure(df, "date", "gross_margin", "gross_margin", markers=True)
+
+    def sentiment():
+        sdf = resolve(state["sentiment_df"])
+        if not sdf.empty:
+            rollup = sentiment_rollups.ingest(ticker, sdf, token=state["sentiment_df"].key)
+            line_figure(rollup.daily(), "date", "decayed", "sentiment",
+                        key=(ticker, "sentiment", state["sentiment_df"].key, rollup.version))
+            sentiment_rollups.join_prices(ticker, resolve(state["prices"]), token=state["sentiment_df"].key)
+            scatter_figure(sdf, "date", "compound", "sentiment", hover=["headline", "source"], key=(ticker, "news"))
+
+    def summary():
+        rollup = sentiment_rollups.get(ticker, state["sentiment_df"].key)
+        cached_summary(resolve(state["ratio_df"]), resolve(state["sentiment_df"]), ticker, "USD",
+                       sentiment_score=rollup.score() if rollup is not None else None)
+
+    for name, render in (("page_overview", overview), ("page_ratios", ratios),
+                         ("page_sentiment", sentiment), ("page_summary", summary)):
+        page(name, render)
+    timings["session"] = time.perf_counter() - t0
+    return timings, list(state.values())
+
+
+def apptest_session(ticker: str, period: str, upload=None) -> tuple[dict[str, float], list]:
+    """One session driven through app.py and the pages with Streamlit's AppTest (sample data only)."""
+    from streamlit.testing.v1 import AppTest
+
+    # Bare-mode threads log a ScriptRunContext warning per element; keep the report readable
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+    timings = {}
+    t0 = time.perf_counter()
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=300).run()
+    timings["first_render"] = time.perf_counter() - t0
+    at.selectbox[0].set_value("Custom…").run()
+    at.text_input[0].set_value(ticker)
+    at.selectbox[-1].set_value(period)
+    at.toggle[0].set_value(True)
+    t1 = time.perf_counter()
+    at.button[0].click().run()
+    timings["analyze"] = time.perf_counter() - t1
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    for record in at.session_state["perf"]:
+        timings[record["span"]] = record["seconds"]
+
+    keep = [at.session_state[k] for k in ("fin_df", "ratio_df", "sentiment_df", "prices", "benchmark")]
+    for page in PAGES:
+        t = time.perf_counter()
+        pt = AppTest.from_file(str(ROOT / "pages" / page), default_timeout=300)
+        for key in ("ticker", "currency", "period", "fin_df", "ratio_df", "sentiment_df", "prices", "benchmark"):
+            pt.session_state[key] = at.session_state[key]
+        pt.run()
+        if pt.exception:
+            raise RuntimeError(pt.exception[0].value)
+        timings["page_" + page.split("_", 2)[-1].removesuffix(".py").lower()] = time.perf_counter() - t
+    timings["session"] = time.perf_counter() - t0
+    return timings, keep
+
+
+# -------------------------------------------------------------------
+# ✅ Driver
+# -------------------------------------------------------------------
+def run_level(session_fn, fixtures: Fixtures, concurrency: int, sessions: int,
+              period: str, upload_share: float, offset: int = 0) -> dict:
+    """Run `sessions` sessions, `concurrency` at a time, and summarize their timings."""
+    n_uploads = int(round(sessions * upload_share))
+    jobs = []
+    for i in range(sessions):
+        ticker = fixtures.tickers[(offset + i) % len(fixtures.tickers)]
+        jobs.append((ticker, fixtures.upload(ticker) if i < n_uploads else None))
+
+    held, errors = [], []
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="session") as pool:
+        futures = [pool.submit(session_fn, ticker, period, upload) for ticker, upload in jobs]
+        samples: dict[str, list[float]] = {}
+        for future in futures:
+            try:
+                timings, refs = future.result()
+            except Exception as e:
+                errors.append(repr(e))
+                continue
+            held.append(refs)  # sessions stay open until the level ends
+            for stage, seconds in timings.items():
+                samples.setdefault(stage, []).append(seconds)
+    wall = time.perf_counter() - start
+    rss_after = rss_mb()
+
+    stages = {
+        stage: {f"p{q}": round(float(np.percentile(values, q)), 4) for q in PERCENTILES} | {"n": len(values)}
+        for stage, values in samples.items()
+    }
+    done = sessions - len(errors)
+    return {
+        "concurrency": concurrency,
+        "sessions": sessions,
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "sessions_per_s": round(done / wall, 3) if wall else None,
+        "rss_before_mb": round(rss_before, 1),
+        "rss_after_mb": round(rss_after, 1),
+        "rss_growth_mb": round(rss_after - rss_before, 1),
+        "stages": stages,
+    }
+
+
+def _print_level(result: dict) -> None:
+    print(f"\nconcurrency {result['concurrency']}: {result['sessions']} sessions in {result['wall_s']:.2f}s "
+          f"({result['sessions_per_s']} sessions/s), RSS {result['rss_before_mb']:.0f} -> "
+          f"{result['rss_after_mb']:.0f} MB ({result['rss_growth_mb']:+.1f})")
+    print(f"  {'stage':<22}" + "".join(f"{f'p{q} ms':>11}" for q in PERCENTILES))
+    for stage, stats in result["stages"].items():
+        print(f"  {stage:<22}" + "".join(f"{stats[f'p{q}'] * 1000:>11.1f}" for q in PERCENTILES))
+    for error in result["errors"][:3]:
+        print(f"  error: {error}")
+
+
+def _int_list(text: str) -> list[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["headless", "apptest"], default="headless")
+    parser.add_argument("--concurrency", type=_int_list, default=DEFAULT_CONCURRENCY,
+                        help="comma-separated simultaneous sessions per level")
+    parser.add_argument("--sessions", type=int, default=None,
+                        help="sessions per level (default: 4 x concurrency)")
+    parser.add_argument("--tickers", type=int, default=20, help="distinct tickers sessions pick from")
+    parser.add_argument("--period", default="1y", choices=["6mo", "1y", "2y", "5y"])
+    parser.add_argument("--upload-share", type=float, default=0.25,
+                        help="share of sessions that upload a CSV (headless mode)")
+    parser.add_argument("--upload-rows", type=int, default=400, help="quarters per uploaded CSV")
+    parser.add_argument("--headlines", type=int, default=2_000, help="rows in the news fixture")
+    parser.add_argument("--fetch-latency", type=float, default=0.05,
+                        help="simulated seconds per yfinance.download call")
+    parser.add_argument("--lexicon", type=Path, help="VADER lexicon fixture (default: the vendored one)")
+    parser.add_argument("--json", type=Path, help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    session_fn = headless_session if args.mode == "headless" else apptest_session
+    upload_share = args.upload_share if args.mode == "headless" else 0.0
+    fixtures = Fixtures(args.tickers, args.upload_rows)
+    yahoo = FakeYahoo(latency=args.fetch_latency)
+    results = {"mode": args.mode, "rss_start_mb": round(rss_mb(), 1), "levels": []}
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as tmp, \
+            sandbox(Path(tmp), yahoo, args.headlines, args.lexicon):
+        # One session up front pays the imports and the lexicon load
+        session_fn(fixtures.tickers[0], args.period, None)
+        offset = 0
+        for concurrency in args.concurrency:
+            sessions = args.sessions or 4 * concurrency
+            result = run_level(session_fn, fixtures, concurrency, sessions, args.period, upload_share, offset)
+            offset += sessions
+            results["levels"].append(result)
+            _print_level(result)
+
+        from src.framestore import frame_store
+        from src.singleflight import single_flight
+        results["frame_store"] = frame_store.stats()
+        results["single_flight"] = single_flight.stats()
+        results["yfinance_calls"] = yahoo.calls
+
+    results["rss_end_mb"] = round(rss_mb(), 1)
+    print(f"\nRSS {results['rss_start_mb']:.0f} -> {results['rss_end_mb']:.0f} MB; "
+          f"{yahoo.calls} stubbed yfinance downloads; frame store {results['frame_store']}; "
+          f"single-flight {results['single_flight']}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return 1 if any(level["errors"] for level in results["levels"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
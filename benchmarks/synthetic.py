@@ -0,0 +1,74 @@
+"""Synthetic financial statements, headlines and prices for benchmarks and load tests."""
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+FIN_COLUMNS = [
+    "revenue", "cogs", "operating_income", "net_income",
+    "current_assets", "current_liabilities", "total_assets",
+    "total_liabilities", "shareholders_equity", "inventory",
+]
+
+_WORDS = (
+    "company shares revenue profit loss beats misses strong weak record growth decline "
+    "upgrade downgrade lawsuit recall launch surge plunge guidance outlook margin pressure "
+    "analysts investors regulators approval probe dividend buyback layoffs expansion deal"
+).split()
+_SOURCES = ["Reuters", "Bloomberg", "WSJ", "Financial Times", "CNBC", "MarketWatch"]
+
+
+def financials(rows: int, tickers: int = 1, seed: int = 0) -> pd.DataFrame:
+    """Quarterly statements: `rows` in total, spread over `tickers` companies."""
+    rng = np.random.default_rng(seed)
+    per = -(-rows // tickers)
+    revenue = rng.uniform(1e8, 5e11, rows).round()
+    df = pd.DataFrame({
+        "date": np.tile(pd.date_range("1900-03-31", periods=per, freq="QE").values, tickers)[:rows],
+        "revenue": revenue,
+        "cogs": (revenue * rng.uniform(0.3, 0.8, rows)).round(),
+        "operating_income": (revenue * rng.uniform(-0.1, 0.4, rows)).round(),
+        "net_income": (revenue * rng.uniform(-0.15, 0.3, rows)).round(),
+        "current_assets": (revenue * rng.uniform(0.2, 0.8, rows)).round(),
+        "current_liabilities": (revenue * rng.uniform(0.1, 0.7, rows)).round(),
+        "total_assets": (revenue * rng.uniform(0.8, 3.0, rows)).round(),
+        "total_liabilities": (revenue * rng.uniform(0.3, 2.0, rows)).round(),
+        "shareholders_equity": (revenue * rng.uniform(0.0, 1.5, rows)).round(),
+        "inventory": (revenue * rng.uniform(0.0, 0.1, rows)).round(),
+    })
+    if tickers > 1:
+        df.insert(0, "ticker", np.repeat([f"T{i:05d}" for i in range(tickers)], per)[:rows])
+    return df
+
+
+def headlines(rows: int, seed: int = 0, tickers: list[str] | None = None) -> pd.DataFrame:
+    """News rows with 6-10 word headlines drawn from a small finance vocabulary."""
+    rng = np.random.default_rng(seed)
+    words = np.array(_WORDS)
+    lengths = rng.integers(6, 11, rows)
+    picks = rng.integers(0, len(words), (rows, 10))
+    text = [" ".join(words[p[:n]]) for p, n in zip(picks, lengths)]
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2015-01-01") + pd.to_timedelta(rng.integers(0, 3650, rows), unit="D"),
+        "source": rng.choice(_SOURCES, rows),
+        "headline": text,
+    })
+    if tickers:
+        df.insert(0, "ticker", rng.choice(tickers, rows))
+    return df
+
+
+def prices(tickers: list[str], days: int = 1260, seed: int = 0) -> dict[str, pd.DataFrame]:
+    """Geometric random-walk OHLCV bars per ticker, ending on the last business day."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days, name="Date")
+    out = {}
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, days)))
+        out[ticker] = pd.DataFrame({
+            "Open": close * (1 + rng.normal(0, 0.003, days)),
+            "High": close * 1.01,
+            "Low": close * 0.99,
+            "Close": close,
+            "Volume": rng.integers(1e5, 1e7, days),
+        }, index=dates)
+    return out
@@ -1,5 +1,9 @@
+import numpy as np
 import streamlit as st
-import plotly.express as px
+
+from src.analytics import BENCHMARK, session_analytics
+from src.charts import POINT_BUDGET, line_figure, zoom
+from src.framestore import resolve
 
 st.title("📊 Overview")
 
@@ -8,9 +12,9 @@ if 'ratio_df' not in session or session['ratio_df'] is None:
     st.warning("No data yet. Go to the main page and run an analysis.")
     st.stop()
 
-ratio_df = session['ratio_df']
+ratio_df = resolve(session['ratio_df'])
 ticker = session['ticker']
-prices = session['prices']
+prices = resolve(session['prices'])
 
 kpis = {}
 try:
@@ -31,9 +35,35 @@ for i, (name, val) in enumerate(items):
     with cols[i % 3]:
         st.metric(name, f"{val:.2f}")
 
+# Risk metrics from the bars loaded on Analyze; cached until they change, so reruns are cheap
+risk = None
+if prices is not None and 'Close' in prices.columns:
+    risk = session_analytics(ticker, prices, resolve(session.get('benchmark')), session.get('period', '')).summary
+if risk is not None and ticker.upper() in risk.index and not np.isnan(risk.loc[ticker.upper(), 'last_close']):
+    row = risk.loc[ticker.upper()]
+
+    def fmt(value, pattern):
+        return "n/a" if np.isnan(value) else pattern.format(value)
+
+    cols = st.columns(4)
+    cols[0].metric("Period Return", fmt(row['period_return'] * 100, "{:.1f}%"))
+    cols[1].metric("Volatility (ann.)", fmt(row['ann_volatility'] * 100, "{:.1f}%"))
+    cols[2].metric("Max Drawdown", fmt(row['max_drawdown'] * 100, "{:.1f}%"))
+    cols[3].metric(f"Beta vs {BENCHMARK}", fmt(row['beta'], "{:.2f}"))
+    st.caption(f"Last close {row['last_close']:.2f} · 20/50/200-day SMA "
+               + " / ".join(fmt(row[f'sma_{w}'], "{:.2f}") for w in (20, 50, 200))
+               + f" · 1-month volatility {fmt(row['rolling_volatility'] * 100, '{:.1f}%')}")
+
 st.subheader(f"{ticker} Price History")
 if prices is not None and not prices.empty:
-    fig = px.line(prices.reset_index(), x='Date', y='Close', title=f"{ticker} Closing Prices")
+    prices = prices.reset_index()
+    window = None
+    if len(prices) > POINT_BUDGET:
+        lo, hi = prices['Date'].iloc[0].date(), prices['Date'].iloc[-1].date()
+        window = st.slider("Zoom", lo, hi, (lo, hi))
+        prices = zoom(prices, 'Date', *window)
+    fig = line_figure(prices, 'Date', 'Close', f"{ticker} Closing Prices",
+                      key=(ticker, session.get('period'), window))
     st.plotly_chart(fig, use_container_width=True)
 else:
     st.info("Price history not available.")
@@ -1,5 +1,11 @@
+import numpy as np
 import streamlit as st
-import plotly.express as px
+
+from src.charts import line_figure
+from src.framestore import resolve
+from src.metrics import compute_metrics
+from src.peers import peer_index, quarter
+from src.ratios import ratio_names
 
 st.title("📈 Financial Ratios")
 
@@ -7,20 +13,77 @@ if 'ratio_df' not in st.session_state or st.session_state['ratio_df'] is None:
     st.warning("No data yet. Go to the main page and run an analysis.")
     st.stop()
 
-df = st.session_state['ratio_df']
+df = resolve(st.session_state['ratio_df'])
 
 st.dataframe(df.tail(12), use_container_width=True)
 
-metric = st.selectbox("Select a ratio to chart", [
-    "gross_margin","operating_margin","net_margin","current_ratio",
-    "quick_ratio","debt_to_equity","asset_turnover","inventory_turnover","roe","roa"
-], index=0)
+# Trailing metrics for the latest quarter
+latest = compute_metrics(df).iloc[-1]
+
+def _pct(x, suffix=""):
+    return None if np.isnan(x) else f"{x*100:+.1f}%{suffix}"
+
+def _pct_rank(x):
+    if np.isnan(x):
+        return "n/a"
+    n = int(round(x * 100))
+    return f"{n}{'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')}"
+
+st.subheader("Trailing metrics")
+if np.isnan(latest['revenue_ttm']):
+    st.caption("TTM and year-over-year figures need at least 4–5 quarters of history.")
+cols = st.columns(4)
+with cols[0]:
+    ttm = latest['revenue_ttm']
+    st.metric("Revenue (TTM)", "n/a" if np.isnan(ttm) else f"{ttm:,.0f}")
+with cols[1]:
+    st.metric("Revenue YoY", _pct(latest['revenue_yoy']) or "n/a", _pct(latest['revenue_qoq'], " QoQ"))
+with cols[2]:
+    st.metric("Net income YoY", _pct(latest['net_income_yoy']) or "n/a", _pct(latest['net_income_qoq'], " QoQ"))
+with cols[3]:
+    st.metric("Net margin trend", _pct(latest['net_margin_slope4q'], "/qtr") or "n/a",
+              help="Least-squares slope of net margin over the last 4 quarters")
+
+metric = st.selectbox("Select a ratio to chart", [c for c in ratio_names() if c in df.columns], index=0)
 
 fig = None
 try:
-    fig = px.line(df.reset_index(), x='date', y=metric, title=f"{metric} over time")
+    fig = line_figure(df, 'date', metric, f"{metric} over time")
 except Exception as e:
     st.error(f"Could not plot: {e}")
 
 if fig:
     st.plotly_chart(fig, use_container_width=True)
+
+# Peer comparison against a prebuilt index (python -m src.peers)
+st.subheader("Peer comparison")
+index = peer_index()
+ticker = st.session_state.get('ticker', '')
+if index is None:
+    st.caption("No peer index yet. Ingest a universe with `python -m src.store` and build one with `python -m src.peers`.")
+elif metric not in index.metrics:
+    st.caption(f"`{metric}` is not in the peer index. Rebuild it with `python -m src.peers` to compare it.")
+else:
+    last = df.iloc[-1]
+    period = quarter([last['date']])[0]
+    try:
+        if ticker in index:
+            q = index.query(ticker, metric)
+        else:
+            q = index.query(ticker, metric, period=period, value=float(last[metric]))
+    except KeyError:
+        st.caption(f"No peer data for {period}.")
+    else:
+        cols = st.columns(3)
+        with cols[0]:
+            st.metric(f"Percentile vs universe ({q['period']})", _pct_rank(q['pct']),
+                      help=f"{q.get('universe_count', 0)} companies reported this quarter")
+        with cols[1]:
+            label = f"Percentile vs {q['group']}" if q['group'] != "All" else "Percentile vs peer group"
+            st.metric(label, _pct_rank(q['group_pct']))
+        with cols[2]:
+            median = q.get('group_median', q.get('universe_median', np.nan))
+            st.metric("Peer median", "n/a" if np.isnan(median) else f"{median:.3f}",
+                      None if np.isnan(q['value']) or np.isnan(median) else f"{q['value'] - median:+.3f}")
+        if ticker in index:
+            st.line_chart(index.history(ticker, metric)[[f"{metric}_pct", f"{metric}_group_pct"]])
@@ -1,5 +1,8 @@
 import streamlit as st
-import plotly.express as px
+
+from src.charts import POINT_BUDGET, line_figure, scatter_figure, zoom
+from src.framestore import resolve
+from src.rollups import HALF_LIFE_DAYS, sentiment_rollups
 
 st.title("📰 Market Sentiment")
 
@@ -7,11 +10,42 @@ if 'sentiment_df' not in st.session_state or st.session_state['sentiment_df'] is
     st.warning("No data yet. Go to the main page and run an analysis.")
     st.stop()
 
-sdf = st.session_state['sentiment_df']
+ref = st.session_state['sentiment_df']
+sdf = resolve(ref)
+ticker = st.session_state.get('ticker', '')
 if 'compound' not in sdf.columns or sdf.empty:
     st.info("No sentiment data available. Add news to data/sample_news.csv")
-else:
-    st.dataframe(sdf[['date','source','headline','compound']].tail(20), use_container_width=True)
-    fig = px.scatter(sdf, x='date', y='compound', hover_data=['headline','source'],
-                     title="Headline Sentiment (VADER compound)")
+    st.stop()
+
+# The rollup of this session's headline snapshot, built on Analyze (rebuilt here only if evicted)
+token = getattr(ref, 'key', None)
+rollup = sentiment_rollups.ingest(ticker, sdf, token=token)
+
+st.dataframe(sdf[['date','source','headline','compound']].tail(20), use_container_width=True)
+
+granularity = st.radio("Granularity", ["Daily", "Weekly"], horizontal=True)
+cube = rollup.daily() if granularity == "Daily" else rollup.weekly()
+window = None
+if len(cube) > POINT_BUDGET:
+    lo, hi = cube['date'].iloc[0].date(), cube['date'].iloc[-1].date()
+    window = st.slider("Zoom", lo, hi, (lo, hi))
+    cube = zoom(cube, 'date', *window)
+fig = line_figure(cube, 'date', 'decayed', f"Decayed sentiment score (half-life {HALF_LIFE_DAYS:g} days)",
+                  key=(ticker, 'sentiment', granularity, window, token, rollup.version))
+st.plotly_chart(fig, use_container_width=True)
+score = rollup.score()
+st.caption(f"{int(cube['count'].sum()):,} headlines over {len(cube):,} {granularity.lower()} rows · "
+           f"latest score {'n/a' if score is None else f'{score:.2f}'}")
+
+prices = resolve(st.session_state.get('prices'))
+if prices is not None and not prices.empty:
+    st.subheader("Sentiment vs. price")
+    aligned, corr = sentiment_rollups.join_prices(ticker, prices, token=token)
+    st.caption("Correlation of the decayed score at each close with the return over the next N trading days.")
+    st.dataframe(corr, use_container_width=True)
+    st.dataframe(aligned.tail(10), use_container_width=True)
+
+with st.expander("Individual headlines"):
+    fig = scatter_figure(sdf, 'date', 'compound', "Headline Sentiment (VADER compound)",
+                         hover=['headline', 'source'], key=(ticker, 'news'))
     st.plotly_chart(fig, use_container_width=True)
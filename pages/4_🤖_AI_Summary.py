@@ -1,5 +1,7 @@
 import streamlit as st
-from src.summary import generate_summary
+from src.framestore import resolve
+from src.rollups import sentiment_rollups
+from src.summary import cached_summary
 
 st.title("🤖 AI Summary")
 
@@ -7,13 +9,19 @@ if 'ratio_df' not in st.session_state or st.session_state['ratio_df'] is None:
     st.warning("No data yet. Go to the main page and run an analysis.")
     st.stop()
 
-ratio_df = st.session_state['ratio_df']
-sentiment_df = st.session_state.get('sentiment_df', None)
+ratio_df = resolve(st.session_state['ratio_df'])
+sentiment_ref = st.session_state.get('sentiment_df', None)
+sentiment_df = resolve(sentiment_ref)
 ticker = st.session_state.get('ticker', 'TICKER')
 currency = st.session_state.get('currency', 'USD')
 
 style = st.selectbox("Summary style", ["Executive brief","Analyst deep-dive"], index=0)
-summary = generate_summary(ratio_df, sentiment_df, ticker, currency, style=style)
+# The outlook reads the decayed score of this session's sentiment rollup when there is one
+rollup = None
+if sentiment_df is not None and not sentiment_df.empty and 'compound' in sentiment_df.columns:
+    rollup = sentiment_rollups.ingest(ticker, sentiment_df, token=getattr(sentiment_ref, 'key', None))
+score = rollup.score() if rollup is not None else None
+summary = cached_summary(ratio_df, sentiment_df, ticker, currency, style=style, sentiment_score=score)
 
 st.subheader("Summary")
 st.write(summary)
@@ -0,0 +1,45 @@
+import time
+
+import pandas as pd
+import streamlit as st
+
+from src.data import normalize_column
+from src.ratios import ratio_names
+from src.screener import add_filings, get_screener
+
+st.title("🔎 Screener")
+
+DEFAULT_SCREEN = "current_ratio > 1.5 AND debt_to_equity < 0.8 AND roe in top decile"
+
+screener = get_screener()
+if screener is None:
+    st.info("The universe is empty. Ingest financials with `python -m src.store financials <csv>` "
+            "or add filings below.")
+else:
+    query = st.text_input("Screen", value=DEFAULT_SCREEN)
+    st.caption(
+        "Combine clauses with AND: `ratio > 1.5`, `ratio <= 15%`, `ratio in top decile` "
+        "(or bottom / quartile / quintile / half / 5%). Ratios: " + ", ".join(f"`{c}`" for c in ratio_names())
+    )
+    try:
+        t0 = time.perf_counter()
+        result = screener.screen(query)
+        ms = (time.perf_counter() - t0) * 1000
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        st.caption(f"{len(result):,} of {len(screener):,} companies match (latest quarter) • {ms:.1f} ms")
+        st.dataframe(result, use_container_width=True, hide_index=True)
+
+with st.expander("➕ Add new filings"):
+    upload = st.file_uploader("CSV with a ticker column and the standard financial columns", type=["csv"])
+    if upload is not None and st.button("Add to universe"):
+        try:
+            fin = pd.read_csv(upload)
+            fin.columns = [normalize_column(c) for c in fin.columns]
+            rows = add_filings(fin)
+        except Exception as e:
+            st.error(f"❌ Could not add filings: {e}")
+        else:
+            st.success(f"✅ Added {rows} filings.")
+            st.rerun()
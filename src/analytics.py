@@ -0,0 +1,221 @@
+"""
+Price analytics over a wide Close panel (Date x ticker): simple and log
+returns, rolling volatility, drawdowns, moving averages and beta against a
+benchmark, computed for every ticker at once on one 2-D array.
+
+price_analytics() loads the panel through the price store and caches the
+result per (tickers, period, benchmark) until the bars change.
+session_analytics() does the same for bars a session already loaded, and
+never fetches.
+"""
+from __future__ import annotations
+import threading
+import warnings
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Hashable
+import numpy as np
+import pandas as pd
+
+from src.framestore import content_key
+
+TRADING_DAYS = 252
+VOL_WINDOW = 21  # about one trading month
+SMA_WINDOWS = (20, 50, 200)
+BENCHMARK = "SPY"
+
+
+@dataclass
+class PriceAnalytics:
+    """Per-day series (Date x ticker frames) and a per-ticker `summary` table."""
+    close: pd.DataFrame
+    returns: pd.DataFrame
+    log_returns: pd.DataFrame
+    volatility: pd.DataFrame  # rolling, annualized
+    drawdown: pd.DataFrame
+    sma: dict[int, pd.DataFrame] = field(default_factory=dict)
+    summary: pd.DataFrame = field(default_factory=pd.DataFrame)
+    benchmark: str | None = None
+
+
+# -------------------------------------------------------------------
+# ✅ Column-wise kernels (NaN-aware, axis 0 is time)
+# -------------------------------------------------------------------
+def _rolling_sum(x: np.ndarray, window: int) -> tuple[np.ndarray, np.ndarray]:
+    """Sums and counts of the non-NaN values in each trailing window."""
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    csum = np.vstack([np.zeros((1, x.shape[1])), csum])
+    ccount = np.vstack([np.zeros((1, x.shape[1]), dtype=ccount.dtype), ccount])
+    lo = np.maximum(np.arange(1, len(x) + 1) - window, 0)
+    hi = np.arange(1, len(x) + 1)
+    return csum[hi] - csum[lo], ccount[hi] - ccount[lo]
+
+
+def _rolling_mean(x: np.ndarray, window: int) -> np.ndarray:
+    total, count = _rolling_sum(x, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count == window, total / window, np.nan)
+
+
+def _rolling_std(x: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation over full windows of valid values."""
+    total, count = _rolling_sum(x, window)
+    squares, _ = _rolling_sum(x * x, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = (squares - total * total / window) / (window - 1)
+    return np.where(count == window, np.sqrt(np.maximum(var, 0.0)), np.nan)
+
+
+def _betas(returns: np.ndarray, bench: np.ndarray) -> np.ndarray:
+    """OLS beta of each column on `bench`, over the days both have a return."""
+    both = ~np.isnan(returns) & ~np.isnan(bench)[:, None]
+    n = both.sum(axis=0)
+    r = np.where(both, returns, 0.0)
+    b = np.where(both, bench[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_r, mean_b = r.sum(axis=0) / n, b.sum(axis=0) / n
+        cov = (np.where(both, (r - mean_r) * (b - mean_b), 0.0)).sum(axis=0)
+        var = (np.where(both, (b - mean_b) ** 2, 0.0)).sum(axis=0)
+        return np.where((n > 1) & (var > 0), cov / var, np.nan)
+
+
+def compute_analytics(panel: pd.DataFrame, benchmark: str | None = BENCHMARK,
+                      vol_window: int = VOL_WINDOW, sma_windows=SMA_WINDOWS) -> PriceAnalytics:
+    """
+    Analytics for every column of a Close panel (sorted by date). Beta is
+    against the `benchmark` column when the panel has one, else NaN.
+    """
+    panel = panel.sort_index()
+    close = panel.to_numpy(dtype=np.float64, na_value=np.nan)
+    n_days = len(close)
+
+    returns = np.full(close.shape, np.nan)
+    log_returns = np.full(close.shape, np.nan)
+    if n_days > 1:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            ratio = close[1:] / close[:-1]
+        returns[1:] = ratio - 1
+        with np.errstate(invalid="ignore", divide="ignore"):
+            log_returns[1:] = np.log(ratio)
+
+    volatility = _rolling_std(returns, vol_window) * np.sqrt(TRADING_DAYS)
+    peak = np.fmax.accumulate(close, axis=0) if n_days else close
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = close / peak - 1
+    sma = {w: _rolling_mean(close, w) for w in sma_windows}
+
+    has_bench = benchmark is not None and benchmark in panel.columns
+    bench = returns[:, panel.columns.get_loc(benchmark)] if has_bench else np.full(n_days, np.nan)
+    betas = _betas(returns, bench)
+
+    # nanstd / nanmin warn on all-NaN columns (tickers without bars); NaN is the answer there
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        first = _first_valid(close)
+        last = _last_valid(close)
+        summary = pd.DataFrame({
+            "last_close": last,
+            "period_return": last / first - 1,
+            "ann_volatility": np.nanstd(returns, axis=0, ddof=1) * np.sqrt(TRADING_DAYS),
+            "rolling_volatility": _last_valid(volatility),
+            "max_drawdown": np.nanmin(drawdown, axis=0) if n_days else np.nan,
+            "beta": betas,
+            **{f"sma_{w}": _last_valid(sma[w]) for w in sma_windows},
+        }, index=panel.columns)
+
+    def frame(values):
+        return pd.DataFrame(values, index=panel.index, columns=panel.columns)
+
+    return PriceAnalytics(
+        close=panel, returns=frame(returns), log_returns=frame(log_returns),
+        volatility=frame(volatility), drawdown=frame(drawdown),
+        sma={w: frame(v) for w, v in sma.items()}, summary=summary,
+        benchmark=benchmark if has_bench else None,
+    )
+
+
+def _first_valid(x: np.ndarray) -> np.ndarray:
+    if not len(x):
+        return np.full(x.shape[1], np.nan)
+    valid = ~np.isnan(x)
+    pos = np.argmax(valid, axis=0)
+    return np.where(valid.any(axis=0), x[pos, np.arange(x.shape[1])], np.nan)
+
+
+def _last_valid(x: np.ndarray) -> np.ndarray:
+    return _first_valid(x[::-1])
+
+
+# -------------------------------------------------------------------
+# ✅ Cache per (tickers, period), invalidated when the bars change
+# -------------------------------------------------------------------
+def _panel_fingerprint(panel: pd.DataFrame) -> Hashable:
+    # Hash of every value: a re-fetched partial last day changes a Close without changing the shape
+    return content_key(panel)
+
+
+class AnalyticsCache:
+    """LRU of PriceAnalytics keyed by (tickers, period, benchmark), recomputed when the panel changes."""
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[Hashable, PriceAnalytics]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, panel: pd.DataFrame, benchmark: str | None) -> PriceAnalytics:
+        fingerprint = _panel_fingerprint(panel)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        result = compute_analytics(panel, benchmark)
+        with self._lock:
+            self._entries[key] = (fingerprint, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+analytics_cache = AnalyticsCache()
+
+
+def price_analytics(tickers: list[str], period: str = "1y", benchmark: str | None = BENCHMARK) -> PriceAnalytics:
+    """
+    Analytics for `tickers` (plus the benchmark) over `period`, from the price
+    store. Stored bars are re-read (and refreshed once stale) on each call, but
+    the numbers are only recomputed once the bars change.
+    """
+    from src.data import get_price_panel
+
+    names = sorted({t.upper() for t in tickers})
+    load = names + ([benchmark] if benchmark and benchmark not in names else [])
+    panel = get_price_panel(load, period)
+    key = (tuple(names), period, benchmark)
+    return analytics_cache.get(key, panel, benchmark)
+
+
+def session_analytics(ticker: str, prices: pd.DataFrame, benchmark_prices: pd.DataFrame | None = None,
+                      period: str = "", benchmark: str | None = BENCHMARK) -> PriceAnalytics:
+    """
+    Analytics for one ticker from bars already loaded (the `Close` columns of
+    `prices` and `benchmark_prices`), cached like price_analytics(). Never
+    touches the price store or the network, so pages can call it on every rerun.
+    """
+    name = ticker.upper()
+    closes = {name: prices["Close"]}
+    if benchmark and name != benchmark and benchmark_prices is not None and "Close" in benchmark_prices:
+        closes[benchmark] = benchmark_prices["Close"]
+    panel = pd.concat(closes, axis=1).astype(np.float64)
+    return analytics_cache.get(("session", name, period, benchmark), panel, benchmark)
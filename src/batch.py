@@ -0,0 +1,234 @@
+"""
+Headless batch runner for the whole analysis pipeline.
+
+    python -m src.batch data/filings/*.csv --out runs/nightly
+    python -m src.batch data/filings --news data/news.csv --prices fixtures/prices --workers 8 --out runs/nightly
+
+Each financial CSV is one company (ticker = file name stem). For every
+company the runner loads the file, computes ratios, attaches sentiment and
+optional prices, and writes <out>/<TICKER>/{ratios,sentiment,prices}.parquet
+plus summary.md. Finished companies are appended to <out>/_manifest.jsonl;
+re-running the same command skips every company whose source file is
+unchanged since it last succeeded, so a crashed run resumes where it stopped.
+"""
+from __future__ import annotations
+import argparse
+import glob
+import json
+import multiprocessing as mp
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+import pandas as pd
+
+from src.data import load_uploaded_csv
+from src.prices import CsvFetcher, PriceStore, YahooFetcher
+from src.ratios import compute_ratios
+from src.sentiment import load_news_and_score
+from src.summary import generate_summary
+
+MANIFEST = "_manifest.jsonl"
+SCORED_NEWS = "_news.parquet"
+
+
+def discover(inputs: list[str]) -> list[Path]:
+    """Expand directories and glob patterns into a sorted, de-duplicated list of CSVs."""
+    found = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            found.update(path.glob("*.csv"))
+        else:
+            found.update(Path(p) for p in glob.glob(item))
+    return sorted(p for p in found if p.is_file())
+
+
+def _fingerprint(path: Path) -> dict:
+    stat = path.stat()
+    return {"source": str(path.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_manifest(out_dir: Path) -> dict[str, dict]:
+    """Latest manifest entry per ticker (later lines win; torn last lines are ignored)."""
+    entries = {}
+    path = out_dir / MANIFEST
+    if not path.exists():
+        return entries
+    for line in path.read_text().splitlines():
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            continue
+        entries[entry["ticker"]] = entry
+    return entries
+
+
+def _is_done(entry: dict | None, fingerprint: dict, out_dir: Path) -> bool:
+    return (
+        entry is not None
+        and entry.get("status") == "ok"
+        and all(entry.get(k) == v for k, v in fingerprint.items())
+        and (out_dir / entry["ticker"] / "summary.md").exists()
+    )
+
+
+# -------------------------------------------------------------------
+# ✅ Worker side (runs in pool processes)
+# -------------------------------------------------------------------
+_news_cache: dict[str, pd.DataFrame] = {}
+_price_store: PriceStore | None = None
+
+
+def _init_worker(prices: str | None, price_root: str) -> None:
+    global _price_store
+    if prices == "yahoo":
+        _price_store = PriceStore(root=price_root, fetcher=YahooFetcher())
+    elif prices:
+        _price_store = PriceStore(root=price_root, fetcher=CsvFetcher(prices))
+
+
+def _company_news(news_path: str | None, ticker: str) -> pd.DataFrame | None:
+    if not news_path:
+        return None
+    if news_path not in _news_cache:
+        _news_cache[news_path] = pd.read_parquet(news_path)
+    news = _news_cache[news_path]
+    if "ticker" in news.columns:
+        news = news[news["ticker"].astype(str).str.upper() == ticker].reset_index(drop=True)
+    return news
+
+
+def analyze_company(path: str, ticker: str, out_dir: str, news_path: str | None,
+                    period: str, currency: str, style: str) -> dict:
+    """Run the full pipeline for one company and write its outputs atomically."""
+    t0 = time.perf_counter()
+    with open(path, "rb") as f:
+        fin_df = load_uploaded_csv(f)
+    ratio_df = compute_ratios(fin_df)
+    sentiment_df = _company_news(news_path, ticker)
+    prices = None
+    if _price_store is not None:
+        try:
+            prices = _price_store.history(ticker, period)
+        except Exception:
+            prices = None  # a missing quote should not fail the company
+    summary = generate_summary(ratio_df, sentiment_df, ticker, currency, style=style)
+
+    final = Path(out_dir) / ticker
+    tmp = Path(out_dir) / f".{ticker}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    ratio_df.to_parquet(tmp / "ratios.parquet", index=False)
+    if sentiment_df is not None:
+        sentiment_df.to_parquet(tmp / "sentiment.parquet", index=False)
+    if prices is not None and not prices.empty:
+        prices.to_parquet(tmp / "prices.parquet")
+    (tmp / "summary.md").write_text(summary + "\n", encoding="utf-8")
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(tmp, final)
+
+    return {"rows": len(fin_df), "seconds": round(time.perf_counter() - t0, 4)}
+
+
+# -------------------------------------------------------------------
+# ✅ Driver
+# -------------------------------------------------------------------
+def _append_manifest(out_dir: Path, entry: dict) -> None:
+    with open(out_dir / MANIFEST, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def run(files: list[Path], out_dir: Path, news: Path | None = None, prices: str | None = None,
+        period: str = "1y", currency: str = "USD", style: str = "Executive brief",
+        workers: int | None = None, resume: bool = True, log=sys.stderr) -> dict:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    done = read_manifest(out_dir) if resume else {}
+
+    jobs = []
+    for path in files:
+        ticker = path.stem.upper()
+        fingerprint = _fingerprint(path)
+        if _is_done(done.get(ticker), fingerprint, out_dir):
+            continue
+        jobs.append((path, ticker, fingerprint))
+    skipped = len(files) - len(jobs)
+    print(f"{len(files)} companies, {skipped} already done, {len(jobs)} to run", file=log, flush=True)
+
+    # Score the news once up front; workers only read their ticker's slice
+    news_path = None
+    if news is not None and jobs:
+        scored = load_news_and_score("", news_path=news)
+        news_path = str(out_dir / SCORED_NEWS)
+        scored.to_parquet(news_path, index=False)
+
+    counts = {"ok": 0, "failed": 0, "skipped": skipped}
+    if not jobs:
+        return counts
+
+    ctx = mp.get_context("spawn")
+    started = time.perf_counter()
+    initargs = (prices, str(out_dir / "_prices"))
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=initargs) as pool:
+        # Keep a bounded window in flight so a huge run stays cheap to resume
+        window = (workers or os.cpu_count() or 1) * 4
+        queue = iter(jobs)
+        pending = {}
+        finished = 0
+        while True:
+            for path, ticker, fingerprint in queue:
+                future = pool.submit(analyze_company, str(path), ticker, str(out_dir), news_path,
+                                     period, currency, style)
+                pending[future] = (ticker, fingerprint)
+                if len(pending) >= window:
+                    break
+            if not pending:
+                break
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                ticker, fingerprint = pending.pop(future)
+                entry = {"ticker": ticker, **fingerprint}
+                try:
+                    entry.update(status="ok", **future.result())
+                    counts["ok"] += 1
+                except Exception as e:
+                    entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+                    counts["failed"] += 1
+                _append_manifest(out_dir, entry)
+                finished += 1
+                rate = finished / max(time.perf_counter() - started, 1e-9)
+                eta = (len(jobs) - finished) / rate
+                print(f"[{finished}/{len(jobs)}] {ticker} {entry['status']} "
+                      f"({rate:.1f}/s, eta {eta:.0f}s)", file=log, flush=True)
+    return counts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.batch", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="financial CSV files, directories or glob patterns")
+    parser.add_argument("--out", type=Path, required=True, help="output directory")
+    parser.add_argument("--news", type=Path, help="news CSV (date, source, headline[, ticker])")
+    parser.add_argument("--prices", help="'yahoo', or a directory of <TICKER>.csv price fixtures")
+    parser.add_argument("--period", default="1y")
+    parser.add_argument("--currency", default="USD")
+    parser.add_argument("--style", default="Executive brief", choices=["Executive brief", "Analyst deep-dive"])
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--no-resume", action="store_true", help="re-run companies that already succeeded")
+    args = parser.parse_args(argv)
+
+    files = discover(args.inputs)
+    if not files:
+        parser.error("no CSV files matched")
+    counts = run(files, args.out, news=args.news, prices=args.prices, period=args.period,
+                 currency=args.currency, style=args.style, workers=args.workers, resume=not args.no_resume)
+    print(f"done: {counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} skipped", file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
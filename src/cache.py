@@ -0,0 +1,177 @@
+from __future__ import annotations
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+import pandas as pd
+
+from src.data import DATA_DIR, SNIFF_BYTES, _sniff_separator, load_uploaded_csv
+from src.perf import annotate
+from src.ratios import compute_ratios, registry_key
+
+# Parsed uploads live next to the sample data, outside version control
+CACHE_DIR = DATA_DIR / ".cache" / "uploads"
+CACHE_MAX_BYTES = 512 * 1024 * 1024
+HASH_BLOCK = 1024 * 1024
+
+
+def upload_key(file, memo: dict | None = None) -> str:
+    """
+    SHA-256 of an uploaded file's bytes, read in blocks.
+    The file position is restored so the handle can still be parsed afterwards.
+    With a `memo` (e.g. a dict in session state), the digest is remembered per
+    Streamlit upload `file_id`, so a file is hashed once however often it is used.
+    """
+    file_id = getattr(file, "file_id", None)
+    if memo is not None and file_id is not None and file_id in memo:
+        return memo[file_id]
+    start = file.tell()
+    file.seek(0)
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(HASH_BLOCK), b""):
+        digest.update(block)
+    file.seek(start)
+    key = digest.hexdigest()
+    if memo is not None and file_id is not None:
+        memo[file_id] = key
+    return key
+
+
+class UploadCache:
+    """
+    Content-addressed on-disk cache of parsed uploads and their ratios.
+
+    Each entry is a directory named after the upload's hash and the ratio
+    registry's (so redefined ratios are recomputed) holding
+    financials.parquet and ratios.parquet. Entries are touched on every hit
+    and the least recently used ones are evicted once the cache grows past
+    `max_bytes`.
+    """
+
+    def __init__(self, root: Path = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def load(self, file, digests: dict | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Return (financials, ratios) for an upload, parsing it only on a miss.
+        `digests` memoizes the upload's hash (see upload_key).
+        """
+        key = f"{upload_key(file, digests)}-{registry_key()}"
+        cached = self._read(key)
+        if cached is not None:
+            with self._lock:
+                self.hits += 1
+            annotate(cache="hit", rows=len(cached[0]))
+            return cached
+
+        with self._lock:
+            self.misses += 1
+        annotate(cache="miss")
+        fin_df = load_uploaded_csv(file)
+        ratio_df = compute_ratios(fin_df)
+        self._write(key, fin_df, ratio_df)
+        annotate(rows=len(fin_df))
+        return fin_df, ratio_df
+
+    def preview(self, file, nrows: int = 5, digests: dict | None = None) -> pd.DataFrame:
+        """
+        First rows of an upload. A cached upload is previewed from its parsed
+        entry; otherwise only `nrows` rows are read, with the sniffed separator.
+        Hit and miss counters are left to load().
+        """
+        entry = self.root / f"{upload_key(file, digests)}-{registry_key()}"
+        try:
+            import pyarrow.parquet as pq
+
+            batch = next(pq.ParquetFile(entry / "financials.parquet").iter_batches(batch_size=nrows), None)
+            if batch is not None:
+                return batch.to_pandas()
+        except (OSError, ValueError):
+            pass  # not cached (or evicted meanwhile)
+        start = file.tell()
+        try:
+            sep = _sniff_separator(file.read(SNIFF_BYTES))
+            file.seek(start)
+            return pd.read_csv(file, sep=sep, nrows=nrows)
+        finally:
+            file.seek(start)
+
+    def stats(self) -> dict:
+        entries = [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")] \
+            if self.root.exists() else []
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "bytes": sum(_dir_size(p) for p in entries),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+
+    def _read(self, key: str) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+        entry = self.root / key
+        fin_path, ratio_path = entry / "financials.parquet", entry / "ratios.parquet"
+        if not (fin_path.exists() and ratio_path.exists()):
+            return None
+        try:
+            fin_df = pd.read_parquet(fin_path)
+            ratio_df = pd.read_parquet(ratio_path)
+            os.utime(entry)
+        except (OSError, ValueError):
+            # Evicted or half-written underneath us; treat as a miss
+            return None
+        return fin_df, ratio_df
+
+    def _write(self, key: str, fin_df: pd.DataFrame, ratio_df: pd.DataFrame) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f".{key}.{uuid.uuid4().hex}.tmp"
+        tmp.mkdir()
+        try:
+            fin_df.to_parquet(tmp / "financials.parquet")
+            ratio_df.to_parquet(tmp / "ratios.parquet")
+            os.replace(tmp, self.root / key)
+        except OSError:
+            # Another session stored the same upload first
+            shutil.rmtree(tmp, ignore_errors=True)
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = [p for p in self.root.iterdir() if p.is_dir() and not p.name.startswith(".")]
+            sizes = {p: _dir_size(p) for p in entries}
+            total = sum(sizes.values())
+            for entry in sorted(entries, key=_mtime):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= sizes[entry]
+                self.evictions += 1
+
+
+def _mtime(path: Path) -> float:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
+
+
+def _dir_size(path: Path) -> int:
+    try:
+        return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+    except FileNotFoundError:
+        return 0
+
+
+# Process-wide cache shared by every Streamlit session
+upload_cache = UploadCache()
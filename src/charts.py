@@ -0,0 +1,196 @@
+from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+import numpy as np
+import pandas as pd
+
+# Points actually sent to the browser per trace depend on how many rows are
+# visible: about one per POINT_STRIDE rows, at least POINT_BUDGET (one per two
+# pixel columns of a full-width chart) and at most MAX_POINT_BUDGET
+POINT_BUDGET = 600
+MAX_POINT_BUDGET = 2400
+POINT_STRIDE = 4
+# Source series longer than this are drawn as WebGL traces
+WEBGL_THRESHOLD = 1000
+
+
+def point_budget(visible: int) -> int:
+    """Target points for a chart showing `visible` rows (the whole series or a zoomed window)."""
+    return int(np.clip(visible // POINT_STRIDE, POINT_BUDGET, MAX_POINT_BUDGET))
+
+
+# -------------------------------------------------------------------
+# ✅ Downsampling
+# -------------------------------------------------------------------
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: positions of `n_out` points that keep the
+    visual shape of a line. The first and last points are always kept.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i == n_out - 3:
+            cx, cy = x[-1], y[-1]
+        else:
+            cx, cy = x[hi:edges[i + 2]].mean(), y[hi:edges[i + 2]].mean()
+        # Twice the area of the triangle (previous pick, candidate, next bucket mean)
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def _first_per_bucket(hit: np.ndarray, bucket: np.ndarray) -> np.ndarray:
+    pos = np.flatnonzero(hit)
+    _, first = np.unique(bucket[pos], return_index=True)
+    return pos[first]
+
+
+def minmax(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the min and max of each of n_out/2 equal buckets (plus both ends)."""
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(0, n, max(1, n_out // 2) + 1).astype(np.int64)
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(len(starts)), np.diff(edges))
+    lo = _first_per_bucket(y == np.minimum.reduceat(y, starts)[bucket], bucket)
+    hi = _first_per_bucket(y == np.maximum.reduceat(y, starts)[bucket], bucket)
+    return np.unique(np.r_[0, lo, hi, n - 1])
+
+
+def _numeric_x(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype="datetime64[ns]").astype(np.int64).astype(np.float64)
+    return values.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class ChartCache:
+    """
+    Small LRU of downsampled row positions, keyed by e.g. (ticker, period, column, zoom).
+    Entries remember a fingerprint of the source series and are recomputed when it changes.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[Hashable, np.ndarray]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, fingerprint: Hashable, compute: Callable[[], np.ndarray]) -> np.ndarray:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        positions = compute()
+        with self._lock:
+            self._entries[key] = (fingerprint, positions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return positions
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+chart_cache = ChartCache()
+
+
+def _values_key(values: pd.Series) -> str:
+    data = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    return hashlib.blake2b(np.ascontiguousarray(data).tobytes(), digest_size=8).hexdigest()
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, budget: int | None = None,
+               method: str = "lttb", key: Hashable | None = None) -> pd.DataFrame:
+    """
+    Rows of `df` (sorted by `x`) reduced to about `budget` points
+    (default: point_budget(len(df))). Rows with a missing `y` are dropped
+    first. With a `key` the chosen positions are cached in chart_cache until
+    the series (its dates or its values) changes.
+    """
+    if budget is None:
+        budget = point_budget(len(df))
+    if len(df) <= budget:
+        return df
+    if method not in ("lttb", "minmax"):
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    def compute() -> np.ndarray:
+        ys = df[y].to_numpy(dtype=np.float64, na_value=np.nan)
+        keep = np.flatnonzero(~np.isnan(ys))
+        if method == "lttb":
+            picked = lttb(_numeric_x(df[x])[keep], ys[keep], budget)
+        else:
+            picked = minmax(ys[keep], budget)
+        return keep[picked]
+
+    if key is None:
+        return df.iloc[compute()]
+    fingerprint = (len(df), df[x].iloc[0], df[x].iloc[-1], budget, method, _values_key(df[y]))
+    return df.iloc[chart_cache.get((key, y), fingerprint, compute)]
+
+
+def zoom(df: pd.DataFrame, x: str, start=None, end=None) -> pd.DataFrame:
+    """Rows with start <= x <= end. Downsampling the slice keeps detail as the window narrows."""
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (df[x] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (df[x] <= pd.Timestamp(end) + pd.Timedelta(days=1) - pd.Timedelta(1)).to_numpy()
+    return df if mask.all() else df[mask]
+
+
+# -------------------------------------------------------------------
+# ✅ Figures (plotly imported on first use)
+# -------------------------------------------------------------------
+def _title(title: str, shown: int, total: int) -> str:
+    return title if shown == total else f"{title} ({shown:,} of {total:,} points)"
+
+
+def line_figure(df: pd.DataFrame, x: str, y: str, title: str, budget: int | None = None,
+                key: Hashable | None = None, markers: bool = False):
+    import plotly.graph_objects as go
+
+    shown = downsample(df, x, y, budget, "lttb", key)
+    trace = go.Scattergl if len(df) > WEBGL_THRESHOLD else go.Scatter
+    fig = go.Figure(trace(x=shown[x], y=shown[y], name=y, mode="lines+markers" if markers else "lines"))
+    fig.update_layout(title=_title(title, len(shown), len(df)), xaxis_title=x, yaxis_title=y)
+    return fig
+
+
+def scatter_figure(df: pd.DataFrame, x: str, y: str, title: str, hover: list[str] | None = None,
+                   budget: int | None = None, key: Hashable | None = None):
+    """Scatter that keeps each bucket's extremes, so outlier headlines stay visible."""
+    import plotly.graph_objects as go
+
+    shown = downsample(df, x, y, budget, "minmax", key)
+    hover = hover or []
+    trace = go.Scattergl if len(df) > WEBGL_THRESHOLD else go.Scatter
+    template = "<br>".join([f"{x}=%{{x}}", f"{y}=%{{y}}"]
+                           + [f"{h}=%{{customdata[{i}]}}" for i, h in enumerate(hover)])
+    fig = go.Figure(trace(
+        x=shown[x], y=shown[y], mode="markers", name=y,
+        customdata=shown[hover].to_numpy() if hover else None,
+        hovertemplate=template + "<extra></extra>",
+    ))
+    fig.update_layout(title=_title(title, len(shown), len(df)), xaxis_title=x, yaxis_title=y)
+    return fig
@@ -0,0 +1,11 @@
+"""Time budgets shared by the Analyze pipeline and the loaders it runs."""
+
+# Per-stage time budgets (seconds) for the Analyze flow
+STAGE_TIMEOUTS = {
+    "compute_ratios": 30.0,
+    "load_news_and_score": 45.0,
+    "get_price_history": 15.0,
+    "get_benchmark_history": 15.0,
+    "sentiment_rollups": 15.0,
+}
+DEFAULT_TIMEOUT = 30.0
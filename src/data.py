@@ -1,82 +1,162 @@
 from __future__ import annotations
 import pandas as pd
+import csv
 import io
 from pathlib import Path
-import yfinance as yf
+
+from src.config import STAGE_TIMEOUTS
+from src.prices import price_store
+from src.singleflight import single_flight
 
 
 # Base data directory
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 
 
+# Columns every financial CSV must provide
+REQUIRED_COLUMNS = [
+    "date", "revenue", "cogs", "operating_income", "net_income",
+    "current_assets", "current_liabilities", "total_assets",
+    "total_liabilities", "shareholders_equity", "inventory"
+]
+NUMERIC_COLUMNS = {c: "float64" for c in REQUIRED_COLUMNS if c != "date"}
+
+# Streaming parse settings for uploads
+SNIFF_BYTES = 64 * 1024
+CSV_CHUNK_ROWS = 250_000
+
+
+def normalize_column(name: str) -> str:
+    """CSV header as used throughout the app: ' Net Income' -> 'net_income' (BOM stripped)."""
+    return name.strip().lstrip("\ufeff").strip().lower().replace(" ", "_")
+
+
+def _sniff_separator(head: bytes) -> str:
+    sample = head[:2000]
+    commas, semis, tabs = sample.count(b","), sample.count(b";"), sample.count(b"\t")
+    if commas >= semis and commas >= tabs:
+        return ","
+    if semis >= tabs:
+        return ";"
+    return "\t"
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Replays bytes already consumed from a non-seekable stream before the rest of it."""
+
+    def __init__(self, prefix: bytes, stream):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buf) -> int:
+        if self._prefix:
+            n = min(len(buf), len(self._prefix))
+            buf[:n] = self._prefix[:n]
+            self._prefix = self._prefix[n:]
+            return n
+        data = self._stream.read(len(buf))
+        buf[:len(data)] = data
+        return len(data)
+
+
 # -------------------------------------------------------------------
 # ✅ Upload CSV Loader (handles both Streamlit + local open())
 # -------------------------------------------------------------------
 def load_uploaded_csv(file) -> pd.DataFrame:
     """
     Load a user-uploaded CSV file robustly.
-    Supports both Streamlit UploadedFile and normal open() file objects.
+    Supports both Streamlit UploadedFile and binary open() file objects.
+
+    The upload is streamed rather than decoded into one string: the separator
+    and schema are checked from the first raw block, then only the required
+    columns are parsed in chunks with explicit float64 dtypes.
     """
     if file is None:
         raise ValueError("No file provided.")
 
-    # Works with both Streamlit UploadedFile and standard file handles
+    # Read just enough raw bytes to see the whole header line
     try:
-        if hasattr(file, "getvalue"):
-            raw = file.getvalue()
-        else:
-            raw = file.read()
-        if not raw:
+        seekable = hasattr(file, "seek") and (not hasattr(file, "seekable") or file.seekable())
+        start = file.tell() if seekable else 0
+        head = file.read(SNIFF_BYTES)
+        while head and b"\n" not in head:
+            more = file.read(SNIFF_BYTES)
+            if not more:
+                break
+            head += more
+        if not head:
             raise ValueError("File is empty.")
-        text = raw.decode("utf-8", errors="ignore")
+        if seekable:
+            file.seek(start)
+            stream = file
+        else:
+            stream = io.BufferedReader(_PrefixedStream(head, file))
     except Exception as e:
         raise ValueError(f"Unable to read uploaded file: {e}")
 
-    # Detect separator
-    sample = text[:2000]
-    if sample.count(",") >= sample.count(";") and sample.count(",") >= sample.count("\t"):
-        sep = ","
-    elif sample.count(";") >= sample.count("\t"):
-        sep = ";"
-    else:
-        sep = "\t"
+    sep = _sniff_separator(head)
+
+    # Validate schema from the header before touching the body
+    header_line = head.split(b"\n", 1)[0].decode("utf-8", errors="ignore").rstrip("\r")
+    raw_names = next(csv.reader([header_line], delimiter=sep), [])
+    names = [normalize_column(c) for c in raw_names]
+    if not any(names):
+        raise ValueError("CSV appears empty or has no readable columns.")
+    missing = [c for c in REQUIRED_COLUMNS if c not in names]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
 
+    # Parse the body in chunks, keeping only the required columns
+    chunks = []
     try:
-        df = pd.read_csv(io.StringIO(text), sep=sep)
+        reader = pd.read_csv(
+            stream,
+            sep=sep,
+            header=0,
+            names=names,
+            usecols=REQUIRED_COLUMNS,
+            dtype=NUMERIC_COLUMNS,
+            encoding="utf-8",
+            encoding_errors="ignore",
+            chunksize=CSV_CHUNK_ROWS,
+        )
+        with reader:
+            for chunk in reader:
+                chunk["date"] = pd.to_datetime(chunk["date"], errors="coerce")
+                chunks.append(chunk)
     except Exception as e:
         raise ValueError(f"Unable to parse CSV content: {e}")
 
-    if df.empty or df.shape[1] == 0:
+    if not chunks or sum(len(c) for c in chunks) == 0:
         raise ValueError("CSV appears empty or has no readable columns.")
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    del chunks
 
-    # Normalize column names
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
-
-    # Validate required columns
-    required = [
-        "date", "revenue", "cogs", "operating_income", "net_income",
-        "current_assets", "current_liabilities", "total_assets",
-        "total_liabilities", "shareholders_equity", "inventory"
-    ]
-    missing = [c for c in required if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing required columns: {missing}")
-
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
     if df["date"].isna().all():
         raise ValueError("Could not parse any valid dates in 'date' column.")
 
     df = df.dropna(subset=["date"]).sort_values("date").reset_index(drop=True)
-    return df
+    return df[REQUIRED_COLUMNS]
 
 
 # -------------------------------------------------------------------
 # ✅ Load Built-in Sample Financials
 # -------------------------------------------------------------------
-def load_financials(_: str) -> pd.DataFrame:
+def load_financials(ticker: str) -> pd.DataFrame:
     """
-    Loads bundled sample financial data.
+    Quarterly financials for `ticker` from the columnar store (only that
+    ticker's partitions are read). Falls back to the bundled sample data.
     """
+    from src.store import columnar_store  # pyarrow.dataset is imported on first use
+
+    if ticker and columnar_store.has("financials", ticker):
+        df = columnar_store.read_financials(ticker)
+        if not df.empty:
+            return df
+
     sample_path = DATA_DIR / "sample_financials.csv"
     if not sample_path.exists():
         raise FileNotFoundError(f"Sample data not found: {sample_path}")
@@ -98,32 +178,29 @@ def load_financials(_: str) -> pd.DataFrame:
 # -------------------------------------------------------------------
 def get_price_history(ticker: str, period: str = "1y") -> pd.DataFrame:
     """
-    Fetch price history using yfinance and normalize 'Close' column.
-    Handles MultiIndex columns and array-like cells.
+    Daily closing prices for `ticker`, served from the on-disk price store.
+    Only bars newer than the last stored one are downloaded once it goes stale.
+    Concurrent sessions asking for the same (ticker, period) share one load.
     """
     try:
-        df = yf.download(ticker, period=period, progress=False)
-        if not isinstance(df, pd.DataFrame) or df.empty:
+        bars = single_flight.do(("prices", ticker.upper(), period),
+                                lambda: price_store.history(ticker, period),
+                                timeout=STAGE_TIMEOUTS["get_price_history"])
+        if bars.empty or "Close" not in bars.columns:
             return pd.DataFrame()
-
-        # Handle MultiIndex columns (('Close','AAPL')) or single-level
-        if isinstance(df.columns, pd.MultiIndex):
-            if ("Close", ticker) in df.columns:
-                close = df[("Close", ticker)]
-            elif "Close" in df.columns.get_level_values(0):
-                close = df["Close"].iloc[:, 0]
-            else:
-                close = df.select_dtypes("number").iloc[:, 0]
-        else:
-            close = df["Close"] if "Close" in df.columns else df.select_dtypes("number").iloc[:, 0]
-
-        # Flatten lists/arrays
-        import numpy as np
-        close = close.apply(lambda v: v[0] if isinstance(v, (list, tuple, np.ndarray)) else v)
-        close = pd.to_numeric(close, errors="coerce")
-
-        out = close.rename("Close").to_frame()
+        out = bars[["Close"]]
         out.index.name = "Date"
         return out
     except Exception:
         return pd.DataFrame()
+
+
+def get_price_panel(tickers: list[str], period: str = "1y") -> pd.DataFrame:
+    """
+    Wide Close-price panel (Date x ticker) for a watchlist.
+    Missing tickers come back as all-NaN columns.
+    """
+    try:
+        return price_store.close_panel(tickers, period)
+    except Exception:
+        return pd.DataFrame(columns=[t.upper() for t in tickers])
@@ -0,0 +1,185 @@
+"""
+Shared, read-only frames for session state.
+
+Every session that analyzes the same company ends up with equal financials,
+ratios, prices and headlines. Instead of each session holding its own copy,
+frames are put into one process-wide store keyed by a hash of their content
+and sessions keep a small FrameRef. Stored frames are compacted (float32
+where it is exact enough, categorical for repetitive text) and handed out as
+copy-on-write views, so a session's edits never reach the shared copy.
+"""
+from __future__ import annotations
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+
+# Unreferenced frames are kept (for the next session asking for them) up to this size
+STORE_MAX_BYTES = 256 * 1024 * 1024
+# float64 columns are stored as float32 only below this magnitude: above it
+# float32 cannot even hold whole numbers exactly (statement lines in currency units)
+FLOAT32_MAX = 2.0 ** 24
+# Text columns whose distinct values are at most this share of the rows become categorical
+CATEGORY_MAX_SHARE = 0.5
+# Shallow copies only keep writes private under copy-on-write, the default from pandas 3
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3
+
+
+def content_key(df: pd.DataFrame) -> str:
+    """Hash of a frame's columns, dtypes, index and values."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(df.columns), [str(t) for t in df.dtypes], df.index.name)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy of `df` with small float64 columns as float32 and repetitive text as categorical."""
+    cols = {}
+    for name in df.columns:
+        s = df[name]
+        if s.dtype == np.float64:
+            values = s.to_numpy()
+            finite = values[np.isfinite(values)]
+            if not finite.size or np.abs(finite).max() < FLOAT32_MAX:
+                s = s.astype(np.float32)
+        elif (pd.api.types.is_string_dtype(s.dtype) or s.dtype == object) and len(s):
+            if s.nunique(dropna=True) <= CATEGORY_MAX_SHARE * len(s):
+                s = s.astype("category")
+        cols[name] = s
+    out = pd.DataFrame(cols, index=df.index)
+    out.columns = df.columns
+    return out
+
+
+def _nbytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+class FrameRef:
+    """A session's handle on a shared frame. The frame stays pinned while a FrameRef to it is alive."""
+
+    __slots__ = ("key", "_store", "__weakref__")
+
+    def __init__(self, key: str, store: "FrameStore"):
+        self.key = key
+        self._store = store
+
+    def get(self) -> pd.DataFrame:
+        return self._store.get(self.key)
+
+    def __repr__(self) -> str:
+        return f"FrameRef({self.key[:12]})"
+
+
+class FrameStore:
+    """
+    Content-addressed frames with reference counts. put() returns a FrameRef;
+    equal frames share one stored copy. Frames nobody references any more
+    stay cached and are evicted least recently used past `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._frames: OrderedDict[str, pd.DataFrame] = OrderedDict()
+        self._sizes: dict[str, int] = {}
+        self._refs: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._frames
+
+    @property
+    def nbytes(self) -> int:
+        return sum(self._sizes.values())
+
+    def put(self, df: pd.DataFrame) -> FrameRef:
+        key = content_key(df)
+        with self._lock:
+            stored = key in self._frames
+        # Compact outside the lock; a racing put of the same frame just wins or loses
+        frame = None if stored else compact(df)
+        with self._lock:
+            if key in self._frames:
+                self.hits += 1
+                self._frames.move_to_end(key)
+            else:
+                self.misses += 1
+                self._frames[key] = frame
+                self._sizes[key] = _nbytes(frame)
+            self._refs[key] = self._refs.get(key, 0) + 1
+            self._evict()
+        ref = FrameRef(key, self)
+        weakref.finalize(ref, self._release, key)
+        return ref
+
+    def get(self, key: str) -> pd.DataFrame:
+        """
+        A copy-on-write view of the stored frame: free to read, and writes stay
+        private. Older pandas without copy-on-write gets a deep copy instead.
+        """
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is None:
+                raise KeyError(f"Frame {key} is not in the store.")
+            self._frames.move_to_end(key)
+        return frame.copy(deep=not COPY_ON_WRITE)
+
+    def refcount(self, key: str) -> int:
+        with self._lock:
+            return self._refs.get(key, 0)
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            left = self._refs.get(key, 0) - 1
+            if left > 0:
+                self._refs[key] = left
+            else:
+                self._refs.pop(key, None)
+            self._evict()
+
+    def _evict(self) -> None:
+        # Called with the lock held. Referenced frames are never evicted.
+        total = sum(self._sizes.values())
+        for key in list(self._frames):
+            if total <= self.max_bytes:
+                break
+            if self._refs.get(key):
+                continue
+            del self._frames[key]
+            total -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"frames": len(self._frames), "bytes": sum(self._sizes.values()),
+                    "referenced": sum(1 for k in self._frames if self._refs.get(k)),
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self) -> None:
+        """Drop the unreferenced frames."""
+        with self._lock:
+            for key in [k for k in self._frames if not self._refs.get(k)]:
+                del self._frames[key]
+                self._sizes.pop(key)
+
+
+frame_store = FrameStore()
+
+
+def share(df: pd.DataFrame | None, store: FrameStore = frame_store) -> FrameRef | None:
+    """Put a frame in the shared store (None stays None)."""
+    return None if df is None else store.put(df)
+
+
+def resolve(value):
+    """The frame behind a FrameRef; anything else (a plain frame, None) is returned as is."""
+    return value.get() if isinstance(value, FrameRef) else value
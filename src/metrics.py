@@ -0,0 +1,154 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Statement lines summed over the trailing four quarters and tracked for growth
+FLOW_COLUMNS = ['revenue', 'net_income']
+# Ratios that get rolling mean / volatility / trend slope
+TREND_COLUMNS = ['gross_margin', 'operating_margin', 'net_margin',
+                 'current_ratio', 'debt_to_equity', 'roe', 'roa']
+TTM_QUARTERS = 4
+YOY_LAG = 4
+QOQ_LAG = 1
+WINDOW = 4
+
+
+def _positions(keys: np.ndarray) -> np.ndarray:
+    """Row position within its group for an array of group codes sorted contiguously."""
+    n = len(keys)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    lengths = np.diff(np.r_[starts, n])
+    return np.arange(n) - np.repeat(starts, lengths)
+
+
+def _windows(values: np.ndarray, window: int) -> np.ndarray:
+    # Row i's window is values[i-window+1 : i+1]; the front is padded with NaN
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    return sliding_window_view(padded, window)
+
+
+def _lagged(values: np.ndarray, pos: np.ndarray, lag: int) -> np.ndarray:
+    out = np.full(values.shape, np.nan)
+    out[lag:] = values[:-lag] if lag else values
+    out[pos < lag] = np.nan
+    return out
+
+
+def _growth(values: np.ndarray, pos: np.ndarray, lag: int) -> np.ndarray:
+    # Change over |base| so a swing from loss to profit reads as growth
+    base = _lagged(values, pos, lag)
+    out = np.full(values.shape, np.nan)
+    np.divide(values - base, np.abs(base), out=out, where=base != 0)
+    return out
+
+
+def _metric_arrays(df: pd.DataFrame, pos: np.ndarray, window: int) -> dict[str, np.ndarray]:
+    """
+    Every metric for rows already sorted by (ticker, date).
+    Windows are taken over the whole column at once; rows whose window would
+    reach back into the previous ticker (pos < window - 1) are blanked.
+    """
+    out = {}
+    short_ttm = pos < TTM_QUARTERS - 1
+    for col in FLOW_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        ttm = _windows(values, TTM_QUARTERS).sum(axis=1)
+        ttm[short_ttm] = np.nan
+        out[f'{col}_ttm'] = ttm
+        out[f'{col}_yoy'] = _growth(values, pos, YOY_LAG)
+        out[f'{col}_qoq'] = _growth(values, pos, QOQ_LAG)
+
+    # Least-squares slope against quarter number: sum(xc * y) / sum(xc ** 2)
+    xc = np.arange(window) - (window - 1) / 2
+    sxx = float(xc @ xc)
+    short = pos < window - 1
+    for col in TREND_COLUMNS:
+        if col not in df.columns:
+            continue
+        win = _windows(df[col].to_numpy(dtype=np.float64, na_value=np.nan), window)
+        mean = win.mean(axis=1)
+        std = win.std(axis=1, ddof=1) if window > 1 else np.full(len(win), np.nan)
+        slope = win @ xc / sxx if window > 1 else np.full(len(win), np.nan)
+        for name, arr in (('mean', mean), ('std', std), ('slope', slope)):
+            arr[short] = np.nan
+            out[f'{col}_{name}{window}q'] = arr
+    return out
+
+
+def _sorted(df: pd.DataFrame, ticker_col: str) -> tuple[pd.DataFrame, np.ndarray]:
+    by = [ticker_col, 'date'] if ticker_col in df.columns else ['date']
+    df = df.sort_values(by, kind='stable')
+    if ticker_col in df.columns:
+        keys = pd.factorize(df[ticker_col])[0]
+    else:
+        keys = np.zeros(len(df), dtype=np.int64)
+    return df, _positions(keys)
+
+
+def compute_metrics(ratio_df: pd.DataFrame, window: int = WINDOW, ticker_col: str = 'ticker') -> pd.DataFrame:
+    """
+    Trailing metrics for the output of compute_ratios / compute_ratios_panel.
+
+    Adds TTM sums and YoY/QoQ growth for revenue and net income, plus rolling
+    mean, volatility (sample std) and linear trend slope per quarter for the
+    main ratios over `window` quarters. Works on one company or a long panel
+    with a `ticker_col`; rows come back sorted by (ticker, date) with their
+    original index. A metric is NaN until its ticker has enough history.
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1 quarter.")
+    df, pos = _sorted(ratio_df, ticker_col)
+    metrics = pd.DataFrame(_metric_arrays(df, pos, window), index=df.index)
+    return pd.concat([df, metrics], axis=1)
+
+
+def append_metrics(
+    metrics_df: pd.DataFrame,
+    new_ratios: pd.DataFrame,
+    window: int = WINDOW,
+    ticker_col: str = 'ticker',
+) -> pd.DataFrame:
+    """
+    Extend a compute_metrics() result with newly reported quarters.
+
+    Only the last few rows of each affected ticker are re-read as context, so
+    appending a quarter costs the same however long the history is. The result
+    equals compute_metrics() over the combined ratios. New rows dated on or
+    before a ticker's latest quarter (restatements) replace any existing row
+    for the same (ticker, date) and trigger a full recompute.
+    """
+    if new_ratios.empty:
+        return metrics_df
+    context = max(window - 1, TTM_QUARTERS - 1, YOY_LAG)
+    ratio_cols = list(new_ratios.columns)
+
+    if ticker_col in new_ratios.columns and ticker_col in metrics_df.columns:
+        latest = metrics_df.groupby(ticker_col, sort=False)['date'].max()
+        prior = new_ratios[ticker_col].map(latest)
+        touched = metrics_df[ticker_col].isin(new_ratios[ticker_col].unique())
+        tail = metrics_df[touched].groupby(ticker_col, sort=False).tail(context)
+    else:
+        prior = pd.Series(metrics_df['date'].max() if len(metrics_df) else pd.NaT, index=new_ratios.index)
+        tail = metrics_df.tail(context)
+
+    if (new_ratios['date'] <= prior).any():
+        combined = pd.concat([metrics_df[ratio_cols], new_ratios])
+        keys = [ticker_col, 'date'] if ticker_col in combined.columns else ['date']
+        combined = combined.drop_duplicates(keys, keep='last')
+        return compute_metrics(combined, window=window, ticker_col=ticker_col)
+
+    combined = pd.concat([tail[ratio_cols], new_ratios], ignore_index=True)
+    df, pos = _sorted(combined, ticker_col)
+    fresh = pd.concat([df, pd.DataFrame(_metric_arrays(df, pos, window), index=df.index)], axis=1)
+    fresh = fresh[df.index.to_numpy() >= len(tail)]
+    # Give the new rows back their own index labels
+    fresh.index = new_ratios.index[fresh.index.to_numpy() - len(tail)]
+    out = pd.concat([metrics_df, fresh])
+    if ticker_col in out.columns:
+        out = out.sort_values([ticker_col, 'date'], kind='stable')
+    return out
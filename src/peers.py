@@ -0,0 +1,191 @@
+"""
+Cross-sectional peer index: percentile ranks and peer-group aggregates
+for every ratio, ticker and calendar quarter of a universe.
+
+    python -m src.peers                         # universe = financials in the columnar store
+    python -m src.peers --groups sectors.csv    # CSV with ticker,group (e.g. sector)
+
+The index is built once with grouped, vectorized ranks and saved as Parquet
+under data/.cache/peers/; the Ratios page then answers "where does this
+company's ROE sit vs peers this quarter" with index lookups.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import threading
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+from src.data import DATA_DIR
+from src.ratios import compute_ratios_panel, ratio_names
+
+PEER_DIR = DATA_DIR / ".cache" / "peers"
+DEFAULT_GROUP = "All"
+# Group label of the universe-wide aggregates
+UNIVERSE = "*"
+
+
+def quarter(dates) -> np.ndarray:
+    """Calendar quarter label ('2024Q1') so fiscal dates a few days apart line up."""
+    return pd.Series(pd.to_datetime(dates)).dt.to_period("Q").astype(str).to_numpy()
+
+
+class PeerIndex:
+    """
+    `ranks`: one row per (ticker, period) with each ratio, its percentile in
+    the period (`<ratio>_pct`) and within the ticker's group (`<ratio>_group_pct`).
+    `aggregates`: count/mean/median/p25/p75 per (group, period), with the
+    universe under group '*'.
+    """
+
+    def __init__(self, ranks: pd.DataFrame, aggregates: pd.DataFrame):
+        self.ranks = ranks.set_index(["ticker", "period"]).sort_index()
+        self.aggregates = aggregates.set_index(["group", "period"]).sort_index()
+        self._periods = {p: rows for p, rows in self.ranks.reset_index().groupby("period")}
+        self.metrics = [c for c in ratio_names() if c in self.ranks.columns]
+        self._tickers = frozenset(self.ranks.index.get_level_values(0))
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._tickers
+
+    def periods(self) -> list[str]:
+        return sorted(self._periods)
+
+    def history(self, ticker: str, metric: str) -> pd.DataFrame:
+        """Value and percentiles of one ratio for a ticker, by period."""
+        return self.ranks.loc[ticker, [metric, f"{metric}_pct", f"{metric}_group_pct"]]
+
+    def query(self, ticker: str, metric: str, period: str | None = None, value: float | None = None) -> dict:
+        """
+        Where `metric` of `ticker` sits among peers in `period` (default: its latest).
+        Companies outside the universe can pass their own `value` and a period;
+        their percentile is the share of peers at or below it (NaN for a NaN value).
+        """
+        if metric not in self.metrics:
+            raise KeyError(f"Unknown ratio: {metric}")
+        group = DEFAULT_GROUP
+        if ticker in self:
+            rows = self.ranks.loc[ticker]
+            period = period or rows.index[-1]
+            row = rows.loc[period]
+            group = row["group"]
+            value, pct, group_pct = row[metric], row[f"{metric}_pct"], row[f"{metric}_group_pct"]
+        else:
+            if value is None or period not in self._periods:
+                raise KeyError(f"{ticker} is not in the peer index for {period}")
+            peers = np.sort(self._periods[period][metric].dropna().to_numpy())
+            if len(peers) and not np.isnan(value):
+                pct = np.searchsorted(peers, value, side="right") / len(peers)
+            else:
+                pct = np.nan
+            group_pct = np.nan
+
+        out = {"ticker": ticker, "metric": metric, "period": period, "group": group,
+               "value": value, "pct": pct, "group_pct": group_pct}
+        for label, key in (("universe", UNIVERSE), ("group", group)):
+            if (key, period) in self.aggregates.index:
+                agg = self.aggregates.loc[(key, period)]
+                out[f"{label}_median"] = agg[f"{metric}_median"]
+                out[f"{label}_count"] = int(agg[f"{metric}_count"])
+        return out
+
+    def save(self, root: str | Path = PEER_DIR) -> None:
+        root = Path(root)
+        root.mkdir(parents=True, exist_ok=True)
+        # ranks.parquet goes last: peer_index() reloads when its mtime changes
+        for name, frame in (("aggregates", self.aggregates), ("ranks", self.ranks)):
+            tmp = root / f"{name}.{os.getpid()}.tmp"
+            frame.reset_index().to_parquet(tmp, index=False)
+            os.replace(tmp, root / f"{name}.parquet")
+
+    @classmethod
+    def load(cls, root: str | Path = PEER_DIR) -> "PeerIndex":
+        root = Path(root)
+        return cls(pd.read_parquet(root / "ranks.parquet"), pd.read_parquet(root / "aggregates.parquet"))
+
+
+def _aggregate(df: pd.DataFrame, by: list[str], cols: list[str]) -> pd.DataFrame:
+    g = df.groupby(by, sort=False)[cols]
+    parts = {"count": g.count(), "mean": g.mean(), "median": g.median(),
+             "p25": g.quantile(0.25), "p75": g.quantile(0.75)}
+    out = pd.concat({stat: frame for stat, frame in parts.items()}, axis=1)
+    out.columns = [f"{col}_{stat}" for stat, col in out.columns]
+    return out.reset_index()
+
+
+def build_peer_index(
+    ratio_panel: pd.DataFrame,
+    groups: dict[str, str] | pd.Series | None = None,
+    ticker_col: str = "ticker",
+) -> PeerIndex:
+    """
+    Rank every ratio across tickers within each calendar quarter, overall and
+    within each peer group (`groups` maps ticker -> group; default one group).
+    A ticker reporting twice in a quarter keeps its latest row.
+    """
+    cols = [c for c in ratio_names() if c in ratio_panel.columns]
+    df = ratio_panel[[ticker_col, "date", *cols]].rename(columns={ticker_col: "ticker"})
+    df = df.assign(period=quarter(df["date"]))
+    df = (df.sort_values(["ticker", "date"], kind="stable")
+            .drop_duplicates(["ticker", "period"], keep="last")
+            .reset_index(drop=True))
+    if groups is not None:
+        df["group"] = df["ticker"].map(pd.Series(groups)).fillna(DEFAULT_GROUP).astype(str)
+    else:
+        df["group"] = DEFAULT_GROUP
+
+    pct = df.groupby("period")[cols].rank(pct=True).add_suffix("_pct")
+    group_pct = df.groupby(["period", "group"])[cols].rank(pct=True).add_suffix("_group_pct")
+    ranks = pd.concat([df, pct, group_pct], axis=1)
+
+    universe = _aggregate(df, ["period"], cols).assign(group=UNIVERSE)
+    aggregates = pd.concat([universe, _aggregate(df, ["group", "period"], cols)], ignore_index=True)
+    return PeerIndex(ranks, aggregates)
+
+
+_loaded: tuple[float, PeerIndex] | None = None
+_loaded_lock = threading.Lock()
+
+
+def peer_index(root: str | Path = PEER_DIR) -> PeerIndex | None:
+    """The saved index, re-read only after it is rebuilt. None if none was built."""
+    global _loaded
+    path = Path(root) / "ranks.parquet"
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    with _loaded_lock:
+        if _loaded is None or _loaded[0] != mtime:
+            _loaded = (mtime, PeerIndex.load(root))
+        return _loaded[1]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.peers", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--groups", type=Path, help="CSV with ticker and group columns")
+    parser.add_argument("--out", type=Path, default=PEER_DIR)
+    args = parser.parse_args(argv)
+
+    from src.store import columnar_store
+
+    fin = columnar_store.read("financials")
+    if fin.empty:
+        parser.error("the columnar store has no financials; ingest some with python -m src.store")
+    groups = None
+    if args.groups:
+        g = pd.read_csv(args.groups)
+        groups = pd.Series(g["group"].to_numpy(), index=g["ticker"].astype(str).str.upper())
+
+    index = build_peer_index(compute_ratios_panel(fin), groups)
+    index.save(args.out)
+    print(f"indexed {len(index.ranks)} ticker-quarters across {len(index.periods())} quarters into {args.out}",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+from __future__ import annotations
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from contextvars import ContextVar
+
+# Structured span records go here as one JSON object per line
+logger = logging.getLogger("fha.perf")
+
+_trace: ContextVar["Trace | None"] = ContextVar("fha_trace", default=None)
+_span: ContextVar["Span | None"] = ContextVar("fha_span", default=None)
+
+
+class _NullSpan:
+    """Stand-in returned while tracing is off; every operation is a no-op."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _MemoryTracing:
+    """
+    Process-wide tracemalloc bookkeeping shared by every session's traces.
+
+    Tracing runs while at least one memory trace is open (and is stopped only
+    if it was started here). The traced peak is process-wide too, so it is
+    reset only by a span that opens while no other span is measuring, and a
+    span reports a peak only if no other span opened before it closed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._traces = 0
+        self._started = False
+        self._open_spans = 0
+        self._epoch = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._traces == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started = True
+            self._traces += 1
+
+    def stop(self) -> None:
+        with self._lock:
+            self._traces -= 1
+            if self._traces == 0 and self._started:
+                tracemalloc.stop()
+                self._started = False
+
+    def enter_span(self) -> tuple[int, int] | None:
+        """Baseline for a span, or None when another span is already measuring."""
+        with self._lock:
+            self._open_spans += 1
+            self._epoch += 1
+            if self._open_spans > 1 or not tracemalloc.is_tracing():
+                return None
+            tracemalloc.reset_peak()
+            return self._epoch, tracemalloc.get_traced_memory()[0]
+
+    def exit_span(self, baseline: tuple[int, int] | None) -> float | None:
+        """Peak MB above the baseline, or None if the span overlapped another one."""
+        with self._lock:
+            self._open_spans -= 1
+            if baseline is None or baseline[0] != self._epoch or not tracemalloc.is_tracing():
+                return None
+            return max(0, tracemalloc.get_traced_memory()[1] - baseline[1]) / 1e6
+
+
+_memory = _MemoryTracing()
+
+
+class Span:
+    """
+    One timed stage: wall time, peak traced memory and free-form attributes.
+    Spans that overlap other spans (concurrent stages, other sessions) only
+    report wall time, as their peaks cannot be told apart.
+    """
+
+    def __init__(self, trace: "Trace", name: str, attrs: dict):
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.seconds = None
+        self.peak_mb = None
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._token = _span.set(self)
+        if self.trace.memory:
+            self._baseline = _memory.enter_span()
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._t0
+        if self.trace.memory:
+            self.peak_mb = _memory.exit_span(self._baseline)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        _span.reset(self._token)
+        self.trace.finish(self)
+        return False
+
+    def record(self) -> dict:
+        rec = {"span": self.name, "seconds": round(self.seconds, 6)}
+        if self.peak_mb is not None:
+            rec["peak_mb"] = round(self.peak_mb, 3)
+        rec.update(self.attrs)
+        return rec
+
+
+class Trace:
+    """
+    Collects the spans of one run (e.g. one Analyze click).
+    Use as a context manager; spans opened inside it are recorded.
+    """
+
+    def __init__(self, name: str = "analyze", memory: bool = True):
+        self.name = name
+        self.memory = memory
+        self.spans: list[Span] = []
+
+    def __enter__(self):
+        if self.memory:
+            _memory.start()
+        self._token = _trace.set(self)
+        return self
+
+    def __exit__(self, *exc):
+        _trace.reset(self._token)
+        if self.memory:
+            _memory.stop()
+        return False
+
+    def finish(self, span: Span) -> None:
+        self.spans.append(span)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({"trace": self.name, **span.record()}, default=str))
+
+    def records(self) -> list[dict]:
+        return [s.record() for s in self.spans]
+
+
+def span(name: str, **attrs):
+    """
+    Time a stage of the active trace. Outside a trace this returns a shared
+    no-op object, so instrumented code costs one ContextVar lookup.
+    """
+    trace = _trace.get()
+    if trace is None:
+        return _NULL_SPAN
+    return Span(trace, name, attrs)
+
+
+def annotate(**attrs) -> None:
+    """Attach attributes (row counts, cache hit/miss, ...) to the innermost open span."""
+    current = _span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def enable_json_logging(stream=sys.stderr) -> None:
+    """Send span records to `stream`, once per process."""
+    if not any(getattr(h, "_fha_perf", False) for h in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        handler._fha_perf = True
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
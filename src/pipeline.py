@@ -0,0 +1,99 @@
+from __future__ import annotations
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from src.config import DEFAULT_TIMEOUT, STAGE_TIMEOUTS
+
+# Stages that only crunch numbers; they run on their own pool so they never
+# queue behind slow network stages
+CPU_STAGES = frozenset({"compute_ratios", "sentiment_rollups"})
+
+# Shared by every session. Stages that time out keep running here in the
+# background, so bounded pools keep a hung provider from piling up threads.
+_io_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fha-stage")
+_cpu_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix="fha-cpu")
+
+
+@dataclass
+class StageResult:
+    name: str
+    value: Any = None
+    error: BaseException | None = None
+    seconds: float = 0.0
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+def run_stages(
+    stages: dict[str, Callable[[], Any]],
+    timeouts: dict[str, float] | None = None,
+    default_timeout: float = DEFAULT_TIMEOUT,
+    cpu_stages: frozenset[str] = CPU_STAGES,
+) -> Iterator[StageResult]:
+    """
+    Start independent stages together and yield their results as they finish.
+
+    Each stage runs in a copy of the caller's context (so perf spans and
+    other ContextVars carry over). A stage's timeout counts from when it
+    starts running, not from when it was queued; a stage still waiting for
+    a worker gets the same budget again for the wait. A stage past its
+    deadline is reported with timed_out=True and abandoned; its eventual
+    result is discarded. Stages named in `cpu_stages` run on a separate
+    pool from the (network-bound) rest. `seconds` is the stage's own run
+    time (for a stage that never got a worker, the time it waited).
+    """
+    timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+    started = time.perf_counter()
+    begun: dict[str, float] = {}
+    ended: dict[str, float] = {}
+    begun_lock = threading.Lock()
+
+    def timed(name, fn):
+        def run():
+            with begun_lock:
+                begun[name] = time.perf_counter()
+            try:
+                return fn()
+            finally:
+                with begun_lock:
+                    ended[name] = time.perf_counter()
+        return run
+
+    pending = {}
+    for name, fn in stages.items():
+        ctx = contextvars.copy_context()
+        executor = _cpu_executor if name in cpu_stages else _io_executor
+        pending[executor.submit(ctx.run, timed(name, fn))] = name
+
+    def deadline(name):
+        with begun_lock:
+            since = begun.get(name, started)
+        return since + timeouts.get(name, default_timeout)
+
+    def seconds(name, now):
+        with begun_lock:
+            return ended.get(name, now) - begun.get(name, started)
+
+    while pending:
+        now = time.perf_counter()
+        budget = max(0.0, min(deadline(n) for n in pending.values()) - now)
+        done, _ = wait(pending, timeout=budget, return_when=FIRST_COMPLETED)
+        now = time.perf_counter()
+        for future in done:
+            name = pending.pop(future)
+            error = future.exception()
+            yield StageResult(name, None if error else future.result(), error, seconds(name, now))
+        now = time.perf_counter()
+        for future, name in list(pending.items()):
+            if now >= deadline(name):
+                del pending[future]
+                future.cancel()
+                yield StageResult(name, seconds=seconds(name, now), timed_out=True)
@@ -0,0 +1,433 @@
+from __future__ import annotations
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Protocol
+import numpy as np
+import pandas as pd
+
+from src.perf import annotate
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+PRICE_DIR = DATA_DIR / ".cache" / "prices"
+
+# How long stored bars count as fresh before new ones are fetched
+PRICE_TTL = timedelta(hours=6)
+# After a failed refresh, stale bars are served this long before trying again
+REFRESH_RETRY = timedelta(minutes=15)
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+# Batch fetching defaults for close_panel()
+BATCH_SIZE = 100
+MAX_WORKERS = 4
+MIN_INTERVAL = 0.25  # seconds between provider calls
+RETRIES = 3
+BACKOFF = 1.0  # seconds, doubled on each retry
+# Per-request network timeout for provider downloads, and how long a caller
+# waits for another thread's refresh of the same ticker before giving up
+FETCH_TIMEOUT = 10.0
+LOCK_TIMEOUT = 20.0
+
+
+class PriceFetcher(Protocol):
+    """
+    Source of daily bars. Fetchers may also define
+    fetch_many(tickers, start, end) -> {ticker: bars} to serve a whole
+    batch in one provider call; otherwise fetch() is called per ticker.
+    """
+
+    def fetch(self, ticker: str, start: pd.Timestamp | None, end: pd.Timestamp | None = None) -> pd.DataFrame:
+        """Daily bars for `ticker` in [start, end); start=None means full history."""
+
+
+# -------------------------------------------------------------------
+# ✅ Fetchers (Yahoo Finance + local CSV fixtures)
+# -------------------------------------------------------------------
+class YahooFetcher:
+    def __init__(self, timeout: float = FETCH_TIMEOUT):
+        self.timeout = timeout
+
+    def fetch(self, ticker, start, end=None):
+        return normalize_bars(self._download(ticker, start, end), ticker)
+
+    def fetch_many(self, tickers, start, end=None):
+        df = self._download(list(tickers), start, end)
+        frames = {t: normalize_bars(df, t).dropna(how="all") for t in tickers}
+        return {t: bars for t, bars in frames.items() if not bars.empty}
+
+    def _download(self, tickers, start, end):
+        import yfinance as yf  # heavy; only needed once a download actually happens
+        if start is None:
+            return yf.download(tickers, period="max", progress=False, timeout=self.timeout)
+        return yf.download(tickers, start=start.date(), end=None if end is None else end.date(),
+                           progress=False, timeout=self.timeout)
+
+
+class CsvFetcher:
+    """
+    Serves bars from `<directory>/<TICKER>.csv` (Date index + OHLCV columns).
+    Handy as an offline stand-in for Yahoo in tests and air-gapped runs.
+    """
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def fetch(self, ticker, start, end=None):
+        path = self.directory / f"{ticker}.csv"
+        if not path.exists():
+            return empty_bars()
+        bars = normalize_bars(pd.read_csv(path, index_col=0), ticker)
+        if start is not None:
+            bars = bars[bars.index >= start]
+        if end is not None:
+            bars = bars[bars.index < end]
+        return bars
+
+
+def empty_bars() -> pd.DataFrame:
+    return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name="Date"), dtype="float64")
+
+
+def normalize_bars(df: pd.DataFrame, ticker: str) -> pd.DataFrame:
+    """
+    Flatten a provider frame to one row per day with numeric OHLCV columns.
+    Handles MultiIndex columns (('Close','AAPL') or ('AAPL','Close')) and
+    array-like cells. A MultiIndex frame without `ticker` gives empty bars.
+    """
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        return empty_bars()
+
+    if isinstance(df.columns, pd.MultiIndex):
+        levels = [i for i in range(df.columns.nlevels) if ticker in df.columns.get_level_values(i)]
+        if not levels:
+            return empty_bars()
+        df = df.xs(ticker, axis=1, level=levels[-1])
+        if isinstance(df.columns, pd.MultiIndex):
+            df = df.droplevel(-1, axis=1)
+        df = df.loc[:, ~df.columns.duplicated()]
+
+    out = pd.DataFrame(index=pd.to_datetime(df.index))
+    for col in df.columns:
+        values = df[col].apply(lambda v: v[0] if isinstance(v, (list, tuple, np.ndarray)) else v)
+        out[col] = pd.to_numeric(values, errors="coerce").to_numpy()
+    if out.index.tz is not None:
+        out.index = out.index.tz_localize(None)
+    out.index.name = "Date"
+    out = out[~out.index.isna()]
+    return out[~out.index.duplicated(keep="last")].sort_index()
+
+
+class RateLimiter:
+    """Spaces calls at least `min_interval` seconds apart across threads."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _retry(fn, *args, limiter: RateLimiter, retries: int, backoff: float):
+    for attempt in range(retries + 1):
+        limiter.wait()
+        try:
+            return fn(*args)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+
+# -------------------------------------------------------------------
+# ✅ Period helpers
+# -------------------------------------------------------------------
+_PERIOD_RE = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+def period_start(period: str, now: datetime) -> pd.Timestamp | None:
+    """First date covered by a yfinance-style period ('6mo', '1y', 'ytd', 'max')."""
+    today = pd.Timestamp(now).normalize()
+    if period == "max":
+        return None
+    if period == "ytd":
+        return today.replace(month=1, day=1)
+    m = _PERIOD_RE.match(period)
+    if not m:
+        raise ValueError(f"Unsupported period: {period!r}")
+    n, unit = int(m.group(1)), m.group(2)
+    offset = {
+        "d": pd.DateOffset(days=n),
+        "wk": pd.DateOffset(weeks=n),
+        "mo": pd.DateOffset(months=n),
+        "y": pd.DateOffset(years=n),
+    }[unit]
+    return today - offset
+
+
+# -------------------------------------------------------------------
+# ✅ On-disk price store
+# -------------------------------------------------------------------
+class PriceStore:
+    """
+    Per-ticker daily bars persisted as Parquet with a small JSON sidecar.
+
+    The sidecar records when the bars were last refreshed and how far back
+    they reach. A fresh store answers any shorter period by slicing; a
+    stale one fetches only from the last stored bar onward, and a longer
+    period fetches only the missing older range. A failed refresh is
+    recorded too, so the provider is not retried for `retry_after`.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = PRICE_DIR,
+        fetcher: PriceFetcher | None = None,
+        ttl: timedelta = PRICE_TTL,
+        clock: Callable[[], datetime] = datetime.now,
+        lock_timeout: float = LOCK_TIMEOUT,
+        retry_after: timedelta = REFRESH_RETRY,
+    ):
+        self.root = Path(root)
+        self.fetcher = fetcher or YahooFetcher()
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.clock = clock
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._ticker_locks: dict[str, threading.Lock] = {}
+
+    def history(self, ticker: str, period: str = "1y") -> pd.DataFrame:
+        now = self.clock()
+        start = period_start(period, now)
+        with self._locked(ticker):
+            bars, meta = self._read(ticker)
+            plan = self._plan(bars, meta, start, now)
+            annotate(cache="+".join(kind for kind, _, _ in plan) or "hit")
+            fetched = {}
+            for kind, lo, hi in plan:
+                try:
+                    fetched[kind] = self.fetcher.fetch(ticker, lo, hi)
+                except Exception:
+                    if kind != "newer":
+                        raise
+                    fetched[kind] = None  # keep serving the stale bars
+            bars = self._apply(ticker, bars, meta, fetched, start, now)
+        bars = _slice(bars, start)
+        annotate(rows=len(bars))
+        return bars
+
+    def close_panel(
+        self,
+        tickers: list[str],
+        period: str = "1y",
+        batch_size: int = BATCH_SIZE,
+        max_workers: int = MAX_WORKERS,
+        min_interval: float = MIN_INTERVAL,
+        retries: int = RETRIES,
+        backoff: float = BACKOFF,
+    ) -> pd.DataFrame:
+        """
+        Date-aligned Close prices for many tickers, one column per ticker.
+
+        Tickers needing the same date range are grouped into batches of up
+        to `batch_size` per provider call (when the fetcher has fetch_many),
+        and the batches run on a bounded thread pool with rate limiting and
+        exponential-backoff retries. Tickers that fail come back as NaN columns.
+        """
+        tickers = list(dict.fromkeys(t.upper() for t in tickers))
+        now = self.clock()
+        start = period_start(period, now)
+        limiter = RateLimiter(min_interval)
+
+        with ExitStack() as stack:
+            for ticker in sorted(tickers):
+                stack.enter_context(self._locked(ticker))
+
+            states = {t: self._read(t) for t in tickers}
+            groups: dict[tuple, list[str]] = {}
+            for ticker, (bars, meta) in states.items():
+                for kind, lo, hi in self._plan(bars, meta, start, now):
+                    groups.setdefault((kind, lo, hi), []).append(ticker)
+
+            batches = [
+                (key, names[i:i + batch_size])
+                for key, names in groups.items()
+                for i in range(0, len(names), batch_size)
+            ]
+            fetched: dict[str, dict] = {t: {} for t in tickers}
+            failed: set[str] = set()
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    pool.submit(_retry, self._fetch_batch, names, lo, hi,
+                                limiter=limiter, retries=retries, backoff=backoff): (kind, names)
+                    for (kind, lo, hi), names in batches
+                }
+                for future in as_completed(futures):
+                    kind, names = futures[future]
+                    try:
+                        frames = future.result()
+                    except Exception:
+                        frames = {}
+                        if kind != "newer":
+                            failed.update(names)
+                    for name in names:
+                        fetched[name][kind] = frames.get(name)
+
+            closes = {}
+            for ticker, (bars, meta) in states.items():
+                if ticker in failed:
+                    continue
+                bars = self._apply(ticker, bars, meta, fetched[ticker], start, now)
+                if "Close" in bars.columns:
+                    closes[ticker] = _slice(bars, start)["Close"]
+
+        if not closes:
+            return pd.DataFrame(columns=tickers)
+        panel = pd.concat(closes, axis=1).sort_index().reindex(columns=tickers)
+        panel.index.name = "Date"
+        return panel
+
+    def _fetch_batch(self, tickers: list[str], start, end) -> dict[str, pd.DataFrame]:
+        fetch_many = getattr(self.fetcher, "fetch_many", None)
+        if fetch_many is not None:
+            return fetch_many(tickers, start, end)
+        return {t: self.fetcher.fetch(t, start, end) for t in tickers}
+
+    def _plan(self, bars, meta, start, now) -> list[tuple[str, pd.Timestamp | None, pd.Timestamp | None]]:
+        """Date ranges that still have to be fetched, as (kind, start, end)."""
+        if bars is None:
+            return [("initial", start, None)]
+        plan = []
+        covered_from = _ts(meta.get("covered_from"))
+        if covered_from is not None and (start is None or start < covered_from):
+            plan.append(("older", start, covered_from))
+        attempted_at = meta.get("attempted_at")
+        backing_off = attempted_at is not None and now - datetime.fromisoformat(attempted_at) <= self.retry_after
+        if now - datetime.fromisoformat(meta["fetched_at"]) > self.ttl and not bars.empty and not backing_off:
+            plan.append(("newer", bars.index.max(), None))
+        return plan
+
+    def _apply(self, ticker, bars, meta, fetched, start, now) -> pd.DataFrame:
+        """Merge fetched ranges into the stored bars and persist them if anything changed."""
+        if bars is None:
+            bars = fetched.get("initial")
+            if bars is None or bars.empty:
+                return empty_bars()
+            meta = {"covered_from": _iso(start), "fetched_at": now.isoformat()}
+        else:
+            changed = False
+            if "older" in fetched:
+                bars = _merge(fetched["older"], bars)
+                meta["covered_from"] = _iso(start)
+                changed = True
+            if fetched.get("newer") is not None:
+                bars = _merge(bars, fetched["newer"])
+                meta["fetched_at"] = now.isoformat()
+                meta.pop("attempted_at", None)
+                changed = True
+            elif "newer" in fetched:
+                meta["attempted_at"] = now.isoformat()
+                if not changed:
+                    self._write(ticker, None, meta)
+                    return bars
+            if not changed:
+                return bars
+        self._write(ticker, bars, meta)
+        return bars
+
+    def invalidate(self, ticker: str) -> None:
+        with self._locked(ticker):
+            for path in self._paths(ticker):
+                path.unlink(missing_ok=True)
+
+    def _ticker_lock(self, ticker: str) -> threading.Lock:
+        with self._lock:
+            return self._ticker_locks.setdefault(ticker.upper(), threading.Lock())
+
+    @contextmanager
+    def _locked(self, ticker: str):
+        # Bounded wait, so requests queued behind a stuck refresh fail instead of piling up
+        lock = self._ticker_lock(ticker)
+        if not lock.acquire(timeout=self.lock_timeout):
+            raise TimeoutError(f"Timed out waiting for the price refresh of {ticker.upper()}.")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def _paths(self, ticker: str) -> tuple[Path, Path]:
+        name = re.sub(r"[^A-Za-z0-9._-]", "_", ticker.upper())
+        return self.root / f"{name}.parquet", self.root / f"{name}.json"
+
+    def _read(self, ticker: str) -> tuple[pd.DataFrame | None, dict]:
+        bars_path, meta_path = self._paths(ticker)
+        if not (bars_path.exists() and meta_path.exists()):
+            return None, {}
+        try:
+            bars, meta = pd.read_parquet(bars_path), json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return None, {}
+        if "fetched_at" not in meta:
+            return None, {}
+        return bars, meta
+
+    def _write(self, ticker: str, bars: pd.DataFrame | None, meta: dict) -> None:
+        """Persist the bars (unless None) and then the sidecar."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        bars_path, meta_path = self._paths(ticker)
+        if bars is not None:
+            _replace(bars_path, bars.to_parquet)
+        _replace(meta_path, lambda tmp: tmp.write_text(json.dumps(meta)))
+
+
+def _replace(path: Path, write: Callable[[Path], object]) -> None:
+    # Unique temp name per writer, so processes refreshing the same ticker
+    # never rename each other's half-written files into place
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _slice(bars: pd.DataFrame, start: pd.Timestamp | None) -> pd.DataFrame:
+    return bars if start is None else bars[bars.index >= start]
+
+
+def _merge(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    # Later bars win, so a re-fetched partial last day is overwritten
+    if new is None or new.empty:
+        return old
+    if old is None or old.empty:
+        return new
+    merged = pd.concat([old, new])
+    return merged[~merged.index.duplicated(keep="last")].sort_index()
+
+
+def _iso(ts: pd.Timestamp | None) -> str | None:
+    return None if ts is None else ts.isoformat()
+
+
+def _ts(value: str | None) -> pd.Timestamp | None:
+    return None if value is None else pd.Timestamp(value)
+
+
+# Process-wide store used by get_price_history
+price_store = PriceStore()
@@ -1,26 +1,295 @@
 from __future__ import annotations
+import ast
+import hashlib
+import threading
+from collections.abc import Mapping
+from dataclasses import dataclass
 import pandas as pd
 import numpy as np
 
-def compute_ratios(fin_df: pd.DataFrame) -> pd.DataFrame:
-    df = fin_df.copy()
-    df['gross_profit'] = df['revenue'] - df['cogs']
-    df['gross_margin'] = df['gross_profit'] / df['revenue'].replace(0, np.nan)
-    df['operating_margin'] = df['operating_income'] / df['revenue'].replace(0, np.nan)
-    df['net_margin'] = df['net_income'] / df['revenue'].replace(0, np.nan)
-
-    df['current_ratio'] = df['current_assets'] / df['current_liabilities'].replace(0, np.nan)
-    df['quick_ratio'] = (df['current_assets'] - df.get('inventory', 0)) / df['current_liabilities'].replace(0, np.nan)
-
-    df['debt_to_equity'] = df['total_liabilities'] / df['shareholders_equity'].replace(0, np.nan)
-
-    df['asset_turnover'] = df['revenue'] / df['total_assets'].replace(0, np.nan)
-    df['inventory_turnover'] = df['cogs'] / df.get('inventory', np.nan).replace(0, np.nan)
-    df['roe'] = df['net_income'] / df['shareholders_equity'].replace(0, np.nan)
-    df['roa'] = df['net_income'] / df['total_assets'].replace(0, np.nan)
-
-    cols = ['date','revenue','net_income','gross_margin','operating_margin','net_margin',
-            'current_ratio','quick_ratio','debt_to_equity','asset_turnover','inventory_turnover','roe','roa']
-    keep = [c for c in cols if c in df.columns]
-    out = df[keep].copy()
+RATIO_COLUMNS = ['gross_margin', 'operating_margin', 'net_margin',
+                 'current_ratio', 'quick_ratio', 'debt_to_equity',
+                 'asset_turnover', 'inventory_turnover', 'roe', 'roa']
+PASSTHROUGH_COLUMNS = ['date', 'revenue', 'net_income']
+
+# Statement lines that may be absent from a filing, and the value they take then
+LINE_DEFAULTS = {'inventory': 0.0}
+
+
+# -------------------------------------------------------------------
+# ✅ Ratio registry
+# -------------------------------------------------------------------
+@dataclass(frozen=True)
+class Ratio:
+    """`numerator` is an expression over statement lines; `denominator` names a safe denominator."""
+    name: str
+    numerator: str
+    denominator: str
+
+
+_BINOPS = {ast.Add: np.add, ast.Sub: np.subtract, ast.Mult: np.multiply}
+
+
+def _parse(expression: str) -> ast.expr:
+    try:
+        tree = ast.parse(expression, mode='eval').body
+    except SyntaxError as e:
+        raise ValueError(f"Invalid ratio expression {expression!r}: {e.msg}")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.BinOp) and type(node.op) not in _BINOPS:
+            raise ValueError(f"Only + - * are allowed in {expression!r}; divide through a denominator.")
+        if not isinstance(node, (ast.BinOp, ast.UnaryOp, ast.Name, ast.Constant, ast.Load,
+                                 ast.USub, ast.UAdd, *_BINOPS)):
+            raise ValueError(f"Unsupported syntax in ratio expression {expression!r}")
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float)):
+            raise ValueError(f"Only numeric constants are allowed in {expression!r}")
+    return tree
+
+
+_lock = threading.Lock()
+# Safe denominators: name -> expression. Rows where it is zero give NaN.
+_DENOMINATORS: dict[str, str] = {}
+_RATIOS: dict[str, Ratio] = {}
+_compiled: "_Plan | None" = None
+
+
+def register_denominator(name: str, expression: str) -> None:
+    """Declare a named denominator, e.g. register_denominator('equity', 'shareholders_equity')."""
+    _parse(expression)
+    with _lock:
+        global _compiled
+        _DENOMINATORS[name] = expression
+        _compiled = None
+
+
+def register_ratio(name: str, numerator: str, denominator: str, replace: bool = False) -> Ratio:
+    """
+    Add a ratio to every compute_ratios() result, e.g.
+    register_ratio('cash_ratio', 'cash', 'current_liabilities').
+    `denominator` is a registered denominator or a statement line.
+    Frames lacking a line this ratio uses get NaN for it rather than an error.
+    """
+    _parse(numerator)
+    ratio = Ratio(name, numerator, denominator)
+    with _lock:
+        global _compiled
+        _parse(_DENOMINATORS.get(denominator, denominator))
+        if name in _RATIOS and not replace:
+            raise ValueError(f"Ratio '{name}' is already registered.")
+        _RATIOS[name] = ratio
+        _compiled = None
+    return ratio
+
+
+def unregister_ratio(name: str) -> None:
+    with _lock:
+        global _compiled
+        _RATIOS.pop(name, None)
+        _compiled = None
+
+
+def unregister_denominator(name: str) -> None:
+    """Remove a registered denominator; ratios still dividing by it must go first."""
+    with _lock:
+        global _compiled
+        users = [r.name for r in _RATIOS.values() if r.denominator == name]
+        if users:
+            raise ValueError(f"Denominator '{name}' is used by: {', '.join(users)}")
+        _DENOMINATORS.pop(name, None)
+        _compiled = None
+
+
+def ratio_names() -> list[str]:
+    """Names of the registered ratios, built-ins first, in registration order."""
+    with _lock:
+        return list(_RATIOS)
+
+
+def registry_key() -> str:
+    """Short hash of every registered ratio and denominator, for keying cached results."""
+    with _lock:
+        spec = repr((sorted(_DENOMINATORS.items()), [tuple(vars(r).values()) for r in _RATIOS.values()]))
+    return hashlib.blake2b(spec.encode(), digest_size=6).hexdigest()
+
+
+for _name, _expr in [('revenue', 'revenue'), ('current_liabilities', 'current_liabilities'),
+                     ('equity', 'shareholders_equity'), ('total_assets', 'total_assets'),
+                     ('inventory', 'inventory')]:
+    register_denominator(_name, _expr)
+
+for _ratio in [
+    Ratio('gross_margin', 'revenue - cogs', 'revenue'),
+    Ratio('operating_margin', 'operating_income', 'revenue'),
+    Ratio('net_margin', 'net_income', 'revenue'),
+    Ratio('current_ratio', 'current_assets', 'current_liabilities'),
+    Ratio('quick_ratio', 'current_assets - inventory', 'current_liabilities'),
+    Ratio('debt_to_equity', 'total_liabilities', 'equity'),
+    Ratio('asset_turnover', 'revenue', 'total_assets'),
+    Ratio('inventory_turnover', 'cogs', 'inventory'),
+    Ratio('roe', 'net_income', 'equity'),
+    Ratio('roa', 'net_income', 'total_assets'),
+]:
+    register_ratio(_ratio.name, _ratio.numerator, _ratio.denominator)
+
+# Statement lines these need are required; user ratios are optional per frame
+_BUILTIN_RATIOS = frozenset(_RATIOS.values())
+
+
+# -------------------------------------------------------------------
+# ✅ Compilation: one plan for all ratios, shared subexpressions once
+# -------------------------------------------------------------------
+class _Plan:
+    """
+    Flat list of array operations. Each distinct subexpression (commutative
+    operands put in a canonical order) becomes one slot, so e.g. a line used
+    by five ratios is read once and each denominator's zero mask built once.
+    Lines only used by ratios outside `required` may be missing from a frame;
+    those ratios then come out all-NaN.
+    """
+
+    def __init__(self, ratios: list[Ratio], denominators: dict[str, str], required=frozenset()):
+        self.lines: list[str] = []
+        self.required_lines: set[str] = set()
+        self.steps: list[tuple] = []  # (slot, ufunc, a, b) or (slot, 'neg', a, None)
+        self.outputs: list[tuple[str, int, int]] = []  # (name, numerator slot, denominator slot)
+        self._slots: dict[str, int] = {}
+        self.n_slots = 0
+        for ratio in ratios:
+            den_expr = denominators.get(ratio.denominator, ratio.denominator)
+            num_tree, den_tree = _parse(ratio.numerator), _parse(den_expr)
+            if ratio in required:
+                self.required_lines.update(node.id for tree in (num_tree, den_tree)
+                                           for node in ast.walk(tree) if isinstance(node, ast.Name))
+            self.outputs.append((ratio.name, self._emit(num_tree), self._emit(den_tree)))
+
+    def _new(self, key: str) -> int:
+        slot = self._slots[key] = self.n_slots
+        self.n_slots += 1
+        return slot
+
+    def _emit(self, node: ast.expr) -> int | float:
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            key = node.id
+            if key not in self._slots:
+                self.lines.append(key)
+                self._new(key)
+            return self._slots[key]
+        if isinstance(node, ast.UnaryOp):
+            operand = self._emit(node.operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            if isinstance(operand, float):
+                return -operand
+            key = f"neg({operand})"
+            if key not in self._slots:
+                self.steps.append((self._new(key), 'neg', operand, None))
+            return self._slots[key]
+        a, b = self._emit(node.left), self._emit(node.right)
+        ufunc = _BINOPS[type(node.op)]
+        if isinstance(a, float) and isinstance(b, float):
+            return float(ufunc(a, b))
+        args = (a, b)
+        if ufunc is not np.subtract:
+            args = tuple(sorted(args, key=repr))
+        key = f"{ufunc.__name__}{args}"
+        if key not in self._slots:
+            self.steps.append((self._new(key), ufunc, a, b))
+        return self._slots[key]
+
+    def evaluate(self, df: pd.DataFrame, dtype=np.float64) -> dict[str, np.ndarray]:
+        n = len(df)
+        values: list = [None] * self.n_slots
+        for name in self.lines:
+            if name in df.columns:
+                values[self._slots[name]] = _line(df, name)
+            elif name in LINE_DEFAULTS:
+                values[self._slots[name]] = np.full(n, LINE_DEFAULTS[name])
+            elif name in self.required_lines:
+                raise KeyError(f"Statement line '{name}' is missing.")
+
+        def arg(x):
+            return x if isinstance(x, float) else values[x]
+
+        for slot, op, a, b in self.steps:
+            if arg(a) is None or (b is not None and arg(b) is None):
+                continue  # depends on a missing optional line
+            if op == 'neg':
+                values[slot] = np.negative(arg(a))
+            else:
+                values[slot] = op(arg(a), arg(b), out=np.empty(n))
+
+        masks: dict = {}
+        out = {}
+        for name, num, den in self.outputs:
+            if arg(num) is None or arg(den) is None:
+                out[name] = np.full(n, np.nan, dtype=dtype)
+                continue
+            den_values = np.full(n, den) if isinstance(den, float) else values[den]
+            key = ('const', den) if isinstance(den, float) else den
+            if key not in masks:
+                masks[key] = den_values != 0
+            num_values = np.full(n, num) if isinstance(num, float) else values[num]
+            out[name] = _safe_div(num_values, den_values, masks[key], dtype)
+        return out
+
+
+def _plan() -> _Plan:
+    global _compiled
+    with _lock:
+        if _compiled is None:
+            _compiled = _Plan(list(_RATIOS.values()), dict(_DENOMINATORS), _BUILTIN_RATIOS)
+        return _compiled
+
+
+# -------------------------------------------------------------------
+# ✅ Evaluation
+# -------------------------------------------------------------------
+def _line(df: pd.DataFrame, name: str) -> np.ndarray:
+    return df[name].to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _safe_div(num: np.ndarray, den: np.ndarray, mask: np.ndarray, dtype) -> np.ndarray:
+    # Zero denominators give NaN, same as dividing by .replace(0, np.nan)
+    out = np.full(num.shape, np.nan, dtype=dtype)
+    np.divide(num, den, out=out, where=mask)
     return out
+
+
+def _ratio_arrays(df: pd.DataFrame, dtype=np.float64) -> dict[str, np.ndarray]:
+    """Evaluate every registered ratio over contiguous float64 arrays in one compiled pass."""
+    return _plan().evaluate(df, dtype)
+
+
+def compute_ratios(fin_df: pd.DataFrame) -> pd.DataFrame:
+    cols = {c: fin_df[c].array for c in PASSTHROUGH_COLUMNS if c in fin_df.columns}
+    cols.update(_ratio_arrays(fin_df))
+    return pd.DataFrame(cols, index=fin_df.index)
+
+
+def compute_ratios_panel(
+    panel: pd.DataFrame | Mapping[str, pd.DataFrame],
+    ticker_col: str = 'ticker',
+    dtype=np.float64,
+) -> pd.DataFrame:
+    """
+    Compute ratios for many companies at once.
+
+    `panel` is either a long-format frame keyed by (ticker, date) or a dict of
+    ticker -> single-company frame. Rows are evaluated in one vectorized pass,
+    so each ticker's slice matches compute_ratios() on that company alone.
+    Pass dtype=np.float32 to halve the memory of the ratio columns.
+    """
+    if isinstance(panel, Mapping):
+        if not panel:
+            return pd.DataFrame(columns=[ticker_col, *PASSTHROUGH_COLUMNS, *ratio_names()])
+        panel = (pd.concat(panel, names=[ticker_col, None])
+                 .reset_index(level=0)
+                 .reset_index(drop=True))
+    if ticker_col not in panel.columns:
+        raise ValueError(f"Panel is missing the '{ticker_col}' column.")
+
+    cols = {c: panel[c].array for c in [ticker_col, *PASSTHROUGH_COLUMNS] if c in panel.columns}
+    cols.update(_ratio_arrays(panel, dtype=dtype))
+    return pd.DataFrame(cols, index=panel.index)
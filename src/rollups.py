@@ -0,0 +1,342 @@
+"""
+Sentiment rollups: per-ticker daily and weekly aggregates of headline scores,
+aligned to the price series.
+
+Each ticker keeps one row per day with headlines: count, mean, min, max and
+an exponentially decayed score (headlines weighted by 0.5 ** (age / half-life)).
+Headlines are folded in as they arrive; only rows not seen before are
+aggregated, and the decayed score is recomputed from the first day they touch.
+Charts and summaries read these rows instead of re-aggregating raw headlines.
+
+Rollups are kept per news snapshot (the FrameRef key of a session's
+headlines), so sessions holding different snapshots never reset each other's;
+a new snapshot starts from the ticker's latest rollup and only folds in what
+that one has not seen.
+"""
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import Hashable
+import numpy as np
+import pandas as pd
+
+# Age (in days) at which a headline counts half in the decayed score
+HALF_LIFE_DAYS = 7.0
+# Forward-return horizons (trading days) correlated with sentiment
+HORIZONS = (1, 5, 20)
+# News snapshots whose rollups are kept per ticker
+MAX_SNAPSHOTS = 8
+
+ROLLUP_COLUMNS = ["date", "count", "mean", "min", "max", "decayed"]
+
+
+def _row_hashes(df: pd.DataFrame) -> np.ndarray:
+    # Identity of each headline row; repeats of an identical row are told apart by occurrence
+    cols = [c for c in ("date", "source", "headline") if c in df.columns]
+    keyed = df[cols].copy()
+    keyed["_nth"] = keyed.groupby(cols, sort=False, dropna=False).cumcount() if cols else np.arange(len(df))
+    return pd.util.hash_pandas_object(keyed, index=False).to_numpy()
+
+
+class TickerRollup:
+    """Daily sentiment aggregates of one ticker, as parallel arrays sorted by day."""
+
+    def __init__(self, half_life: float = HALF_LIFE_DAYS):
+        self.half_life = half_life
+        self.version = 0
+        self.token: Hashable | None = None
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.days = np.array([], dtype="datetime64[D]")
+        self.count = np.array([], dtype=np.int64)
+        self.total = np.array([], dtype=np.float64)
+        self.low = np.array([], dtype=np.float64)
+        self.high = np.array([], dtype=np.float64)
+        self._num = np.array([], dtype=np.float64)  # decayed sum of scores
+        self._den = np.array([], dtype=np.float64)  # decayed headline count
+        self._seen = np.array([], dtype=np.uint64)
+        self._weekly = None
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def fork(self) -> "TickerRollup":
+        """Independent copy to fold a newer snapshot into, leaving this one as it is."""
+        other = TickerRollup(self.half_life)
+        with self._lock:
+            for name in ("days", "count", "total", "low", "high", "_num", "_den", "_seen"):
+                setattr(other, name, getattr(self, name).copy())
+            other.version, other.token = self.version, self.token
+        return other
+
+    def ingest(self, news: pd.DataFrame, token: Hashable | None = None) -> int:
+        """
+        Fold the headlines of `news` (date, compound, optionally source/headline)
+        not seen before into the rollup; returns how many were new. Passing the
+        same `token` as the previous call (e.g. a content hash) skips the frame.
+        If rows seen before have disappeared the source was rewritten, and the
+        rollup is rebuilt from `news`.
+        """
+        with self._lock:
+            if token is not None and token == self.token:
+                return 0
+            if news is None or news.empty or "compound" not in news.columns:
+                return 0
+            hashes = _row_hashes(news)
+            known = np.isin(hashes, self._seen)
+            if int(known.sum()) != len(self._seen):
+                self._reset()
+                known[:] = False
+            new = ~known
+            added = int(new.sum())
+            if added:
+                rows = news[new]
+                days = pd.to_datetime(rows["date"], errors="coerce").to_numpy(dtype="datetime64[D]")
+                scores = pd.to_numeric(rows["compound"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                ok = ~np.isnat(days) & ~np.isnan(scores)
+                self._add(days[ok], scores[ok])
+                self._seen = np.union1d(self._seen, hashes[new])
+                self.version += 1
+            self.token = token
+            return added
+
+    def _add(self, days: np.ndarray, scores: np.ndarray) -> None:
+        if not len(days):
+            return
+        new_days, inverse = np.unique(days, return_inverse=True)
+        count = np.bincount(inverse)
+        total = np.bincount(inverse, weights=scores)
+        low = np.full(len(new_days), np.inf)
+        high = np.full(len(new_days), -np.inf)
+        np.minimum.at(low, inverse, scores)
+        np.maximum.at(high, inverse, scores)
+
+        all_days = np.union1d(self.days, new_days)
+        old_at = np.searchsorted(all_days, self.days)
+        new_at = np.searchsorted(all_days, new_days)
+        arrays = {}
+        for name, fill in (("count", 0), ("total", 0.0), ("low", np.inf), ("high", -np.inf)):
+            merged = np.full(len(all_days), fill, dtype=getattr(self, name).dtype)
+            merged[old_at] = getattr(self, name)
+            arrays[name] = merged
+        arrays["count"][new_at] += count
+        arrays["total"][new_at] += total
+        arrays["low"][new_at] = np.minimum(arrays["low"][new_at], low)
+        arrays["high"][new_at] = np.maximum(arrays["high"][new_at], high)
+
+        num = np.zeros(len(all_days))
+        den = np.zeros(len(all_days))
+        num[old_at], den[old_at] = self._num, self._den
+        self.days = all_days
+        self.count, self.total, self.low, self.high = (arrays[k] for k in ("count", "total", "low", "high"))
+        self._num, self._den = num, den
+        self._decay_from(int(new_at.min()))
+        self._weekly = None
+
+    def _decay_from(self, start: int) -> None:
+        # num[k] = num[k-1] * 0.5 ** (gap / half_life) + total[k]; days before `start` are unchanged
+        gaps = np.diff(self.days).astype(np.float64)
+        factors = 0.5 ** (gaps / self.half_life)
+        num, den = self._num, self._den
+        prev_num = num[start - 1] if start else 0.0
+        prev_den = den[start - 1] if start else 0.0
+        for k in range(start, len(self.days)):
+            f = factors[k - 1] if k else 0.0
+            prev_num = prev_num * f + self.total[k]
+            prev_den = prev_den * f + self.count[k]
+            num[k], den[k] = prev_num, prev_den
+
+    # ----- reads -----
+    def daily(self) -> pd.DataFrame:
+        """One row per day with headlines: count, mean, min, max and decayed score."""
+        with self._lock:
+            return pd.DataFrame({
+                "date": self.days.astype("datetime64[ns]"),
+                "count": self.count,
+                "mean": self.total / np.maximum(self.count, 1),
+                "min": self.low,
+                "max": self.high,
+                "decayed": self._num / np.where(self._den > 0, self._den, np.nan),
+            })
+
+    def weekly(self) -> pd.DataFrame:
+        """Daily rows combined per week (dated by the week's last day with headlines)."""
+        with self._lock:
+            if self._weekly is None:
+                if not len(self.days):
+                    self._weekly = pd.DataFrame({c: [] for c in ROLLUP_COLUMNS})
+                else:
+                    # Day 0 (1970-01-01) was a Thursday; shift so weeks run Monday to Sunday
+                    week = (self.days.astype(np.int64) + 3) // 7
+                    starts = np.flatnonzero(np.r_[True, week[1:] != week[:-1]])
+                    ends = np.r_[starts[1:], len(week)] - 1
+                    count = np.add.reduceat(self.count, starts)
+                    self._weekly = pd.DataFrame({
+                        "date": self.days[ends].astype("datetime64[ns]"),
+                        "count": count,
+                        "mean": np.add.reduceat(self.total, starts) / count,
+                        "min": np.minimum.reduceat(self.low, starts),
+                        "max": np.maximum.reduceat(self.high, starts),
+                        "decayed": self._num[ends] / self._den[ends],
+                    })
+            return self._weekly.copy(deep=False)
+
+    def score(self) -> float | None:
+        """Decayed score as of the latest headline; None without headlines."""
+        with self._lock:
+            if not len(self.days) or self._den[-1] <= 0:
+                return None
+            return float(self._num[-1] / self._den[-1])
+
+
+# -------------------------------------------------------------------
+# ✅ Alignment with prices
+# -------------------------------------------------------------------
+def align(prices: pd.DataFrame, daily: pd.DataFrame, horizons=HORIZONS) -> pd.DataFrame:
+    """
+    Price rows (Date, Close) with the sentiment known at each close, via an
+    as-of join: `sentiment` is the decayed score of the latest day with
+    headlines on or before the price date, `news_count` the headlines of that
+    very day, `news_age_days` how old the latest headlines are. Adds forward
+    returns `fwd_<h>d` = Close h rows later / Close - 1.
+    """
+    px = prices.reset_index() if "Date" not in prices.columns else prices
+    px = px[["Date", "Close"]].assign(
+        Date=pd.to_datetime(px["Date"]).astype("datetime64[ns]").dt.normalize(),
+        Close=pd.to_numeric(px["Close"], errors="coerce"),
+    ).sort_values("Date", kind="stable").reset_index(drop=True)
+    news = daily[["date", "decayed", "count"]].rename(columns={"date": "news_date", "decayed": "sentiment"})
+    out = pd.merge_asof(px, news.astype({"news_date": "datetime64[ns]"}),
+                        left_on="Date", right_on="news_date", direction="backward")
+    same_day = (out["news_date"] == out["Date"]).to_numpy()
+    out["news_count"] = np.where(same_day, out["count"].fillna(0), 0).astype(np.int64)
+    out["news_age_days"] = (out["Date"] - out["news_date"]).dt.days
+    close = out["Close"].to_numpy(dtype=np.float64, na_value=np.nan)
+    for h in horizons:
+        fwd = np.full(len(close), np.nan)
+        if h < len(close):
+            fwd[:-h] = close[h:] / close[:-h] - 1
+        out[f"fwd_{h}d"] = fwd
+    return out.drop(columns=["count", "news_date"])
+
+
+def _corr(x: np.ndarray, y: np.ndarray) -> tuple[float, int]:
+    ok = ~np.isnan(x) & ~np.isnan(y)
+    n = int(ok.sum())
+    if n < 3 or np.std(x[ok]) == 0 or np.std(y[ok]) == 0:
+        return np.nan, n
+    return float(np.corrcoef(x[ok], y[ok])[0, 1]), n
+
+
+def forward_correlations(aligned: pd.DataFrame, horizons=HORIZONS) -> pd.DataFrame:
+    """
+    Pearson correlation of sentiment with each forward return: `corr` uses the
+    decayed score on every price day, `corr_news_days` only days with headlines.
+    """
+    score = aligned["sentiment"].to_numpy(dtype=np.float64, na_value=np.nan)
+    news_days = aligned["news_count"].to_numpy() > 0
+    rows = []
+    for h in horizons:
+        fwd = aligned[f"fwd_{h}d"].to_numpy(dtype=np.float64, na_value=np.nan)
+        corr, n = _corr(score, fwd)
+        corr_news, n_news = _corr(score[news_days], fwd[news_days])
+        rows.append({"horizon_days": h, "corr": corr, "n": n, "corr_news_days": corr_news, "n_news_days": n_news})
+    return pd.DataFrame(rows).set_index("horizon_days")
+
+
+def _price_fingerprint(prices: pd.DataFrame) -> Hashable:
+    if prices.empty:
+        return (0,)
+    close = prices["Close"]
+    return (len(prices), str(prices.index[0]), str(prices.index[-1]), float(close.iloc[-1]))
+
+
+class SentimentRollups:
+    """
+    Process-wide TickerRollups per (ticker, news snapshot token), plus their
+    price alignments and correlations. Rollups ingested without a token are
+    shared and updated in place.
+    """
+
+    def __init__(self, half_life: float = HALF_LIFE_DAYS, max_snapshots: int = MAX_SNAPSHOTS):
+        self.half_life = half_life
+        self.max_snapshots = max_snapshots
+        self._rollups: dict[str, OrderedDict[Hashable, TickerRollup]] = {}
+        self._joined: dict[tuple, tuple[Hashable, pd.DataFrame, pd.DataFrame]] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, ticker: str) -> bool:
+        return bool(self._rollups.get(ticker.upper()))
+
+    def get(self, ticker: str, token: Hashable | None = None) -> TickerRollup | None:
+        """The rollup of snapshot `token`, or the ticker's latest one when token is None."""
+        with self._lock:
+            snapshots = self._rollups.get(ticker.upper())
+            if not snapshots:
+                return None
+            if token is None:
+                return next(reversed(snapshots.values()))
+            return snapshots.get(token)
+
+    def ingest(self, ticker: str, news: pd.DataFrame, token: Hashable | None = None) -> TickerRollup:
+        """
+        Rollup of the headlines in `news` (see TickerRollup.ingest) for snapshot
+        `token`. A snapshot seen before is returned as is; a new one is forked
+        from the ticker's latest rollup so only unseen headlines are folded in.
+        """
+        return self._ingest(ticker, news, token)[0]
+
+    def _ingest(self, ticker: str, news: pd.DataFrame, token: Hashable | None) -> tuple[TickerRollup, int]:
+        name = ticker.upper()
+        with self._lock:
+            snapshots = self._rollups.setdefault(name, OrderedDict())
+            rollup = snapshots.get(token)
+            if rollup is not None:
+                snapshots.move_to_end(token)
+            latest = next(reversed(snapshots.values()), None)
+        if rollup is not None and token is not None:
+            return rollup, 0
+        if rollup is None:
+            rollup = latest.fork() if latest is not None else TickerRollup(self.half_life)
+        added = rollup.ingest(news, token)
+        with self._lock:
+            snapshots[token] = rollup
+            snapshots.move_to_end(token)
+            while len(snapshots) > self.max_snapshots:
+                old, _ = snapshots.popitem(last=False)
+                self._joined.pop((name, old), None)
+        return rollup, added
+
+    def ingest_panel(self, news: pd.DataFrame, ticker_col: str = "ticker") -> dict[str, int]:
+        """Headlines of many tickers at once into their shared rollups; returns ticker -> new headlines."""
+        return {str(t): self._ingest(str(t), rows, None)[1] for t, rows in news.groupby(ticker_col, sort=False)}
+
+    def join_prices(self, ticker: str, prices: pd.DataFrame,
+                    token: Hashable | None = None) -> tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        (aligned, correlations) for a snapshot's rollup (as in get) and a price
+        series, computed once per rollup version and price series.
+        """
+        rollup = self.get(ticker, token)
+        if rollup is None or not len(rollup) or prices is None or prices.empty:
+            return pd.DataFrame(), pd.DataFrame()
+        slot = (ticker.upper(), rollup.token)
+        key = (rollup.version, _price_fingerprint(prices))
+        cached = self._joined.get(slot)
+        if cached is not None and cached[0] == key:
+            return cached[1], cached[2]
+        aligned = align(prices, rollup.daily())
+        corr = forward_correlations(aligned)
+        with self._lock:
+            self._joined[slot] = (key, aligned, corr)
+        return aligned, corr
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rollups.clear()
+            self._joined.clear()
+
+
+sentiment_rollups = SentimentRollups()
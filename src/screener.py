@@ -0,0 +1,211 @@
+from __future__ import annotations
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+from src.ratios import compute_ratios_panel, ratio_names
+
+_OPS = {">": "gt", ">=": "ge", "<": "lt", "<=": "le", "=": "eq", "==": "eq"}
+_SHARES = {"decile": 0.1, "quartile": 0.25, "quintile": 0.2, "half": 0.5}
+_COMPARE = re.compile(r"^(\w+)\s*(>=|<=|==|=|>|<)\s*(-?[\d.]+(?:e-?\d+)?)\s*(%?)$", re.I)
+_RANK = re.compile(r"^(\w+)\s+in\s+(top|bottom)\s+(decile|quartile|quintile|half|[\d.]+\s*%)$", re.I)
+
+
+def parse_query(query: str) -> list[tuple]:
+    """
+    Split a screen such as "current_ratio > 1.5 AND roe in top decile" into
+    clauses: ("cmp", ratio, op, value) or ("rank", ratio, "top"|"bottom", share).
+    Percent literals are fractions ("net_margin > 15%" means > 0.15).
+    """
+    clauses = []
+    for part in re.split(r"\s+and\s+", query.strip(), flags=re.I):
+        if not part:
+            continue
+        if m := _COMPARE.match(part):
+            ratio, op, number, pct = m.groups()
+            value = float(number) / (100 if pct else 1)
+            clauses.append(("cmp", ratio.lower(), _OPS[op], value))
+        elif m := _RANK.match(part):
+            ratio, side, share = m.groups()
+            share = share.lower()
+            frac = _SHARES[share] if share in _SHARES else float(share.rstrip("% ")) / 100
+            if not 0 < frac <= 1:
+                raise ValueError(f"Share must be between 0% and 100%: {part!r}")
+            clauses.append(("rank", ratio.lower(), side.lower(), frac))
+        else:
+            raise ValueError(f"Cannot parse {part!r}. Use e.g. 'roe > 0.1' or 'roe in top decile'.")
+    known = ratio_names()
+    for clause in clauses:
+        if clause[1] not in known:
+            raise ValueError(f"Unknown ratio {clause[1]!r}. Choose from: {', '.join(known)}")
+    return clauses
+
+
+class Screener:
+    """
+    Latest-quarter ratios of a universe in flat arrays (one slot per ticker),
+    with a sorted copy of each ratio and the slot ids in that order. Range
+    clauses become two binary searches; results of the clauses are intersected.
+    The full ratio history is kept alongside with float32 ratio columns.
+    """
+
+    def __init__(self, ratio_panel: pd.DataFrame, ticker_col: str = "ticker"):
+        self.ticker_col = ticker_col
+        self.columns = [c for c in ratio_names() if c in ratio_panel.columns]
+        self._lock = threading.Lock()
+        self.tickers = np.array([], dtype=object)
+        self._slot: dict[str, int] = {}
+        self.dates = np.array([], dtype="datetime64[ns]")
+        self.latest = {c: np.array([], dtype=np.float64) for c in self.columns}
+        self.history = pd.DataFrame(columns=[ticker_col, "date", *self.columns])
+        self._sorted: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        self.update(ratio_panel)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    # ----- building and incremental updates -----
+    def update(self, ratios: pd.DataFrame) -> int:
+        """
+        Add new filings (ratio rows with ticker and date). Only the tickers whose
+        latest quarter changed are removed from and re-inserted into the sorted
+        indexes; returns how many tickers that was. A restated (ticker, date)
+        replaces its earlier row in the history.
+        """
+        if ratios.empty:
+            return 0
+        rows = ratios[[self.ticker_col, "date", *self.columns]].copy()
+        rows[self.ticker_col] = rows[self.ticker_col].astype(str).str.upper()
+        newest = rows.sort_values([self.ticker_col, "date"], kind="stable").groupby(self.ticker_col).tail(1)
+        compact = rows.astype({c: np.float32 for c in self.columns})
+
+        with self._lock:
+            history = pd.concat([self.history, compact], ignore_index=True) if len(self.history) else compact
+            self.history = history.drop_duplicates([self.ticker_col, "date"], keep="last", ignore_index=True)
+            tickers = newest[self.ticker_col].to_numpy()
+            dates = newest["date"].to_numpy(dtype="datetime64[ns]")
+            slots = np.array([self._slot.get(t, -1) for t in tickers], dtype=np.int64)
+
+            # Restated older quarters only go into the history
+            known = slots >= 0
+            current = np.full(len(slots), np.datetime64("NaT"), "datetime64[ns]")
+            current[known] = self.dates[slots[known]]
+            fresher = ~known | (dates >= current)
+            tickers, dates, slots, newest = tickers[fresher], dates[fresher], slots[fresher], newest[fresher]
+
+            added = tickers[slots < 0]
+            if len(added):
+                start = len(self.tickers)
+                for i, t in enumerate(added):
+                    self._slot[t] = start + i
+                self.tickers = np.concatenate([self.tickers, added.astype(object)])
+                self.dates = np.concatenate([self.dates, np.full(len(added), np.datetime64("NaT"), "datetime64[ns]")])
+                for c in self.columns:
+                    self.latest[c] = np.concatenate([self.latest[c], np.full(len(added), np.nan)])
+                slots = np.array([self._slot[t] for t in tickers], dtype=np.int64)
+
+            self.dates[slots] = dates
+            for c in self.columns:
+                values = newest[c].to_numpy(dtype=np.float64)
+                self.latest[c][slots] = values
+                self._reindex(c, slots, values)
+        return len(slots)
+
+    def _reindex(self, col: str, slots: np.ndarray, values: np.ndarray) -> None:
+        if col not in self._sorted:
+            vals = self.latest[col]
+            ok = np.flatnonzero(~np.isnan(vals))
+            order = ok[np.argsort(vals[ok], kind="stable")]
+            self._sorted[col] = (vals[order], order)
+            return
+        vals, order = self._sorted[col]
+        keep = ~np.isin(order, slots)
+        vals, order = vals[keep], order[keep]
+        ok = ~np.isnan(values)
+        new_vals, new_slots = values[ok], slots[ok]
+        by_value = np.argsort(new_vals, kind="stable")
+        new_vals, new_slots = new_vals[by_value], new_slots[by_value]
+        at = np.searchsorted(vals, new_vals, side="right")
+        self._sorted[col] = (np.insert(vals, at, new_vals), np.insert(order, at, new_slots))
+
+    # ----- queries -----
+    def _match(self, clause: tuple) -> np.ndarray:
+        kind, col, how, value = clause
+        vals, order = self._sorted[col]
+        if kind == "rank":
+            k = int(np.ceil(len(vals) * value))
+            return order[len(vals) - k:] if how == "top" else order[:k]
+        lo, hi = {
+            "gt": (np.searchsorted(vals, value, "right"), len(vals)),
+            "ge": (np.searchsorted(vals, value, "left"), len(vals)),
+            "lt": (0, np.searchsorted(vals, value, "left")),
+            "le": (0, np.searchsorted(vals, value, "right")),
+            "eq": (np.searchsorted(vals, value, "left"), np.searchsorted(vals, value, "right")),
+        }[how]
+        return order[lo:hi]
+
+    def screen(self, query: str | list[tuple], limit: int | None = None) -> pd.DataFrame:
+        """Tickers whose latest quarter satisfies every clause, with their latest ratios."""
+        clauses = parse_query(query) if isinstance(query, str) else query
+        with self._lock:
+            missing = [c[1] for c in clauses if c[1] not in self._sorted]
+            if missing:
+                raise ValueError(f"Ratios not indexed: {missing}")
+            if clauses:
+                hits = sorted((self._match(c) for c in clauses), key=len)
+                slots = np.sort(hits[0])
+                for other in hits[1:]:
+                    if not len(slots):
+                        break
+                    slots = np.intersect1d(slots, other, assume_unique=True)
+            else:
+                slots = np.arange(len(self.tickers))
+            if limit is not None:
+                slots = slots[:limit]
+            out = pd.DataFrame({self.ticker_col: self.tickers[slots], "date": self.dates[slots]})
+            for c in self.columns:
+                out[c] = self.latest[c][slots]
+        return out.sort_values(self.ticker_col, ignore_index=True)
+
+    def ticker_history(self, ticker: str) -> pd.DataFrame:
+        with self._lock:
+            rows = self.history[self.history[self.ticker_col] == ticker.upper()]
+        return rows.sort_values("date", ignore_index=True)
+
+
+def from_financials(fin_panel: pd.DataFrame) -> Screener:
+    return Screener(compute_ratios_panel(fin_panel))
+
+
+_screener: Screener | None = None
+_screener_lock = threading.Lock()
+
+
+def get_screener() -> Screener | None:
+    """The universe in the columnar store, indexed once per process. None if the store is empty."""
+    global _screener
+    with _screener_lock:
+        if _screener is None:
+            from src.store import columnar_store
+
+            fin = columnar_store.read("financials")
+            if fin.empty:
+                return None
+            _screener = from_financials(fin)
+        return _screener
+
+
+def add_filings(fin_df: pd.DataFrame) -> int:
+    """Persist new filings (financial rows with a ticker column) and fold them into the screener."""
+    from src.store import columnar_store
+
+    screener = _screener
+    rows = columnar_store.write("financials", fin_df)
+    if screener is None:
+        get_screener()
+    elif rows:
+        fin = fin_df.assign(ticker=fin_df["ticker"].astype(str).str.strip().str.upper(),
+                            date=pd.to_datetime(fin_df["date"], errors="coerce")).dropna(subset=["date"])
+        screener.update(compute_ratios_panel(fin))
+    return rows
@@ -1,44 +1,223 @@
 from __future__ import annotations
+import hashlib
+import io
+import json
+import marshal
+import multiprocessing as mp
+import os
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
+from src.config import STAGE_TIMEOUTS
+from src.perf import annotate
+from src.singleflight import single_flight
+
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+MEMO_PATH = DATA_DIR / ".cache" / "sentiment_memo.sqlite"
+
+# Batches with at least this many unseen headlines are scored in a process pool
+POOL_THRESHOLD = 20_000
+POOL_CHUNK = 5_000
+
+# Vendored VADER lexicon (MIT, see lexicon/LICENSE.txt) and its precompiled form
+LEXICON_PATH = Path(__file__).resolve().parent / "lexicon" / "vader_lexicon.txt"
+LEXICON_CACHE = DATA_DIR / ".cache" / "vader_lexicon.marshal"
+
+# Mixed into memo keys with a hash of the loaded lexicon; bump it when the scorer changes
+SCORER_VERSION = b"vader-3.3.2"
+
+
+def _compile_lexicon(path: Path = LEXICON_PATH, cache: Path = LEXICON_CACHE) -> dict[str, float]:
+    """
+    Lexicon as {token: valence}, parsed the same way NLTK does.
+    The parsed dict is kept in a marshal file and rebuilt when the text changes.
+    """
+    text = path.read_bytes()
+    digest = hashlib.blake2b(text, digest_size=16).hexdigest()
+    try:
+        cached_digest, lexicon = marshal.loads(cache.read_bytes())
+        if cached_digest == digest:
+            return lexicon
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+
+    lexicon = {}
+    for line in text.decode("utf-8").split("\n"):
+        if line.strip():
+            word, measure = line.strip().split("\t")[0:2]
+            lexicon[word] = float(measure)
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(marshal.dumps((digest, lexicon)))
+        os.replace(tmp, cache)
+    except OSError:
+        pass  # read-only deploys just parse the text each time
+    return lexicon
+
+
+def _lexicon_salt(lexicon: dict[str, float]) -> bytes:
+    spec = repr(sorted(lexicon.items())).encode()
+    return hashlib.blake2b(SCORER_VERSION + spec, digest_size=16).digest()
+
 
-# Lazy VADER loader
+# Lazy VADER loader (vendored lexicon, never touches the network)
 _vader = None
+_memo_salt = None
+_vader_lock = threading.Lock()
 def _get_vader():
-    global _vader
+    global _vader, _memo_salt
     if _vader is None:
-        try:
-            from nltk.sentiment import SentimentIntensityAnalyzer
-            _vader = SentimentIntensityAnalyzer()
-        except Exception:
-            import nltk
-            nltk.download("vader_lexicon")
-            from nltk.sentiment import SentimentIntensityAnalyzer
-            _vader = SentimentIntensityAnalyzer()
+        with _vader_lock:
+            if _vader is None:
+                import nltk.data
+                from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+                class VendoredAnalyzer(SentimentIntensityAnalyzer):
+                    # The stock constructor, with the parsed lexicon from the marshal cache
+                    def make_lex_dict(self):
+                        return _compile_lexicon()
+
+                # nltk.data resolves the vendored file locally instead of downloading it
+                if str(LEXICON_PATH.parent) not in nltk.data.path:
+                    nltk.data.path.insert(0, str(LEXICON_PATH.parent))
+                vader = VendoredAnalyzer(lexicon_file=LEXICON_PATH.name)
+                _memo_salt = _lexicon_salt(vader.lexicon)
+                _vader = vader
     return _vader
 
-def load_news_and_score(_: str) -> pd.DataFrame:
+
+def memo_salt() -> bytes:
+    """Key for headline hashes: changes with the loaded lexicon and SCORER_VERSION."""
+    _get_vader()
+    return _memo_salt
+
+
+def warm_up() -> None:
+    """Load VADER (and build the lexicon cache) ahead of the first request."""
+    _get_vader()
+
+def _score_texts(texts: list[str]) -> list[float]:
+    vader = _get_vader()
+    return [vader.polarity_scores(x)["compound"] if x.strip() else 0.0 for x in texts]
+
+
+def _init_worker() -> None:
+    # Load the lexicon once per worker instead of once per batch
+    _get_vader()
+
+
+def headline_key(text: str, salt: bytes | None = None) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8", errors="surrogatepass"), digest_size=16,
+                           key=salt if salt is not None else memo_salt()).digest()
+
+
+class ScoreMemo:
     """
-    Robustly load optional news CSV and compute VADER compound.
-    Returns an EMPTY DataFrame if file is missing/empty/unreadable.
-    Expected columns (if present): date, source, headline
+    Persistent headline-hash -> compound score memo backed by SQLite.
+    Safe to share between threads; every call takes a short lock.
     """
-    news_path = DATA_DIR / "sample_news.csv"
 
-    # If no file, just return empty frame with expected columns.
-    if not news_path.exists():
-        return pd.DataFrame(columns=["date", "source", "headline", "compound"])
+    def __init__(self, path: str | Path = MEMO_PATH):
+        self.path = Path(path)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS scores (key BLOB PRIMARY KEY, compound REAL NOT NULL)")
+        return self._conn
+
+    def get_many(self, keys: list[bytes]) -> dict[bytes, float]:
+        found = {}
+        with self._lock:
+            db = self._db()
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                marks = ",".join("?" * len(batch))
+                found.update(db.execute(f"SELECT key, compound FROM scores WHERE key IN ({marks})", batch))
+        return found
+
+    def put_many(self, items: dict[bytes, float]) -> None:
+        if not items:
+            return
+        with self._lock:
+            db = self._db()
+            with db:
+                db.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?)", items.items())
+
+
+_memo = None
+def _get_memo() -> ScoreMemo:
+    global _memo
+    if _memo is None:
+        _memo = ScoreMemo()
+    return _memo
+
+
+def score_headlines(headlines, processes: int | None = None, memo: ScoreMemo | None = None) -> np.ndarray:
+    """
+    VADER compound score for each headline, identical to scoring them one by one.
+
+    Duplicate headlines are scored once, scores already in the persistent
+    memo are reused, and large batches of unseen headlines are fanned out
+    to a process pool whose workers each load VADER once. Blank or missing
+    headlines score 0.0.
+    """
+    texts = pd.Series(headlines, dtype=object).astype(str)
+    codes, uniques = pd.factorize(texts)
+    uniques = [str(u) for u in uniques]
+    if not uniques:
+        return np.zeros(len(texts))
+
+    memo = memo or _get_memo()
+    salt = memo_salt()
+    keys = [headline_key(u, salt) for u in uniques]
+    known = memo.get_many(keys)
+    todo = [i for i, k in enumerate(keys) if k not in known]
+    annotate(headlines=len(texts), unique=len(uniques), memo_hits=len(known))
+
+    if todo:
+        pending = [uniques[i] for i in todo]
+        if len(pending) >= POOL_THRESHOLD:
+            chunks = [pending[i:i + POOL_CHUNK] for i in range(0, len(pending), POOL_CHUNK)]
+            with ProcessPoolExecutor(processes, mp_context=mp.get_context("spawn"), initializer=_init_worker) as pool:
+                scored = [c for part in pool.map(_score_texts, chunks) for c in part]
+        else:
+            scored = _score_texts(pending)
+        fresh = {keys[i]: c for i, c in zip(todo, scored)}
+        memo.put_many(fresh)
+        known.update(fresh)
+
+    scores = np.array([known[k] for k in keys], dtype=np.float64)
+    out = np.zeros(len(texts))
+    valid = codes >= 0
+    out[valid] = scores[codes[valid]]
+    return out
+
+
+NEWS_COLUMNS = ["date", "source", "headline", "compound"]
+NEWS_PATH = DATA_DIR / "sample_news.csv"
+NEWS_STORE_DIR = DATA_DIR / ".cache" / "news"
+
+# Bytes hashed at the start of the source (and just before the watermark)
+# to tell an append from a rewrite
+_PREFIX_BYTES = 64 * 1024
+_MAX_PARTS = 32
+
+
+def _empty_news() -> pd.DataFrame:
+    return pd.DataFrame(columns=NEWS_COLUMNS)
 
-    # Try to read; handle empty or bad CSVs gracefully.
-    try:
-        df = pd.read_csv(news_path)
-    except pd.errors.EmptyDataError:
-        return pd.DataFrame(columns=["date", "source", "headline", "compound"])
-    except Exception:
-        return pd.DataFrame(columns=["date", "source", "headline", "compound"])
 
+def _score_news_frame(df: pd.DataFrame) -> pd.DataFrame:
     # Normalize columns
     df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
 
@@ -52,12 +231,215 @@ def load_news_and_score(_: str) -> pd.DataFrame:
 
     # Compute VADER compound if headlines exist
     if "headline" in df.columns and not df["headline"].empty:
-        vader = _get_vader()
-        df["compound"] = df["headline"].astype(str).apply(
-            lambda x: vader.polarity_scores(x)["compound"] if x.strip() else 0.0
-        )
+        df["compound"] = score_headlines(df["headline"])
     else:
         df["compound"] = pd.Series(dtype="float")
+    return df
+
+
+class ScoredNewsStore:
+    """
+    Append-only store of scored headlines for one news CSV.
+
+    Scored rows are kept as Parquet parts next to a watermark recording the
+    byte offset already consumed, the row count, the file's size and mtime,
+    and hashes of its prefix. When the source only grew, just the bytes past
+    the watermark are parsed and scored into a new part; any other change
+    (truncation, edited history, new header) triggers a full rebuild.
+
+    Only whole lines are consumed: reads stop at the size seen when the load
+    started and at the last newline before it, so a row still being written
+    is picked up (once) on a later load.
+    """
+
+    def __init__(self, source: str | Path, root: str | Path = NEWS_STORE_DIR):
+        self.source = Path(source)
+        tag = hashlib.blake2b(str(self.source.resolve()).encode(), digest_size=4).hexdigest()
+        self.root = Path(root) / f"{self.source.stem}-{tag}"
+        self._lock = threading.Lock()
+        self._frame = None
+
+    def load(self) -> pd.DataFrame:
+        """All scored rows of the source, in file order."""
+        with self._lock:
+            stat = self.source.stat()
+            mark = self._read_watermark()
+            if mark and mark["size"] == stat.st_size and mark["mtime"] == stat.st_mtime:
+                annotate(cache="hit")
+            elif mark and self._is_append(mark, stat.st_size):
+                annotate(cache="append")
+                self._append(mark, stat)
+            else:
+                annotate(cache="rebuild")
+                self._rebuild(stat)
+            return self._scored()
+
+    def _is_append(self, mark: dict, size: int) -> bool:
+        return (
+            mark["offset"] > 0
+            and size >= mark["offset"]
+            and self._prefix_hash(mark["offset"]) == mark["prefix_hash"]
+        )
+
+    def _read_lines(self, start: int, end: int) -> bytes:
+        """Bytes [start, end) of the source, cut after the last complete line."""
+        with open(self.source, "rb") as f:
+            f.seek(start)
+            data = f.read(max(0, end - start))
+        return data[:data.rfind(b"\n") + 1]
+
+    def _rebuild(self, stat) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root.mkdir(parents=True, exist_ok=True)
+        data = self._read_lines(0, stat.st_size)
+        try:
+            df = pd.read_csv(io.BytesIO(data))
+            header = list(df.columns)
+        except pd.errors.EmptyDataError:
+            df, header = pd.DataFrame(), []
+        rows = self._write_part(df)
+        self._write_watermark(header, rows, len(data), stat)
+        self._frame = None
+
+    def _append(self, mark: dict, stat) -> None:
+        data = self._read_lines(mark["offset"], stat.st_size)
+        try:
+            df = pd.read_csv(io.BytesIO(data), header=None, names=mark["header"])
+        except pd.errors.EmptyDataError:
+            df = pd.DataFrame(columns=mark["header"])
+        rows = mark["rows"] + self._write_part(df)
+        self._write_watermark(mark["header"], rows, mark["offset"] + len(data), stat)
+        self._frame = None
+        if len(self._parts()) > _MAX_PARTS:
+            self._compact()
+
+    def _write_part(self, df: pd.DataFrame) -> int:
+        if df.empty:
+            return 0
+        scored = _score_news_frame(df)
+        path = self.root / f"part-{len(self._parts()):05d}.parquet"
+        tmp = path.with_suffix(".tmp")
+        scored.to_parquet(tmp, index=False)
+        os.replace(tmp, path)
+        return len(scored)
+
+    def _compact(self) -> None:
+        parts = self._parts()
+        merged = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+        tmp = self.root / "compact.tmp"
+        merged.to_parquet(tmp, index=False)
+        for p in parts:
+            p.unlink()
+        os.replace(tmp, self.root / "part-00000.parquet")
+
+    def _parts(self) -> list[Path]:
+        return sorted(self.root.glob("part-*.parquet"))
+
+    def _scored(self) -> pd.DataFrame:
+        # Parts are re-read only after they change
+        if self._frame is None:
+            parts = self._parts()
+            if parts:
+                self._frame = pd.concat([pd.read_parquet(p) for p in parts], ignore_index=True)
+            else:
+                self._frame = _empty_news()
+        return self._frame
+
+    def _prefix_hash(self, offset: int) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(self.source, "rb") as f:
+            digest.update(f.read(min(offset, _PREFIX_BYTES)))
+            f.seek(max(0, offset - _PREFIX_BYTES))
+            digest.update(f.read(min(offset, _PREFIX_BYTES)))
+        return digest.hexdigest()
+
+    def _read_watermark(self) -> dict | None:
+        path = self.root / "watermark.json"
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def _write_watermark(self, header: list[str], rows: int, offset: int, stat) -> None:
+        # `offset` is the bytes actually consumed; size/mtime are what the load started from
+        mark = {
+            "header": header,
+            "offset": offset,
+            "rows": rows,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "prefix_hash": self._prefix_hash(offset),
+        }
+        tmp = self.root / "watermark.tmp"
+        tmp.write_text(json.dumps(mark))
+        os.replace(tmp, self.root / "watermark.json")
+
+
+_news_stores: dict[Path, ScoredNewsStore] = {}
+_news_stores_lock = threading.Lock()
+
+def _get_news_store(path: Path) -> ScoredNewsStore:
+    with _news_stores_lock:
+        if path not in _news_stores:
+            _news_stores[path] = ScoredNewsStore(path)
+        return _news_stores[path]
+
+
+def load_news_and_score(ticker: str, news_path: str | Path | None = None, incremental: bool = True) -> pd.DataFrame:
+    """
+    Robustly load optional news CSV and compute VADER compound.
+    Returns an EMPTY DataFrame if file is missing/empty/unreadable.
+    Expected columns (if present): date, source, headline
+
+    Without a news_path, headlines for `ticker` in the columnar store take
+    precedence over the sample CSV; previously seen headlines come from the memo.
+
+    With incremental=True (default) scored rows are kept in a companion
+    store, so only headlines appended since the last call are parsed and scored.
+    Concurrent calls for the same news source share one load; a caller still
+    waiting on it after the stage's time budget gets SingleFlightTimeout.
+    """
+    if news_path is None and ticker:
+        from src.store import columnar_store
+
+        if columnar_store.has("news", ticker):
+            annotate(source="store")
+            return single_flight.do(("news", "store", ticker.upper()), lambda: _load_store_news(ticker),
+                                    timeout=STAGE_TIMEOUTS["load_news_and_score"])
+
+    news_path = Path(news_path) if news_path is not None else NEWS_PATH
+    return single_flight.do(("news", str(news_path.resolve()), incremental),
+                            lambda: _load_csv_news(news_path, incremental),
+                            timeout=STAGE_TIMEOUTS["load_news_and_score"])
+
+
+def _load_store_news(ticker: str) -> pd.DataFrame:
+    from src.store import columnar_store
+
+    df = _score_news_frame(columnar_store.read_news(ticker))
+    return df.sort_values("date").reset_index(drop=True)
+
+
+def _load_csv_news(news_path: Path, incremental: bool) -> pd.DataFrame:
+    # If no file, just return empty frame with expected columns.
+    if not news_path.exists():
+        return _empty_news()
+
+    # Try to read; handle empty or bad CSVs gracefully.
+    try:
+        if incremental:
+            df = _get_news_store(news_path).load()
+        else:
+            df = _score_news_frame(pd.read_csv(news_path))
+    except pd.errors.EmptyDataError:
+        return _empty_news()
+    except Exception:
+        return _empty_news()
 
     # Sort & return
     return df.sort_values("date").reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # Precompile the lexicon cache, e.g. while building a deploy image
+    warm_up()
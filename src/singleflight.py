@@ -0,0 +1,139 @@
+from __future__ import annotations
+import copy
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Hashable
+import pandas as pd
+
+from src.perf import annotate
+
+# How long a caller waits on someone else's in-flight call by default (seconds)
+DEFAULT_WAIT = 30.0
+
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised to a caller that gave up waiting on another caller's in-flight call."""
+
+
+class _Call:
+    __slots__ = ("done", "value", "error", "waiters", "started")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+        self.started = time.monotonic()
+
+
+def _namespace(key: Hashable) -> Hashable:
+    return key[0] if isinstance(key, tuple) and key else key
+
+
+def _reraise(error: BaseException):
+    # Each waiter raises its own copy: raising the shared object from many
+    # threads would keep appending their frames to one traceback
+    try:
+        fresh = copy.copy(error)
+    except Exception:
+        fresh = RuntimeError(f"In-flight call failed: {error!r}")
+    raise fresh.with_traceback(None) from error
+
+
+def _private(value):
+    # Shallow copy-on-write copy, so a caller renaming an index or adding a
+    # column does not change the frame handed to the other callers
+    return value.copy(deep=False) if isinstance(value, (pd.DataFrame, pd.Series)) else value
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs
+    `fn`, callers arriving while it runs wait for and share its result
+    (or its exception). Nothing is cached once the call returns.
+    A call still running after a caller's `timeout` is treated as hung:
+    that caller starts a fresh one instead of joining it.
+    Keys are tuples whose first item names the kind of call, for the metrics.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._executed: Counter = Counter()
+        self._coalesced: Counter = Counter()
+        self._failed: Counter = Counter()
+        self._timeouts: Counter = Counter()
+        self._stale: Counter = Counter()
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: float | None = DEFAULT_WAIT) -> Any:
+        """
+        Result of fn(), shared with every concurrent caller of the same key.
+        A caller that joins an in-flight call waits at most `timeout` seconds
+        (None: no limit) and then raises SingleFlightTimeout.
+        """
+        kind = _namespace(key)
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and timeout is not None and time.monotonic() - call.started > timeout:
+                # Leave the hung call to its waiters; it no longer owns the key
+                self._stale[kind] += 1
+                call = None
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._executed[kind] += 1
+            else:
+                call.waiters += 1
+                self._coalesced[kind] += 1
+
+        if leader:
+            try:
+                call.value = fn()
+            except BaseException as e:
+                call.error = e
+                with self._lock:
+                    self._failed[kind] += 1
+                raise
+            finally:
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+                call.done.set()
+            return _private(call.value)
+
+        annotate(single_flight="shared")
+        if not call.done.wait(timeout):
+            with self._lock:
+                self._timeouts[kind] += 1
+            raise SingleFlightTimeout(f"Gave up after {timeout}s waiting on the in-flight call for {key!r}")
+        if call.error is not None:
+            _reraise(call.error)
+        return _private(call.value)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> dict[Hashable, dict[str, int]]:
+        """
+        Per kind of call: calls made, how many ran `fn`, were coalesced, failed
+        or timed out, and how many hung calls were bypassed (`stale`).
+        """
+        with self._lock:
+            kinds = set(self._executed) | set(self._coalesced)
+            return {
+                kind: {"calls": self._executed[kind] + self._coalesced[kind],
+                       "executed": self._executed[kind], "coalesced": self._coalesced[kind],
+                       "failed": self._failed[kind], "timeouts": self._timeouts[kind],
+                       "stale": self._stale[kind]}
+                for kind in sorted(kinds, key=str)
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for counter in (self._executed, self._coalesced, self._failed, self._timeouts, self._stale):
+                counter.clear()
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,179 @@
+"""
+Local columnar store for financials and news, partitioned by ticker and year.
+
+    python -m src.store financials data/universe.csv          # CSV with a ticker column
+    python -m src.store financials data/aapl.csv --ticker AAPL
+    python -m src.store news data/news.csv --ticker AAPL
+
+Rows live under data/store/<kind>/ticker=<T>/year=<Y>/part-0.parquet with a
+fixed Arrow schema. Reads open only the requested ticker's directory, prune
+years and filter dates inside the scan, and memory-map the files, so a whole
+universe can sit on disk while the app touches one company's slice.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import threading
+from pathlib import Path
+from urllib.parse import quote, unquote
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+from src.data import CSV_CHUNK_ROWS, DATA_DIR, NUMERIC_COLUMNS, REQUIRED_COLUMNS, normalize_column
+
+STORE_DIR = DATA_DIR / "store"
+
+_DATE = pa.timestamp("us")
+_PARTITION_SCHEMA = pa.schema([("ticker", pa.string()), ("year", pa.int16())])
+
+SCHEMAS = {
+    "financials": pa.schema(
+        [("date", _DATE)] + [(c, pa.float64()) for c in NUMERIC_COLUMNS] + list(_PARTITION_SCHEMA)
+    ),
+    "news": pa.schema(
+        [("date", _DATE), ("source", pa.string()), ("headline", pa.string())] + list(_PARTITION_SCHEMA)
+    ),
+}
+# Rows with the same key replace each other on write
+KEYS = {
+    "financials": ["ticker", "date"],
+    "news": ["ticker", "date", "source", "headline"],
+}
+
+
+def _ticker_dir(ticker: str) -> str:
+    return "ticker=" + quote(ticker, safe="")
+
+
+class ColumnarStore:
+    """Partitioned Parquet datasets under `root`, one per kind ('financials', 'news')."""
+
+    def __init__(self, root: str | Path = STORE_DIR):
+        self.root = Path(root)
+        self._fs = pafs.LocalFileSystem(use_mmap=True)
+        self._partitioning = ds.partitioning(_PARTITION_SCHEMA, flavor="hive")
+        self._lock = threading.Lock()
+
+    def tickers(self, kind: str) -> list[str]:
+        base = self.root / kind
+        if not base.is_dir():
+            return []
+        return sorted(unquote(p.name.split("=", 1)[1]) for p in base.glob("ticker=*") if p.is_dir())
+
+    def has(self, kind: str, ticker: str) -> bool:
+        return (self.root / kind / _ticker_dir(ticker.upper())).is_dir()
+
+    def read(self, kind: str, ticker: str | None = None, start=None, end=None,
+             columns: list[str] | None = None) -> pd.DataFrame:
+        """
+        Rows of `kind` for one ticker (or all), optionally within [start, end].
+        The year bounds prune partitions; the date bounds are applied in the scan.
+        """
+        schema = SCHEMAS[kind]
+        base = self.root / kind
+        source = base / _ticker_dir(ticker.upper()) if ticker else base
+        if not source.is_dir():
+            return pd.DataFrame({f.name: pd.Series(dtype=f.type.to_pandas_dtype()) for f in schema
+                                 if columns is None or f.name in columns})
+
+        dataset = ds.dataset(str(source), schema=schema, format="parquet", filesystem=self._fs,
+                             partitioning=self._partitioning, partition_base_dir=str(base))
+        predicate = None
+        if ticker:
+            predicate = ds.field("ticker") == ticker.upper()
+        for bound, op in ((start, "ge"), (end, "le")):
+            if bound is None:
+                continue
+            bound = pd.Timestamp(bound)
+            year = ds.field("year") >= bound.year if op == "ge" else ds.field("year") <= bound.year
+            date = (ds.field("date") >= pa.scalar(bound, _DATE) if op == "ge"
+                    else ds.field("date") <= pa.scalar(bound, _DATE))
+            clause = year & date
+            predicate = clause if predicate is None else predicate & clause
+        table = dataset.to_table(columns=columns, filter=predicate)
+        df = table.to_pandas()
+        if "date" in df.columns:
+            df = df.sort_values(["ticker", "date"] if "ticker" in df.columns else "date", kind="stable")
+        return df.reset_index(drop=True)
+
+    def write(self, kind: str, df: pd.DataFrame) -> int:
+        """
+        Upsert rows (which must carry a ticker column) and return how many were written.
+        Each touched (ticker, year) partition is merged with its stored rows and rewritten.
+        """
+        schema = SCHEMAS[kind]
+        missing = [f.name for f in schema if f.name not in df.columns and f.name != "year"]
+        if missing:
+            raise ValueError(f"Rows for the {kind} store are missing columns: {missing}")
+
+        df = df[[f.name for f in schema if f.name != "year"]].copy()
+        df["ticker"] = df["ticker"].astype(str).str.strip().str.upper()
+        df["date"] = pd.to_datetime(df["date"], errors="coerce")
+        df = df.dropna(subset=["date"])
+        if df.empty:
+            return 0
+        df["year"] = df["date"].dt.year.astype("int16")
+
+        with self._lock:
+            stored = []
+            for ticker, years in df.groupby("ticker")["year"].unique().items():
+                if not self.has(kind, ticker):
+                    continue
+                old = self.read(kind, ticker, start=f"{years.min()}-01-01", end=f"{years.max()}-12-31 23:59:59")
+                stored.append(old[old["year"].isin(years)])
+            merged = pd.concat([*stored, df], ignore_index=True)
+            merged = merged.drop_duplicates(subset=KEYS[kind], keep="last")
+            merged = merged.sort_values(["ticker", "date"], kind="stable")
+            table = pa.Table.from_pandas(merged[schema.names], schema=schema, preserve_index=False)
+            partitions = len(merged.drop_duplicates(["ticker", "year"]))
+            ds.write_dataset(
+                table, str(self.root / kind), format="parquet", partitioning=self._partitioning,
+                basename_template="part-{i}.parquet", existing_data_behavior="delete_matching",
+                filesystem=self._fs, max_partitions=max(1024, partitions),
+            )
+        return len(df)
+
+    def read_financials(self, ticker: str, start=None, end=None) -> pd.DataFrame:
+        """Same shape as load_financials(): REQUIRED_COLUMNS sorted by date."""
+        return self.read("financials", ticker, start, end, columns=REQUIRED_COLUMNS)
+
+    def read_news(self, ticker: str, start=None, end=None) -> pd.DataFrame:
+        return self.read("news", ticker, start, end, columns=["date", "source", "headline"])
+
+
+columnar_store = ColumnarStore()
+
+
+def ingest_csv(kind: str, path: str | Path, ticker: str | None = None,
+               store: ColumnarStore = columnar_store) -> int:
+    """Stream a CSV into the store in chunks; `ticker` is used when the file has no ticker column."""
+    total = 0
+    with pd.read_csv(path, chunksize=CSV_CHUNK_ROWS) as reader:
+        for chunk in reader:
+            chunk.columns = [normalize_column(c) for c in chunk.columns]
+            if ticker is not None:
+                chunk["ticker"] = ticker
+            elif "ticker" not in chunk.columns:
+                raise ValueError(f"{path} has no ticker column; pass --ticker.")
+            total += store.write(kind, chunk)
+    return total
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.store", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=sorted(SCHEMAS))
+    parser.add_argument("csv", type=Path)
+    parser.add_argument("--ticker", help="ticker for every row (when the CSV has no ticker column)")
+    parser.add_argument("--root", type=Path, default=STORE_DIR)
+    args = parser.parse_args(argv)
+
+    rows = ingest_csv(args.kind, args.csv, args.ticker, store=ColumnarStore(args.root))
+    print(f"stored {rows} {args.kind} rows under {args.root / args.kind}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
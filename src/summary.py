@@ -1,10 +1,13 @@
 from __future__ import annotations
+import hashlib
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 import textwrap
 
 def _fmt_pct(x):
-    if x is None or (isinstance(x, float) and (np.isnan(x) or np.isinf(x))):
+    if x is None or (isinstance(x, (float, np.floating)) and (np.isnan(x) or np.isinf(x))):
         return "n/a"
     try:
         return f"{float(x) * 100:.1f}%"
@@ -17,7 +20,13 @@ def generate_summary(
     ticker: str,
     currency: str,
     style: str = "Executive brief",
+    sentiment_score: float | None = None,
 ) -> str:
+    """
+    Markdown health snapshot. The outlook uses `sentiment_score` when given
+    (e.g. the decayed score of the sentiment rollup), else the mean compound
+    of the last 30 headlines in `sentiment_df`.
+    """
     if ratio_df is None or ratio_df.empty:
         return "No ratio data available."
 
@@ -33,26 +42,41 @@ def generate_summary(
         elif delta < -0.02: return "worsening"
         else:               return "stable"
 
-    gross = _fmt_pct(latest.get("gross_margin", np.nan))
-    op    = _fmt_pct(latest.get("operating_margin", np.nan))
-    net   = _fmt_pct(latest.get("net_margin", np.nan))
-    cur   = latest.get("current_ratio", np.nan)
-    de    = latest.get("debt_to_equity", np.nan)
-    roe   = _fmt_pct(latest.get("roe", np.nan))
-
     gross_dir = dir_text(trend["gross_margin"])     if "gross_margin"     in trend else "stable"
     net_dir   = dir_text(trend["net_margin"])       if "net_margin"       in trend else "stable"
     de_dir    = dir_text(trend["debt_to_equity"])   if "debt_to_equity"   in trend else "stable"
 
-    sentiment_line = ""
-    if sentiment_df is not None and not sentiment_df.empty and "compound" in sentiment_df:
+    avg, avg_label = None, "avg VADER"
+    if sentiment_score is not None:
+        avg, avg_label = float(sentiment_score), "decayed VADER score"
+    elif sentiment_df is not None and not sentiment_df.empty and "compound" in sentiment_df:
         avg = float(sentiment_df.tail(30)["compound"].mean())
+
+    return _render(
+        ticker, currency, style,
+        latest.get("gross_margin", np.nan), latest.get("operating_margin", np.nan),
+        latest.get("net_margin", np.nan), latest.get("current_ratio", np.nan),
+        latest.get("debt_to_equity", np.nan), latest.get("roe", np.nan),
+        gross_dir, net_dir, de_dir, avg, avg_label,
+    )
+
+
+def _render(ticker, currency, style, gross, op, net, cur, de, roe,
+            gross_dir, net_dir, de_dir, avg, avg_label="avg VADER") -> str:
+    """Markdown template shared by generate_summary() and summarize_many()."""
+    gross = _fmt_pct(gross)
+    op    = _fmt_pct(op)
+    net   = _fmt_pct(net)
+    roe   = _fmt_pct(roe)
+
+    sentiment_line = ""
+    if avg is not None:
         if   avg >  0.05: bias = "positive"
         elif avg < -0.05: bias = "negative"
         else:             bias = "mixed"
-        sentiment_line = f" Recent news sentiment appears **{bias}** (avg VADER {avg:.2f})."
+        sentiment_line = f" Recent news sentiment appears **{bias}** ({avg_label} {avg:.2f})."
 
-    risk_note = ">1.0 is healthy" if (isinstance(cur, (int, float)) and not np.isnan(cur) and cur >= 1.0) else "<1.0 is a risk"
+    risk_note = ">1.0 is healthy" if (isinstance(cur, (int, float, np.number)) and not np.isnan(cur) and cur >= 1.0) else "<1.0 is a risk"
 
     body = f"""
 **{ticker}** financial health snapshot ({currency} reporting):
@@ -73,3 +97,151 @@ def generate_summary(
         body += "\n\n_Methodology:_ Ratios computed from standardized statement lines; sentiment uses NLTK VADER on recent headlines."
 
     return textwrap.dedent(body)
+
+
+# -------------------------------------------------------------------
+# ✅ Many tickers at once
+# -------------------------------------------------------------------
+_TREND_COLUMNS = {"gross_margin": "gross_dir", "net_margin": "net_dir", "debt_to_equity": "de_dir"}
+_LATEST_COLUMNS = ["gross_margin", "operating_margin", "net_margin", "current_ratio", "debt_to_equity", "roe"]
+
+
+def _directions(first: pd.Series, last: pd.Series, count: pd.Series) -> np.ndarray:
+    # dir_text() on every ticker at once: first/last/count ignore NaNs like dropna()
+    delta = last.to_numpy(np.float64) - first.to_numpy(np.float64)
+    return np.select([count.to_numpy() < 2, delta > 0.02, delta < -0.02],
+                     ["stable", "improving", "worsening"], "stable")
+
+
+def summary_facts(
+    ratio_panel: pd.DataFrame,
+    sentiment: pd.DataFrame | None = None,
+    ticker_col: str = "ticker",
+) -> pd.DataFrame:
+    """
+    Per-ticker inputs of the summary template: latest ratios, trend directions
+    over the last 4 rows and the mean compound of the last 30 headlines (NaN
+    when a ticker has no sentiment). Row order within a ticker is respected,
+    exactly as generate_summary() does for a single company.
+    """
+    groups = ratio_panel.groupby(ticker_col, sort=False)
+    latest = groups.tail(1).set_index(ticker_col)
+    facts = pd.DataFrame(index=latest.index)
+    for col in _LATEST_COLUMNS:
+        facts[col] = latest[col] if col in latest.columns else np.nan
+
+    trend = groups.tail(4).groupby(ticker_col, sort=False)
+    for col, name in _TREND_COLUMNS.items():
+        if col in ratio_panel.columns:
+            facts[name] = _directions(trend[col].first(), trend[col].last(), trend[col].count())
+        else:
+            facts[name] = "stable"
+
+    facts["sentiment_avg"] = np.nan
+    if sentiment is not None and not sentiment.empty and "compound" in sentiment and ticker_col in sentiment:
+        recent = sentiment.groupby(ticker_col, sort=False).tail(30)
+        facts["sentiment_avg"] = recent.groupby(ticker_col, sort=False)["compound"].mean()
+        facts["has_sentiment"] = facts.index.isin(recent[ticker_col].unique())
+    else:
+        facts["has_sentiment"] = False
+    return facts
+
+
+def summarize_many(
+    ratio_panel: pd.DataFrame | dict[str, pd.DataFrame],
+    sentiment: pd.DataFrame | dict[str, pd.DataFrame] | None = None,
+    currency: str = "USD",
+    style: str = "Executive brief",
+    ticker_col: str = "ticker",
+) -> pd.Series:
+    """
+    generate_summary() for a whole universe: ticker -> Markdown.
+
+    `ratio_panel` is a long frame with a ticker column (e.g. compute_ratios_panel
+    output) or a dict of ticker -> ratio frame; `sentiment` likewise. Each
+    ticker's text equals generate_summary() on that ticker's slices. Results
+    are memoized on a fingerprint of the inputs and style.
+    """
+    ratio_panel = _as_panel(ratio_panel, ticker_col)
+    sentiment = _as_panel(sentiment, ticker_col) if sentiment is not None else None
+    if ratio_panel.empty:
+        return pd.Series(dtype=str, name="summary")
+
+    key = ("many", _fingerprint(ratio_panel), _fingerprint(sentiment), currency, style, ticker_col)
+    cached = _memo_get(key)
+    if cached is not None:
+        return cached
+
+    facts = summary_facts(ratio_panel, sentiment, ticker_col)
+    columns = [facts[c].tolist() for c in _LATEST_COLUMNS + list(_TREND_COLUMNS.values())]
+    avgs = [float(a) if has else None for a, has in zip(facts["sentiment_avg"], facts["has_sentiment"])]
+    texts = [
+        _render(str(ticker), currency, style, *row, avg)
+        for ticker, *row, avg in zip(facts.index, *columns, avgs)
+    ]
+    out = pd.Series(texts, index=facts.index, name="summary")
+    return _memo_put(key, out)
+
+
+def cached_summary(
+    ratio_df: pd.DataFrame,
+    sentiment_df: pd.DataFrame | None,
+    ticker: str,
+    currency: str,
+    style: str = "Executive brief",
+    sentiment_score: float | None = None,
+) -> str:
+    """
+    generate_summary() memoized on the rows it actually reads (the last 4
+    ratio rows and the last 30 headlines, or the given sentiment_score),
+    so reruns and style toggles skip it.
+    """
+    if ratio_df is None or ratio_df.empty:
+        return generate_summary(ratio_df, sentiment_df, ticker, currency, style=style)
+    news = None
+    if sentiment_score is None and sentiment_df is not None and not sentiment_df.empty and "compound" in sentiment_df:
+        news = sentiment_df.tail(30)[["compound"]]
+    key = ("one", _fingerprint(ratio_df.tail(4)), _fingerprint(news), sentiment_score, ticker, currency, style)
+    cached = _memo_get(key)
+    if cached is None:
+        cached = _memo_put(key, generate_summary(ratio_df, sentiment_df, ticker, currency, style=style,
+                                                 sentiment_score=sentiment_score))
+    return cached
+
+
+def _as_panel(data, ticker_col: str) -> pd.DataFrame:
+    if isinstance(data, dict):
+        if not data:
+            return pd.DataFrame(columns=[ticker_col])
+        return pd.concat(data, names=[ticker_col, None]).reset_index(level=0).reset_index(drop=True)
+    return data
+
+
+def _fingerprint(df: pd.DataFrame | None) -> str | None:
+    if df is None:
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((list(df.columns), [str(t) for t in df.dtypes], len(df))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+_MEMO_SIZE = 256
+_memo: OrderedDict = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def _memo_get(key):
+    with _memo_lock:
+        if key in _memo:
+            _memo.move_to_end(key)
+            return _memo[key]
+    return None
+
+
+def _memo_put(key, value):
+    with _memo_lock:
+        _memo[key] = value
+        while len(_memo) > _MEMO_SIZE:
+            _memo.popitem(last=False)
+    return value
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+import src.data as data
+from src.analytics import AnalyticsCache, analytics_cache, compute_analytics, price_analytics, session_analytics
+
+
+def _panel(days=400, tickers=("AAA", "BBB", "SPY"), seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2022-01-03", periods=days, name="Date")
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (days, len(tickers))), axis=0))
+    panel = pd.DataFrame(close, index=dates, columns=list(tickers))
+    panel.iloc[:120, 0] = np.nan  # listed later
+    panel.iloc[200:205, 1] = np.nan  # missing bars
+    return panel
+
+
+def test_matches_pandas_per_ticker():
+    panel = _panel()
+    a = compute_analytics(panel, benchmark="SPY")
+    r = panel.pct_change(fill_method=None)
+    np.testing.assert_allclose(a.returns, r, equal_nan=True)
+    np.testing.assert_allclose(a.log_returns, np.log(panel / panel.shift()), equal_nan=True)
+    np.testing.assert_allclose(a.volatility, r.rolling(21).std() * np.sqrt(252), equal_nan=True, rtol=1e-6)
+    np.testing.assert_allclose(a.sma[50], panel.rolling(50).mean(), equal_nan=True, rtol=1e-9)
+    np.testing.assert_allclose(a.drawdown, panel / panel.cummax() - 1, equal_nan=True)
+
+    s = a.summary
+    np.testing.assert_allclose(s["max_drawdown"], (panel / panel.cummax() - 1).min())
+    np.testing.assert_allclose(s["ann_volatility"], r.std() * np.sqrt(252))
+    for col in panel:
+        both = r[col].notna() & r["SPY"].notna()
+        beta = np.cov(r[col][both], r["SPY"][both])[0, 1] / r["SPY"][both].var()
+        assert np.isclose(s.loc[col, "beta"], beta)
+        bars = panel[col].dropna()
+        assert np.isclose(s.loc[col, "period_return"], bars.iloc[-1] / bars.iloc[0] - 1)
+    assert np.isclose(s.loc["SPY", "beta"], 1.0)
+
+
+def test_missing_benchmark_and_empty_panel():
+    a = compute_analytics(_panel(tickers=("AAA", "BBB")), benchmark="SPY")
+    assert a.benchmark is None and a.summary["beta"].isna().all()
+    empty = compute_analytics(pd.DataFrame(columns=["AAA"]))
+    assert empty.summary.loc["AAA"].isna().all()
+
+
+def test_cache_recomputes_only_when_bars_change():
+    cache = AnalyticsCache()
+    panel = _panel()
+    first = cache.get(("k",), panel.iloc[:-1], "SPY")
+    assert cache.get(("k",), panel.iloc[:-1].copy(), "SPY") is first
+    grown = cache.get(("k",), panel, "SPY")
+    assert grown is not first and len(grown.returns) == len(panel)
+    # A re-fetched partial last day overwrites the latest close in place
+    restated = panel.copy()
+    restated.iloc[-1, 0] = 200.0
+    assert cache.get(("k",), restated, "SPY").summary.loc["AAA", "last_close"] == 200.0
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_price_analytics_loads_tickers_with_benchmark(monkeypatch):
+    panel = _panel()
+    calls = []
+    monkeypatch.setattr(data, "get_price_panel", lambda tickers, period: calls.append(tickers) or panel[tickers])
+    analytics_cache.clear()
+    out = price_analytics(["aaa", "BBB"], "1y")
+    assert calls == [["AAA", "BBB", "SPY"]] and out.benchmark == "SPY"
+    assert price_analytics(["BBB", "AAA"], "1y") is out
+
+
+def test_session_analytics_uses_loaded_bars_without_fetching(monkeypatch):
+    panel = _panel()
+    monkeypatch.setattr(data, "get_price_panel", lambda *a: (_ for _ in ()).throw(AssertionError("fetched")))
+    prices = panel[["BBB"]].rename(columns={"BBB": "Close"}).astype("float32")
+    bench = panel[["SPY"]].rename(columns={"SPY": "Close"})
+    out = session_analytics("bbb", prices, bench, "1y")
+    assert out.benchmark == "SPY" and list(out.summary.index) == ["BBB", "SPY"]
+    assert np.isclose(out.summary.loc["BBB", "beta"], compute_analytics(panel).summary.loc["BBB", "beta"], rtol=1e-3)
+    assert session_analytics("BBB", prices, bench, "1y") is out
+    assert np.isnan(session_analytics("BBB", prices, None, "1y").summary.loc["BBB", "beta"])
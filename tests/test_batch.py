@@ -0,0 +1,31 @@
+from src.batch import discover, read_manifest, run
+import io
+import shutil
+import pandas as pd
+
+def _write_inputs(tmp_path):
+    filings = tmp_path / 'filings'
+    filings.mkdir()
+    shutil.copy('data/sample_financials.csv', filings / 'aaa.csv')
+    shutil.copy('data/sample_financials.csv', filings / 'bbb.csv')
+    (filings / 'bad.csv').write_text("date,revenue\n2024-03-31,1\n")
+    news = tmp_path / 'news.csv'
+    news.write_text("date,source,headline,ticker\n"
+                    "2025-10-01,Reuters,Company beats earnings expectations,AAA\n"
+                    "2025-10-02,WSJ,Shares plunge on weak guidance,BBB\n")
+    return filings, news
+
+def test_batch_runner_writes_outputs_and_resumes(tmp_path):
+    filings, news = _write_inputs(tmp_path)
+    out = tmp_path / 'out'
+    log = io.StringIO()
+
+    counts = run(discover([str(filings)]), out, news=news, workers=1, log=log)
+    assert counts == {'ok': 2, 'failed': 1, 'skipped': 0}
+    assert (out / 'AAA' / 'summary.md').read_text().startswith('**AAA**')
+    assert pd.read_parquet(out / 'BBB' / 'sentiment.parquet')['headline'].tolist() == ['Shares plunge on weak guidance']
+    assert read_manifest(out)['BAD']['status'] == 'failed'
+
+    # Only the failed company is retried on the next run
+    counts = run(discover([str(filings / '*.csv')]), out, news=news, workers=1, log=log)
+    assert counts == {'ok': 0, 'failed': 1, 'skipped': 2}
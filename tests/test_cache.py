@@ -0,0 +1,49 @@
+from src import cache as cache_module, ratios
+from src.cache import UploadCache
+import io
+import pandas as pd
+
+def _upload():
+    return io.BytesIO(open('data/sample_financials.csv', 'rb').read())
+
+def test_upload_cache_serves_repeat_uploads_from_disk(tmp_path):
+    cache = UploadCache(root=tmp_path)
+    upload = _upload()
+    preview = cache.preview(upload, nrows=1)
+    assert len(preview) == 1 and upload.tell() == 0
+    assert cache.hits == 0 and cache.misses == 0  # previews only read the first rows
+    semicolons = io.BytesIO(_upload().getvalue().replace(b',', b';'))
+    assert list(cache.preview(semicolons, nrows=1).columns) == list(preview.columns)
+    cache.load(_upload())
+    fin_df, ratio_df = cache.load(_upload())
+    assert cache.hits == 1 and cache.misses == 1
+    # Once cached, the preview comes from the parsed entry
+    pd.testing.assert_frame_equal(cache.preview(_upload(), nrows=1), fin_df.head(1))
+    fresh, _ = UploadCache(root=tmp_path).load(_upload())
+    pd.testing.assert_frame_equal(fresh, fin_df)
+    assert 'roe' in ratio_df.columns
+
+def test_upload_cache_evicts_least_recently_used(tmp_path):
+    cache = UploadCache(root=tmp_path, max_bytes=1)
+    cache.load(_upload())
+    assert cache.evictions == 1 and cache.stats()['entries'] == 0
+
+def test_upload_digest_is_memoized_and_registry_changes_miss(tmp_path, monkeypatch):
+    cache = UploadCache(root=tmp_path)
+    upload, digests = _upload(), {}
+    upload.file_id = 'f1'
+    cache.load(upload, digests)
+    hashed = []
+    monkeypatch.setattr(cache_module.hashlib, 'sha256', lambda: hashed.append(1))
+    cache.load(upload, digests)
+    assert hashed == [] and cache.hits == 1
+    monkeypatch.undo()
+
+    ratios.register_ratio('cogs_to_sales', 'cogs', 'revenue')
+    try:
+        upload.seek(0)
+        _, ratio_df = cache.load(upload, digests)
+        assert cache.misses == 2 and 'cogs_to_sales' in ratio_df.columns
+    finally:
+        ratios.unregister_ratio('cogs_to_sales')
+    assert 'cogs_to_sales' not in cache.load(upload, digests)[1].columns
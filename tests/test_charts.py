@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from src.charts import MAX_POINT_BUDGET, POINT_BUDGET, ChartCache, point_budget, downsample, line_figure, lttb, minmax, scatter_figure, zoom
+import src.charts as charts
+
+
+def _series(n=20_000):
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(size=n))
+    y[12_345] += 500  # a spike that must survive downsampling
+    return pd.DataFrame({"Date": pd.date_range("2000-01-01", periods=n, freq="D"), "Close": y})
+
+
+def test_lttb_and_minmax_keep_shape():
+    df = _series()
+    x, y = np.arange(len(df), dtype=float), df["Close"].to_numpy()
+    idx = lttb(x, y, 500)
+    assert len(idx) == 500 and idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.all(np.diff(idx) > 0) and 12_345 in idx
+
+    idx = minmax(y, 500)
+    assert len(idx) <= 502 and y.argmax() in idx and y.argmin() in idx
+    assert np.array_equal(lttb(x[:10], y[:10], 50), np.arange(10))
+
+
+def test_downsample_cache_zoom_and_webgl(monkeypatch):
+    monkeypatch.setattr(charts, "chart_cache", ChartCache())
+    df = _series()
+    df.loc[5, "Close"] = np.nan
+    small = downsample(df, "Date", "Close", budget=800, key=("AAA", "5y"))
+    assert len(small) == 800 and small["Close"].notna().all()
+    downsample(df, "Date", "Close", budget=800, key=("AAA", "5y"))
+    assert (charts.chart_cache.hits, charts.chart_cache.misses) == (1, 1)
+    # A new bar changes the fingerprint, so the entry is rebuilt
+    grown = pd.concat([df, df.tail(1).assign(Date=df["Date"].iloc[-1] + pd.Timedelta(days=1))])
+    downsample(grown, "Date", "Close", budget=800, key=("AAA", "5y"))
+    assert charts.chart_cache.misses == 2
+    # So does a restated value on the same dates
+    restated = df.assign(Close=df["Close"] * 2)
+    assert downsample(restated, "Date", "Close", budget=800, key=("AAA", "5y"))["Close"].max() == small["Close"].max() * 2
+    assert charts.chart_cache.misses == 3
+
+    window = zoom(df, "Date", "2010-01-01", "2010-12-31")
+    assert len(window) == 365 and window["Date"].iloc[-1] == pd.Timestamp("2010-12-31")
+
+    fig = line_figure(df, "Date", "Close", "t", budget=1200)
+    assert fig.data[0].type == "scattergl" and len(fig.data[0].x) == 1200
+    assert line_figure(window, "Date", "Close", "t").data[0].type == "scatter"
+    df["headline"] = "h"
+    fig = scatter_figure(df, "Date", "Close", "t", hover=["headline"], budget=300)
+    assert fig.data[0].type == "scattergl" and fig.data[0].customdata.shape[1] == 1
+
+
+def test_default_budget_downsamples_the_longest_price_period():
+    five_years = pd.DataFrame({"Date": pd.bdate_range("2020-01-01", periods=5 * 252)})
+    five_years["Close"] = np.linspace(100, 200, len(five_years))
+    assert len(five_years) > POINT_BUDGET
+    trace = line_figure(five_years, "Date", "Close", "t").data[0]
+    assert len(trace.x) == POINT_BUDGET and trace.type == "scattergl"
+    # Longer visible ranges get more points, up to a cap
+    assert point_budget(100) == POINT_BUDGET and point_budget(4000) == 1000
+    assert point_budget(10**6) == MAX_POINT_BUDGET
+    assert len(downsample(_series(), "Date", "Close")) == point_budget(20_000)
@@ -0,0 +1,21 @@
+from src.data import REQUIRED_COLUMNS, load_uploaded_csv, normalize_column
+import io
+import pytest
+
+HEADER = "Date;Revenue;COGS;Operating Income;Net Income;Current Assets;Current Liabilities;" \
+         "Total Assets;Total Liabilities;Shareholders Equity;Inventory;Notes\n"
+
+def test_load_uploaded_csv_streams_required_columns():
+    body = "2024-06-30;110;65;27;21;52;26;205;82;123;11;late\n" \
+           "2024-03-31;100;60;25;20;50;25;200;80;120;10;\n"
+    df = load_uploaded_csv(io.BytesIO((HEADER + body).encode()))
+    assert list(df.columns) == REQUIRED_COLUMNS
+    assert str(df['revenue'].dtype) == 'float64'
+    assert df['revenue'].tolist() == [100.0, 110.0]
+
+def test_load_uploaded_csv_rejects_bad_header():
+    with pytest.raises(ValueError, match="Missing required columns"):
+        load_uploaded_csv(io.BytesIO(b"date,revenue\n2024-03-31,100\n"))
+
+def test_normalize_column():
+    assert [normalize_column(c) for c in ["\ufeffTicker", " Net Income ", "ROE"]] == ["ticker", "net_income", "roe"]
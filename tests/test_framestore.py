@@ -0,0 +1,88 @@
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.framestore as framestore
+from src.framestore import FrameRef, FrameStore, compact, content_key, resolve, share
+from src.summary import generate_summary
+
+
+def _news(n=1_000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=n, freq="h"),
+        "source": rng.choice(["Reuters", "Bloomberg", "WSJ"], n),
+        "headline": [f"headline {i}" for i in range(n)],
+        "compound": rng.uniform(-1, 1, n),
+        "revenue": rng.uniform(1e9, 5e9, n),
+    })
+
+
+def test_compact_downcasts_only_where_safe():
+    df = _news()
+    out = compact(df)
+    assert out["compound"].dtype == np.float32
+    assert out["revenue"].dtype == np.float64  # too large for exact float32
+    assert isinstance(out["source"].dtype, pd.CategoricalDtype)
+    assert not isinstance(out["headline"].dtype, pd.CategoricalDtype)  # all distinct
+    assert out["source"].astype(str).tolist() == df["source"].tolist()
+    np.testing.assert_allclose(out["compound"], df["compound"], rtol=1e-6)
+    assert out.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+
+def test_equal_frames_share_one_copy():
+    store = FrameStore()
+    a, b = store.put(_news()), store.put(_news())
+    assert a.key == b.key == content_key(_news())
+    assert len(store) == 1 and store.refcount(a.key) == 2
+    assert (store.hits, store.misses) == (1, 1)
+    assert store.put(_news().iloc[:-1]).key != a.key
+
+
+def test_views_are_copy_on_write():
+    store = FrameStore()
+    ref = store.put(_news())
+    view = ref.get()
+    view.loc[0, "compound"] = 99.0
+    view["extra"] = 1
+    fresh = ref.get()
+    assert fresh.loc[0, "compound"] != 99.0 and "extra" not in fresh.columns
+
+
+def test_views_are_deep_copies_without_copy_on_write(monkeypatch):
+    monkeypatch.setattr(framestore, "COPY_ON_WRITE", False)
+    ref = FrameStore().put(_news())
+    a, b = ref.get(), ref.get()
+    assert not np.shares_memory(a["compound"].to_numpy(), b["compound"].to_numpy())
+
+
+def test_unreferenced_frames_are_evicted():
+    store = FrameStore(max_bytes=0)
+    ref = store.put(_news())
+    key = ref.key
+    assert key in store  # pinned while referenced
+    del ref
+    gc.collect()
+    assert store.refcount(key) == 0 and key not in store
+    assert store.evictions == 1
+    with pytest.raises(KeyError):
+        store.get(key)
+
+
+def test_share_and_resolve_pass_plain_values_through():
+    df = _news(10)
+    ref = share(df, FrameStore())
+    assert isinstance(ref, FrameRef)
+    assert resolve(ref).shape == df.shape
+    assert resolve(df) is df and share(None) is None and resolve(None) is None
+
+
+def test_summary_of_compacted_ratios_matches():
+    ratios = pd.DataFrame({"date": pd.date_range("2023-03-31", periods=4, freq="QE"),
+                           "gross_margin": [0.41, 0.42, 0.43, 0.45], "operating_margin": [0.2] * 4,
+                           "net_margin": [0.1, 0.11, 0.12, 0.15], "current_ratio": [1.2, 1.3, 1.1, 1.5],
+                           "debt_to_equity": [0.8, 0.7, 0.6, 0.5], "roe": [0.15] * 4})
+    assert (generate_summary(compact(ratios), None, "ACME", "USD")
+            == generate_summary(ratios, None, "ACME", "USD"))
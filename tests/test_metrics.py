@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from src.metrics import append_metrics, compute_metrics
+
+
+def _panel():
+    rows = []
+    for ticker, n, base in (("BBB", 6, 50.0), ("AAA", 9, 100.0)):
+        for q in range(n):
+            rows.append({"ticker": ticker, "date": pd.Timestamp("2022-03-31") + pd.offsets.QuarterEnd(q),
+                         "revenue": base + 10 * q, "net_income": (q - 2) * 5.0,
+                         "net_margin": 0.1 + 0.01 * q, "roe": 0.2 - 0.02 * (q % 3)})
+    return pd.DataFrame(rows)
+
+
+def test_metrics_match_groupwise_pandas():
+    panel = _panel()
+    m = compute_metrics(panel)
+    assert list(m["ticker"]) == ["AAA"] * 9 + ["BBB"] * 6
+
+    g = panel.sort_values(["ticker", "date"]).groupby("ticker")
+    ref = {
+        "revenue_ttm": g["revenue"].rolling(4).sum(),
+        "roe_mean4q": g["roe"].rolling(4).mean(),
+        "roe_std4q": g["roe"].rolling(4).std(),
+    }
+    for col, expected in ref.items():
+        np.testing.assert_allclose(m[col], expected.reset_index(level=0, drop=True).loc[m.index])
+    np.testing.assert_allclose(m["revenue_yoy"], g["revenue"].pct_change(4).loc[m.index])
+
+    aaa = m[m["ticker"] == "AAA"]
+    np.testing.assert_allclose(aaa["net_margin_slope4q"].iloc[3:], 0.01)
+    assert aaa["revenue_ttm"].iloc[:3].isna().all()
+    # -5 -> 0 -> 5: growth is measured against |base|, and a zero base gives NaN
+    assert aaa["net_income_qoq"].iloc[2] == 1.0 and np.isnan(aaa["net_income_qoq"].iloc[3])
+
+
+def test_append_matches_full_recompute():
+    panel = _panel()
+    full = compute_metrics(panel)
+    new = panel.groupby("ticker").tail(1)
+    pd.testing.assert_frame_equal(append_metrics(compute_metrics(panel.drop(new.index)), new), full)
+
+    # Restated quarters replace the old rows and fall back to a full recompute
+    restated = new.assign(date=new["date"] - pd.offsets.QuarterEnd(1), revenue=new["revenue"] * 2)
+    out = append_metrics(full, restated)
+    assert len(out) == len(full)
+    assert not out.duplicated(["ticker", "date"]).any()
+    expected = panel.set_index(["ticker", "date"])
+    expected.loc[list(zip(restated["ticker"], restated["date"])), "revenue"] = restated["revenue"].to_numpy()
+    ref = compute_metrics(expected.reset_index())
+    np.testing.assert_allclose(out["revenue"], ref["revenue"])
+    np.testing.assert_allclose(out["revenue_ttm"], ref["revenue_ttm"], equal_nan=True)
+    np.testing.assert_allclose(out["revenue_yoy"], ref["revenue_yoy"], equal_nan=True)
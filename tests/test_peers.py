@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+
+from src.peers import PeerIndex, build_peer_index, peer_index
+
+
+def _panel():
+    rows = []
+    for i, ticker in enumerate(["AAA", "BBB", "CCC", "DDD"]):
+        for q, date in enumerate(["2024-03-31", "2024-06-28", "2024-06-30"]):
+            rows.append({"ticker": ticker, "date": pd.Timestamp(date), "roe": 0.1 * i + q, "net_margin": 0.5 - 0.1 * i})
+    return pd.DataFrame(rows)
+
+
+def test_percentiles_groups_and_queries(tmp_path):
+    index = build_peer_index(_panel(), groups={"AAA": "Tech", "BBB": "Tech", "CCC": "Energy"})
+    # Two reports in 2024Q2 collapse to the latest one
+    assert len(index.ranks) == 8 and index.periods() == ["2024Q1", "2024Q2"]
+
+    q = index.query("DDD", "roe")
+    assert q["period"] == "2024Q2" and q["group"] == "All" and q["value"] == 2.3
+    assert q["pct"] == 1.0 and q["group_pct"] == 1.0 and q["universe_count"] == 4
+    q = index.query("AAA", "net_margin", period="2024Q1")
+    assert q["pct"] == 1.0 and q["group_pct"] == 1.0 and q["group_median"] == 0.45
+    assert np.isclose(q["universe_median"], 0.35)
+
+    # A company outside the universe is placed by value
+    q = index.query("NEW", "roe", period="2024Q1", value=0.15)
+    assert q["pct"] == 0.5 and np.isnan(q["group_pct"])
+    # No value (e.g. no inventory for inventory_turnover) is no percentile, not the top one
+    assert np.isnan(index.query("NEW", "roe", period="2024Q1", value=np.nan)["pct"])
+
+    assert peer_index(tmp_path) is None
+    index.save(tmp_path)
+    loaded = peer_index(tmp_path)
+    assert isinstance(loaded, PeerIndex) and loaded is peer_index(tmp_path)
+    pd.testing.assert_frame_equal(loaded.history("BBB", "roe"), index.history("BBB", "roe"))
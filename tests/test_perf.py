@@ -0,0 +1,45 @@
+import threading
+import tracemalloc
+
+from src.perf import Trace, annotate, span
+
+def test_spans_record_only_inside_a_trace():
+    with span("outside") as s:
+        annotate(rows=1)
+        s.set(cache="hit")
+
+    with Trace("test") as trace:
+        with span("parse", source="sample"):
+            buf = [0] * 100_000
+            annotate(rows=len(buf), cache="miss")
+    rec, = trace.records()
+    assert rec["span"] == "parse" and rec["rows"] == 100_000 and rec["cache"] == "miss"
+    assert rec["seconds"] >= 0 and rec["peak_mb"] > 0.5
+
+def test_concurrent_traces_share_tracemalloc():
+    entered, release = threading.Barrier(2), threading.Event()
+    records = {}
+
+    def session(name):
+        with Trace(name) as trace:
+            with span(name):
+                entered.wait()
+                release.wait()
+        records[name] = trace.records()[0]
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in ("a", "b")]
+    for t in threads:
+        t.start()
+    release.set()
+    for t in threads:
+        t.join()
+    # Overlapping spans report no peak rather than each other's
+    assert "peak_mb" not in records["a"] and "peak_mb" not in records["b"]
+    assert not tracemalloc.is_tracing()
+
+    # One trace closing leaves tracing on for the one still open
+    with Trace("outer"):
+        with Trace("inner"):
+            pass
+        assert tracemalloc.is_tracing()
+    assert not tracemalloc.is_tracing()
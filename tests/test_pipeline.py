@@ -0,0 +1,46 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import src.pipeline as pipeline
+from src.perf import Trace, span
+from src.pipeline import run_stages
+
+
+def test_stages_yield_in_completion_order_and_time_out():
+    def slow():
+        time.sleep(0.3)
+        return "slow"
+
+    def fast():
+        with span("fast"):
+            return "fast"
+
+    def broken():
+        raise ValueError("boom")
+
+    def hung():
+        time.sleep(2)
+
+    with Trace("test", memory=False) as trace:
+        results = list(run_stages({"slow": slow, "fast": fast, "broken": broken, "hung": hung},
+                                  timeouts={"hung": 0.5}))
+    order = [r.name for r in results]
+    assert set(order[:2]) == {"fast", "broken"} and order[2:] == ["slow", "hung"]
+    by_name = {r.name: r for r in results}
+    assert by_name["fast"].value == "fast" and by_name["slow"].ok
+    assert isinstance(by_name["broken"].error, ValueError) and not by_name["broken"].ok
+    assert by_name["hung"].timed_out and by_name["hung"].seconds < 1.5
+    # spans opened on worker threads land in the caller's trace
+    assert [r["span"] for r in trace.records()] == ["fast"]
+
+
+def test_deadline_starts_when_stage_runs_and_cpu_stages_skip_the_io_queue(monkeypatch):
+    monkeypatch.setattr(pipeline, "_io_executor", ThreadPoolExecutor(max_workers=1))
+    results = {r.name: r for r in run_stages(
+        {"first": lambda: time.sleep(0.4), "queued": lambda: time.sleep(0.2), "compute_ratios": lambda: "ratios"},
+        timeouts={"first": 0.6, "queued": 0.5, "compute_ratios": 0.1})}
+    # "queued" waited 0.4s for the single I/O worker; only its 0.2s of running counts
+    assert results["queued"].ok and results["first"].ok
+    # ... and its reported seconds are its own run time, not time since the start
+    assert 0.15 < results["queued"].seconds < 0.35 and results["compute_ratios"].seconds < 0.1
+    assert results["compute_ratios"].value == "ratios"
@@ -0,0 +1,118 @@
+from src.prices import CsvFetcher, PriceStore, normalize_bars
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+def _fixture_dir(tmp_path):
+    tmp_path.mkdir()
+    dates = pd.bdate_range('2019-01-01', '2024-06-28')
+    bars = pd.DataFrame({'Open': np.arange(len(dates), dtype=float), 'Close': np.arange(len(dates), dtype=float) + 0.5,
+                         'Volume': 1000}, index=pd.Index(dates, name='Date'))
+    bars.to_csv(tmp_path / 'AAPL.csv')
+    return tmp_path
+
+class RecordingFetcher(CsvFetcher):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = []
+
+    def fetch(self, ticker, start, end=None):
+        self.calls.append((ticker, start, end))
+        return super().fetch(ticker, start, end)
+
+def test_price_store_slices_and_appends_incrementally(tmp_path):
+    fetcher = RecordingFetcher(_fixture_dir(tmp_path / 'fixtures'))
+    now = [datetime(2024, 6, 1, 12)]
+    store = PriceStore(root=tmp_path / 'store', fetcher=fetcher, ttl=timedelta(hours=6), clock=lambda: now[0])
+
+    one_year = store.history('AAPL', '1y')
+    assert one_year.index.min() >= pd.Timestamp('2023-06-01')
+    assert one_year['Close'].notna().all()
+    csv = pd.read_csv(tmp_path / 'fixtures' / 'AAPL.csv', index_col=0, parse_dates=True)
+    np.testing.assert_array_equal(one_year['Close'].to_numpy(), csv.loc[one_year.index, 'Close'].to_numpy())
+    assert store.history('AAPL', '6mo').index.min() >= pd.Timestamp('2023-12-01')
+    assert len(fetcher.calls) == 1
+
+    # Longer period only pulls the missing older range
+    five_years = store.history('AAPL', '5y')
+    assert fetcher.calls[-1][2] == pd.Timestamp('2023-06-01')
+    assert five_years.index.min() < pd.Timestamp('2019-07-01')
+
+    # Once stale, only bars from the last stored one onward are fetched
+    now[0] = datetime(2024, 6, 30, 12)
+    refreshed = store.history('AAPL', '1y')
+    assert fetcher.calls[-1][1] == one_year.index.max()
+    assert refreshed.index.max() == pd.Timestamp('2024-06-28')
+    assert len(fetcher.calls) == 3
+
+def test_failed_refresh_backs_off_before_retrying(tmp_path):
+    fetcher = RecordingFetcher(_fixture_dir(tmp_path / 'fixtures'))
+    now = [datetime(2024, 6, 1, 12)]
+    store = PriceStore(root=tmp_path / 'store', fetcher=fetcher, ttl=timedelta(hours=6),
+                       retry_after=timedelta(minutes=15), clock=lambda: now[0])
+    stored = store.history('AAPL', '1y')
+
+    def down(ticker, start, end=None):
+        fetcher.calls.append((ticker, start, end))
+        raise ConnectionError("provider down")
+
+    fetcher.fetch = down
+    now[0] += timedelta(hours=7)
+    pd.testing.assert_frame_equal(store.history('AAPL', '1y'), stored)
+    now[0] += timedelta(minutes=5)
+    store.history('AAPL', '1y')
+    assert len(fetcher.calls) == 2  # the second stale read served the bars without a fetch
+    now[0] += timedelta(minutes=15)
+    store.history('AAPL', '1y')
+    assert len(fetcher.calls) == 3
+    assert sorted(p.name for p in (tmp_path / 'store').iterdir()) == ['AAPL.json', 'AAPL.parquet']
+
+class BatchStub:
+    def __init__(self, directory, flaky=1):
+        self.csv = CsvFetcher(directory)
+        self.batches = []
+        self.flaky = flaky
+
+    def fetch(self, ticker, start, end=None):
+        raise AssertionError("batch fetcher should not fall back to single fetches")
+
+    def fetch_many(self, tickers, start, end=None):
+        if self.flaky:
+            self.flaky -= 1
+            raise ConnectionError("rate limited")
+        self.batches.append(list(tickers))
+        return {t: self.csv.fetch(t, start, end) for t in tickers}
+
+def test_close_panel_batches_tickers_and_retries(tmp_path):
+    fixtures = _fixture_dir(tmp_path / 'fixtures')
+    (fixtures / 'AAPL.csv').rename(fixtures / 'MSFT.csv')
+    _fixture_dir(tmp_path / 'more')
+    (tmp_path / 'more' / 'AAPL.csv').rename(fixtures / 'AAPL.csv')
+    fetcher = BatchStub(fixtures)
+    store = PriceStore(root=tmp_path / 'store', fetcher=fetcher, clock=lambda: datetime(2024, 6, 1))
+
+    panel = store.close_panel(['aapl', 'MSFT', 'NOPE'], '6mo', batch_size=2, min_interval=0, backoff=0)
+    assert list(panel.columns) == ['AAPL', 'MSFT', 'NOPE']
+    assert sorted(map(len, fetcher.batches)) == [1, 2]
+    assert panel['NOPE'].isna().all() and panel['AAPL'].notna().all()
+    assert panel.index.min() >= pd.Timestamp('2023-12-01')
+
+def test_normalize_bars_picks_the_ticker_from_a_batch_frame():
+    dates = pd.bdate_range('2024-01-01', periods=3)
+    batch = pd.DataFrame({('Close', 'AAPL'): [1.0, 2.0, 3.0], ('Close', 'MSFT'): [10.0, 20.0, 30.0],
+                          ('Volume', 'AAPL'): 5, ('Volume', 'MSFT'): 7}, index=dates)
+    assert normalize_bars(batch, 'MSFT')['Close'].tolist() == [10.0, 20.0, 30.0]
+    by_ticker = batch.swaplevel(axis=1)
+    assert normalize_bars(by_ticker, 'MSFT')['Volume'].tolist() == [7, 7, 7]
+    # A ticker missing from the batch must not pick up another ticker's bars
+    assert normalize_bars(batch, 'NOPE').empty
+
+def test_waiting_on_a_stuck_refresh_times_out(tmp_path):
+    store = PriceStore(root=tmp_path / 'store', fetcher=CsvFetcher(_fixture_dir(tmp_path / 'fixtures')),
+                       clock=lambda: datetime(2024, 6, 1), lock_timeout=0.05)
+    store._ticker_lock('AAPL').acquire()  # a refresh that never finishes
+    with pytest.raises(TimeoutError):
+        store.history('AAPL', '1y')
+    store._ticker_lock('AAPL').release()
+    assert not store.history('AAPL', '1y').empty
@@ -1,4 +1,5 @@
-from src.ratios import compute_ratios
+from src.ratios import compute_ratios, compute_ratios_panel
+import numpy as np
 import pandas as pd
 
 def test_compute_ratios_basic():
@@ -22,3 +23,68 @@ def test_compute_ratios_basic():
     assert round(row['net_margin'],2) == 0.20
     assert round(row['current_ratio'],2) == 2.00
     assert round(row['debt_to_equity'],2) == 0.67
+
+def test_compute_ratios_panel_matches_single_company():
+    base = {
+        'revenue':100, 'cogs':60, 'operating_income':25, 'net_income':20,
+        'current_assets':50, 'current_liabilities':25, 'total_assets':200,
+        'total_liabilities':80, 'shareholders_equity':120, 'inventory':10
+    }
+    frames = {
+        'AAA': pd.DataFrame([dict(base, date='2024-03-31'), dict(base, date='2024-06-30', revenue=0)]),
+        'BBB': pd.DataFrame([dict(base, date='2024-03-31', inventory=0, shareholders_equity=0)]),
+    }
+    panel = compute_ratios_panel(frames)
+    for ticker, df in frames.items():
+        got = panel[panel['ticker'] == ticker].drop(columns='ticker').reset_index(drop=True)
+        pd.testing.assert_frame_equal(got, compute_ratios(df))
+
+    small = compute_ratios_panel(frames, dtype=np.float32)
+    assert small['roe'].dtype == np.float32
+    assert np.isnan(small['gross_margin'].iloc[1])
+
+def test_registered_ratios_share_subexpressions():
+    from src import ratios
+    import pytest
+
+    df = pd.DataFrame({
+        'date': ['2024-03-31', '2024-06-30'], 'revenue': [100.0, 0.0], 'cogs': [60.0, 10.0],
+        'operating_income': [25.0, 5.0], 'net_income': [20.0, 4.0], 'current_assets': [50.0, 40.0],
+        'current_liabilities': [25.0, 0.0], 'total_assets': [200.0, 100.0], 'total_liabilities': [80.0, 50.0],
+        'shareholders_equity': [120.0, 50.0], 'cash': [30.0, 0.0],
+    })
+    before = compute_ratios(df)
+    ratios.register_ratio('cash_ratio', 'cash', 'current_liabilities')
+    ratios.register_ratio('gross_to_cash', 'revenue - cogs', 'cash')
+    ratios.register_denominator('avg_assets', '0.5 * (total_assets + total_liabilities)')
+    ratios.register_ratio('roaa', 'net_income', 'avg_assets')
+    try:
+        plan = ratios._plan()
+        # 'revenue - cogs' and the 0.5 * (...) average are each evaluated once
+        assert len(plan.steps) == 4 and plan.lines.count('revenue') == 1
+        out = compute_ratios(df)
+        pd.testing.assert_frame_equal(out[before.columns], before)
+        assert out['cash_ratio'].iloc[0] == 1.2 and np.isnan(out['cash_ratio'].iloc[1])
+        assert out['gross_to_cash'].iloc[0] == 40 / 30 and np.isnan(out['gross_to_cash'].iloc[1])
+        assert out['roaa'].iloc[0] == 20 / 140
+        with pytest.raises(ValueError):
+            ratios.register_ratio('cash_ratio', 'cash', 'revenue')
+        with pytest.raises(ValueError):
+            ratios.register_ratio('bad', 'cash / revenue', 'revenue')
+        with pytest.raises(ValueError):
+            ratios.register_ratio('bad', 'cash', 'cash flow')
+        # A frame without a user ratio's line gets NaN for it; built-in lines stay required
+        no_cash = compute_ratios(df.drop(columns='cash'))
+        assert no_cash[['cash_ratio', 'gross_to_cash']].isna().all().all()
+        pd.testing.assert_frame_equal(no_cash[before.columns], before)
+        with pytest.raises(KeyError):
+            compute_ratios(df.drop(columns='cogs'))
+    finally:
+        for name in ('cash_ratio', 'gross_to_cash', 'roaa'):
+            ratios.unregister_ratio(name)
+        ratios.unregister_denominator('avg_assets')
+    assert ratios.ratio_names() == ratios.RATIO_COLUMNS
+    assert 'avg_assets' not in ratios._DENOMINATORS
+    # A missing inventory line counts as zero, consistently across ratios
+    assert compute_ratios(df)['quick_ratio'].iloc[0] == 2.0
+    assert np.isnan(compute_ratios(df)['inventory_turnover']).all()
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+from src.rollups import HALF_LIFE_DAYS, SentimentRollups, TickerRollup, forward_correlations
+from src.summary import generate_summary
+
+
+def _news(n=3_000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 400 * 24, n), unit="h"),
+        "source": rng.choice(["Reuters", "WSJ"], n),
+        "headline": [f"headline {i % 500}" for i in range(n)],
+        "compound": rng.uniform(-1, 1, n),
+    })
+    return df.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def test_daily_and_weekly_match_raw_aggregates():
+    news = _news()
+    rollup = TickerRollup()
+    assert rollup.ingest(news) == len(news)
+    day = news["date"].dt.normalize()
+    daily = rollup.daily()
+    ref = news.groupby(day)["compound"].agg(["count", "mean", "min", "max"])
+    np.testing.assert_allclose(daily[["count", "mean", "min", "max"]].to_numpy(), ref.to_numpy())
+
+    weekly = rollup.weekly()
+    ref = news.groupby(news["date"].dt.to_period("W"))["compound"].agg(["count", "mean", "min", "max"])
+    np.testing.assert_allclose(weekly[["count", "mean", "min", "max"]].to_numpy(), ref.to_numpy())
+
+    for i in (0, len(daily) // 2, len(daily) - 1):
+        asof = daily["date"].iloc[i]
+        seen = news[day <= asof]
+        w = 0.5 ** ((asof - seen["date"].dt.normalize()).dt.days / HALF_LIFE_DAYS)
+        assert np.isclose(daily["decayed"].iloc[i], (w * seen["compound"]).sum() / w.sum())
+    assert np.isclose(rollup.score(), daily["decayed"].iloc[-1])
+
+
+def test_incremental_ingest_matches_one_pass():
+    news = _news(seed=1)
+    full = TickerRollup()
+    full.ingest(news)
+    step = TickerRollup()
+    # Growing frames, including out-of-order (older) headlines arriving late
+    order = np.random.default_rng(2).permutation(len(news))
+    for upto in (500, 1_200, 2_000, len(news)):
+        added = step.ingest(news.iloc[np.sort(order[:upto])])
+        assert added > 0
+    assert step.ingest(news) == 0
+    pd.testing.assert_frame_equal(step.daily(), full.daily(), rtol=1e-12)
+    pd.testing.assert_frame_equal(step.weekly(), full.weekly(), rtol=1e-12)
+
+
+def test_duplicate_rows_tokens_and_rewrites():
+    news = _news(200)
+    doubled = pd.concat([news, news.iloc[:10]], ignore_index=True)
+    rollup = TickerRollup()
+    assert rollup.ingest(doubled, token="v1") == 210
+    # Same token: skipped, even though this frame alone would otherwise force a rebuild
+    assert rollup.ingest(news.iloc[:5], token="v1") == 0
+    assert int(rollup.daily()["count"].sum()) == 210
+    # Rows disappearing means the source was rewritten: rebuild from the new frame
+    assert rollup.ingest(news.iloc[50:], token="v2") == 150
+    assert int(rollup.daily()["count"].sum()) == 150
+
+
+def _one_pass(news):
+    rollup = TickerRollup()
+    rollup.ingest(news)
+    return rollup.daily()
+
+
+def test_sessions_with_different_snapshots_keep_their_own_rollups():
+    news = _news(400)
+    rollups = SentimentRollups()
+    old = rollups.ingest("abc", news.iloc[:300], token="a")
+    new = rollups.ingest("ABC", news, token="b")
+    assert new is not old and rollups.get("abc") is new
+    pd.testing.assert_frame_equal(new.daily(), _one_pass(news), rtol=1e-12)  # forked, then topped up
+    # Revisiting either snapshot neither rebuilds nor touches the other
+    versions = (old.version, new.version)
+    for _ in range(2):
+        assert rollups.ingest("abc", news.iloc[:300], token="a") is old
+        assert rollups.ingest("abc", news, token="b") is new
+    assert (old.version, new.version) == versions
+    assert int(old.daily()["count"].sum()) == 300 and int(new.daily()["count"].sum()) == 400
+    assert rollups.get("abc", "a").score() != rollups.get("abc", "b").score()
+
+
+def test_align_is_as_of_and_correlations_use_forward_returns():
+    dates = pd.bdate_range("2024-01-01", periods=60, name="Date")
+    prices = pd.DataFrame({"Close": 100 + np.arange(60.0)}, index=dates)
+    news = pd.DataFrame({"date": [dates[2], dates[2] + pd.Timedelta(hours=5), dates[10]],
+                         "source": "X", "headline": ["a", "b", "c"], "compound": [0.5, -0.1, 0.9]})
+    rollups = SentimentRollups()
+    rollups.ingest("abc", news)
+    aligned, corr = rollups.join_prices("ABC", prices)
+    assert np.isnan(aligned["sentiment"].iloc[0])
+    assert aligned["news_count"].iloc[2] == 2 and aligned["news_count"].iloc[3] == 0
+    assert np.isclose(aligned["sentiment"].iloc[5], 0.2) and aligned["news_age_days"].iloc[5] == 5  # Wed -> Mon
+    assert np.isclose(aligned["fwd_5d"].iloc[0], 105 / 100 - 1) and aligned["fwd_5d"].iloc[-5:].isna().all()
+    assert list(corr.index) == [1, 5, 20]
+    assert rollups.join_prices("ABC", prices)[1] is corr  # cached until news or prices change
+
+    scores = np.sin(np.arange(300) / 7.0)
+    synthetic = pd.DataFrame({"sentiment": scores, "news_count": 1, "fwd_1d": scores * 0.01})
+    assert np.isclose(forward_correlations(synthetic, horizons=(1,)).loc[1, "corr"], 1.0)
+
+
+def test_summary_reads_rollup_score():
+    ratios = pd.DataFrame({"date": pd.date_range("2024-03-31", periods=2, freq="QE"), "gross_margin": [0.4, 0.4],
+                           "operating_margin": 0.2, "net_margin": 0.1, "current_ratio": 1.5,
+                           "debt_to_equity": 0.5, "roe": 0.1})
+    news = pd.DataFrame({"compound": [0.9] * 30})
+    assert "**positive** (avg VADER 0.90)" in generate_summary(ratios, news, "ACME", "USD")
+    decayed = generate_summary(ratios, news, "ACME", "USD", sentiment_score=-0.4)
+    assert "**negative** (decayed VADER score -0.40)" in decayed
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.screener import Screener, parse_query
+
+
+def _ratios(n=200, seed=0, date="2024-03-31"):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "ticker": [f"t{i:03d}" for i in range(n)],
+        "date": pd.Timestamp(date),
+        "current_ratio": rng.uniform(0, 3, n),
+        "debt_to_equity": rng.uniform(0, 2, n),
+        "roe": np.where(rng.random(n) < 0.1, np.nan, rng.normal(0.1, 0.1, n)),
+    })
+
+
+def _brute(latest, top_roe):
+    roe = latest["roe"].dropna().sort_values()
+    cut = roe.iloc[len(roe) - int(np.ceil(len(roe) * top_roe))]
+    hit = (latest["current_ratio"] > 1.5) & (latest["debt_to_equity"] < 0.8) & (latest["roe"] >= cut)
+    return sorted(latest.loc[hit, "ticker"].str.upper())
+
+
+def test_parse_query():
+    assert parse_query("current_ratio >= 1.5 and NET_MARGIN < 15% AND roe in top 5%") == [
+        ("cmp", "current_ratio", "ge", 1.5), ("cmp", "net_margin", "lt", 0.15), ("rank", "roe", "top", 0.05)]
+    for bad in ("roe >> 1", "foo > 1", "roe in top 0%"):
+        with pytest.raises(ValueError):
+            parse_query(bad)
+
+
+def test_registered_ratios_can_be_screened():
+    from src import ratios
+
+    ratios.register_ratio("cash_ratio", "cash", "current_liabilities")
+    try:
+        assert parse_query("cash_ratio > 1") == [("cmp", "cash_ratio", "gt", 1.0)]
+        base = _ratios(n=10).assign(cash_ratio=np.arange(10) / 4)
+        assert "cash_ratio" in Screener(base).columns
+        assert len(Screener(base).screen("cash_ratio > 1")) == 5
+    finally:
+        ratios.unregister_ratio("cash_ratio")
+    with pytest.raises(ValueError):
+        parse_query("cash_ratio > 1")
+
+
+def test_screen_matches_brute_force_and_updates_incrementally():
+    base = _ratios()
+    screener = Screener(base)
+    query = "current_ratio > 1.5 AND debt_to_equity < 0.8 AND roe in top quartile"
+    assert list(screener.screen(query)["ticker"]) == _brute(base, 0.25)
+
+    # New quarter for some tickers, a new ticker, and a restated old quarter
+    newer = _ratios(60, seed=1, date="2024-06-30")
+    newer.loc[0, "ticker"] = "NEW"
+    restated = _ratios(5, seed=2, date="2023-12-31")
+    screener.update(pd.concat([newer, restated]))
+
+    latest = pd.concat([base, newer]).assign(ticker=lambda d: d["ticker"].str.upper())
+    latest = latest.sort_values("date").groupby("ticker").tail(1)
+    assert len(screener) == 201
+    assert list(screener.screen(query)["ticker"]) == _brute(latest, 0.25)
+    assert len(screener.ticker_history("T001")) == 3
+
+    # Restating a known quarter replaces it in the history
+    again = restated.iloc[[1]].assign(roe=0.5)
+    screener.update(again)
+    history = screener.ticker_history("T001")
+    assert len(history) == 3 and history.loc[history["date"] == "2023-12-31", "roe"].item() == np.float32(0.5)
+    assert screener.screen("roe in bottom half", limit=3).shape[0] == 3
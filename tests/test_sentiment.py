@@ -0,0 +1,118 @@
+from src import sentiment
+from src.sentiment import ScoreMemo, score_headlines
+import numpy as np
+import pandas as pd
+
+HEADLINES = pd.Series([
+    "Company beats earnings expectations on strong services revenue",
+    "Analysts note margin pressures amid rising input costs",
+    "Company beats earnings expectations on strong services revenue",
+    "   ",
+    None,
+])
+
+def _reference(headlines):
+    vader = sentiment._get_vader()
+    return np.array([vader.polarity_scores(x)["compound"] if isinstance(x, str) and x.strip() else 0.0
+                     for x in headlines])
+
+def test_score_headlines_matches_row_by_row_and_memoizes(tmp_path):
+    memo = ScoreMemo(tmp_path / 'memo.sqlite')
+    expected = _reference(HEADLINES)
+    np.testing.assert_array_equal(score_headlines(HEADLINES, memo=memo), expected)
+
+    # Unique headlines are now memoized, including the blank one
+    assert len(memo.get_many([sentiment.headline_key(h) for h in HEADLINES[:4]])) == 3
+    np.testing.assert_array_equal(score_headlines(HEADLINES, memo=ScoreMemo(tmp_path / 'memo.sqlite')), expected)
+
+def test_score_headlines_process_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(sentiment, 'POOL_THRESHOLD', 2)
+    monkeypatch.setattr(sentiment, 'POOL_CHUNK', 1)
+    scores = score_headlines(HEADLINES, processes=2, memo=ScoreMemo(tmp_path / 'memo.sqlite'))
+    np.testing.assert_array_equal(scores, _reference(HEADLINES))
+
+def test_scored_news_store_only_scores_appended_rows(tmp_path, monkeypatch):
+    news = tmp_path / 'news.csv'
+    news.write_text("date,source,headline\n2025-10-05,WSJ,Shares plunge after weak guidance\n")
+    store = sentiment.ScoredNewsStore(news, root=tmp_path / 'store')
+    first = store.load()
+
+    scored = []
+    real = sentiment.score_headlines
+    monkeypatch.setattr(sentiment, 'score_headlines', lambda h: scored.extend(h) or real(h))
+    with news.open('a') as f:
+        f.write("2025-10-01,Reuters,Company beats earnings expectations\n")
+    appended = store.load()
+    assert scored == ["Company beats earnings expectations"]
+    assert len(appended) == 2 and appended['compound'].iloc[0] == first['compound'].iloc[0]
+
+    news.write_text("date,source,headline\n2025-10-07,FT,Record quarter\n")
+    assert store.load()['headline'].tolist() == ["Record quarter"]
+
+    full = sentiment.load_news_and_score('AAPL', news_path=news, incremental=False)
+    pd.testing.assert_frame_equal(sentiment.load_news_and_score('AAPL', news_path=news), full, check_dtype=False)
+
+def test_scored_news_store_consumes_only_complete_lines_seen_at_stat(tmp_path, monkeypatch):
+    news = tmp_path / 'news.csv'
+    news.write_text("date,source,headline\n2025-10-05,WSJ,Shares plunge\n2025-10-06,FT,Record qu")
+    store = sentiment.ScoredNewsStore(news, root=tmp_path / 'store')
+    assert store.load()['headline'].tolist() == ["Shares plunge"]  # the partial line waits
+
+    # A writer appends after load() took its stat() but before the bytes are read
+    read_watermark = sentiment.ScoredNewsStore._read_watermark
+    def racing_writer(self):
+        with news.open('a') as f:
+            f.write("2025-10-08,AP,Raced in\n")
+        monkeypatch.setattr(sentiment.ScoredNewsStore, '_read_watermark', read_watermark)
+        return read_watermark(self)
+    with news.open('a') as f:
+        f.write("arter\n")
+    monkeypatch.setattr(sentiment.ScoredNewsStore, '_read_watermark', racing_writer)
+    assert store.load()['headline'].tolist() == ["Shares plunge", "Record quarter"]
+    assert store.load()['headline'].tolist() == ["Shares plunge", "Record quarter", "Raced in"]
+    assert store.load()['headline'].tolist() == ["Shares plunge", "Record quarter", "Raced in"]
+
+def test_compiled_lexicon_matches_nltk_parser(tmp_path):
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    parser = SentimentIntensityAnalyzer.__new__(SentimentIntensityAnalyzer)
+    parser.lexicon_file = sentiment.LEXICON_PATH.read_text(encoding='utf-8')
+    reference = parser.make_lex_dict()
+    cache = tmp_path / 'lexicon.marshal'
+    assert sentiment._compile_lexicon(cache=cache) == reference
+    assert cache.exists() and sentiment._compile_lexicon(cache=cache) == reference
+
+def test_memo_keys_follow_the_loaded_lexicon(tmp_path, monkeypatch):
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    memo = ScoreMemo(tmp_path / 'memo.sqlite')
+    stock = score_headlines(HEADLINES[:2], memo=memo)
+    assert isinstance(sentiment._get_vader(), SentimentIntensityAnalyzer)
+    salt = sentiment.memo_salt()
+
+    # A different lexicon must not reuse the scores memoized under the vendored one
+    custom = {**sentiment._compile_lexicon(), 'beats': -3.0}
+    monkeypatch.setattr(sentiment, '_compile_lexicon', lambda *a, **k: custom)
+    monkeypatch.setattr(sentiment, '_vader', None)
+    monkeypatch.setattr(sentiment, '_memo_salt', None)
+    assert sentiment.memo_salt() != salt
+    rescored = score_headlines(HEADLINES[:2], memo=memo)
+    assert rescored[0] < 0 < stock[0] and rescored[1] == stock[1]
+
+def test_scores_match_stock_nltk_analyzer(tmp_path):
+    import nltk.data
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    try:
+        stock = SentimentIntensityAnalyzer()
+    except LookupError:
+        # No NLTK data here: the stock class parsing the vendored lexicon text itself
+        sentiment.warm_up()
+        stock = SentimentIntensityAnalyzer(lexicon_file=sentiment.LEXICON_PATH.name)
+    assert type(stock) is SentimentIntensityAnalyzer
+
+    sample = pd.read_csv(sentiment.NEWS_PATH)['headline'].tolist() + [
+        "Shares are NOT great, but guidance is VERY strong!!!",
+        "Hardly a disaster :) though the outlook isn't good",
+        "Kinda meh quarter; sort of okay margins?",
+        "Company beats earnings expectations on strong services revenue",
+    ]
+    expected = [stock.polarity_scores(h)["compound"] for h in sample]
+    np.testing.assert_array_equal(score_headlines(sample, memo=ScoreMemo(tmp_path / 'memo.sqlite')), expected)
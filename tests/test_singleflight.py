@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.singleflight import SingleFlight, SingleFlightTimeout
+
+
+def _run_concurrently(n, target):
+    results, errors = [None] * n, [None] * n
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return pd.DataFrame({"Close": [1.0, 2.0]})
+
+    def call():
+        return flights.do(("prices", "AAPL", "1y"), load)
+
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    results, errors = _run_concurrently(8, call)
+    assert calls == [1] and errors == [None] * 8
+    assert all(r["Close"].tolist() == [1.0, 2.0] for r in results)
+    # Each caller gets its own frame object
+    results[0].index.name = "Date"
+    assert results[1].index.name is None
+    assert flights.stats()["prices"] == {"calls": 8, "executed": 1, "coalesced": 7, "failed": 0, "timeouts": 0, "stale": 0}
+    assert flights.in_flight() == 0
+
+
+def test_sequential_calls_are_not_cached():
+    flights = SingleFlight()
+    assert [flights.do(("news", "a"), lambda i=i: i) for i in range(3)] == [0, 1, 2]
+    assert flights.stats()["news"]["coalesced"] == 0
+
+
+def test_failure_propagates_to_waiters():
+    flights = SingleFlight()
+    started = threading.Event()
+
+    def boom():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError("provider down")
+
+    raised = []
+
+    def lead():
+        with pytest.raises(ValueError) as info:
+            flights.do(("prices", "X"), boom)
+        raised.append(info.value)
+
+    leader = threading.Thread(target=lead)
+    leader.start()
+    started.wait(5)
+    with pytest.raises(ValueError, match="provider down") as info:
+        flights.do(("prices", "X"), boom)
+    leader.join()
+    # Waiters get their own exception, chained to the leader's
+    assert info.value is not raised[0] and info.value.__cause__ is raised[0]
+    assert flights.stats()["prices"]["failed"] == 1
+    # The next call runs again instead of replaying the error
+    assert flights.do(("prices", "X"), lambda: 42) == 42
+
+
+def test_waiters_give_up_after_timeout():
+    flights = SingleFlight()
+    release, started = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "late"
+
+    leader = threading.Thread(target=flights.do, args=(("news", "s"), slow))
+    leader.start()
+    started.wait(5)
+    with pytest.raises(SingleFlightTimeout):
+        flights.do(("news", "s"), slow, timeout=0.05)
+    release.set()
+    leader.join()
+    assert flights.stats()["news"]["timeouts"] == 1
+
+
+def test_hung_call_is_bypassed_after_timeout():
+    flights = SingleFlight()
+    release, started = threading.Event(), threading.Event()
+
+    def hung():
+        started.set()
+        release.wait(5)
+        return "late"
+
+    leader = threading.Thread(target=flights.do, args=(("prices", "H"), hung))
+    leader.start()
+    started.wait(5)
+    time.sleep(0.1)
+    # The hung leader no longer holds the key for callers whose budget it has used up
+    assert flights.do(("prices", "H"), lambda: "fresh", timeout=0.05) == "fresh"
+    release.set()
+    leader.join()
+    assert flights.stats()["prices"]["stale"] == 1
+    assert flights.in_flight() == 0
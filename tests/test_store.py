@@ -0,0 +1,52 @@
+import pandas as pd
+
+import src.store as store_mod
+from src import data, sentiment
+from src.store import ColumnarStore, ingest_csv
+
+
+def _financials(ticker, quarters, start="2022-03-31", revenue=100.0):
+    dates = pd.date_range(start, periods=quarters, freq="QE")
+    df = pd.DataFrame({c: revenue for c in data.NUMERIC_COLUMNS}, index=range(quarters))
+    df.insert(0, "date", dates)
+    df["ticker"] = ticker
+    return df
+
+
+def test_partitioned_round_trip_and_upsert(tmp_path):
+    store = ColumnarStore(tmp_path)
+    store.write("financials", pd.concat([_financials("aaa", 8), _financials("BBB", 3)]))
+    assert store.tickers("financials") == ["AAA", "BBB"]
+    assert sorted(p.name for p in (tmp_path / "financials" / "ticker=AAA").iterdir()) == ["year=2022", "year=2023"]
+
+    aaa = store.read_financials("AAA")
+    assert list(aaa.columns) == data.REQUIRED_COLUMNS and len(aaa) == 8
+    assert aaa["date"].is_monotonic_increasing and aaa["revenue"].dtype == "float64"
+
+    # Predicate pushdown on the date range
+    assert len(store.read_financials("AAA", start="2023-01-01", end="2023-06-30")) == 2
+    assert store.read_financials("ZZZ").empty
+
+    # Restating one quarter keeps the rest of its year partition
+    store.write("financials", _financials("AAA", 1, start="2023-06-30", revenue=999.0))
+    aaa = store.read_financials("AAA")
+    assert len(aaa) == 8 and aaa.loc[aaa["date"] == "2023-06-30", "revenue"].item() == 999.0
+
+
+def test_loaders_prefer_the_store(tmp_path, monkeypatch):
+    store = ColumnarStore(tmp_path)
+    monkeypatch.setattr(store_mod, "columnar_store", store)
+
+    csv = tmp_path / "msft.csv"
+    _financials("ignored", 6).drop(columns="ticker").to_csv(csv, index=False)
+    assert ingest_csv("financials", csv, ticker="msft", store=store) == 6
+    pd.testing.assert_frame_equal(data.load_financials("MSFT"), store.read_financials("MSFT"))
+    # Unknown tickers still get the bundled sample
+    assert len(data.load_financials("NOPE")) == len(pd.read_csv(data.DATA_DIR / "sample_financials.csv"))
+
+    news = pd.DataFrame({"ticker": ["MSFT", "MSFT", "IBM"], "date": ["2025-01-02", "2025-01-01", "2025-01-01"],
+                         "source": ["x", "y", "z"], "headline": ["Great quarter", "Awful losses", "Neutral"]})
+    store.write("news", news)
+    scored = sentiment.load_news_and_score("MSFT")
+    assert list(scored["headline"]) == ["Awful losses", "Great quarter"]
+    assert scored["compound"].iloc[0] < 0 < scored["compound"].iloc[1]
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+import src.summary as summary
+from src.summary import cached_summary, generate_summary, summarize_many
+
+
+def _company(seed, quarters):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({c: rng.uniform(0, 2, quarters) for c in
+                       ["gross_margin", "operating_margin", "net_margin", "current_ratio", "debt_to_equity", "roe"]})
+    df.loc[rng.random(quarters) < 0.3, "net_margin"] = np.nan
+    df.insert(0, "date", pd.date_range("2020-03-31", periods=quarters, freq="QE"))
+    return df
+
+
+def test_summarize_many_matches_generate_summary():
+    ratios = {f"T{i}": _company(i, 1 + i % 7) for i in range(40)}
+    news = {f"T{i}": pd.DataFrame({"compound": np.linspace(-1, 1, 5 + i) * (i % 3 - 1)}) for i in range(0, 40, 2)}
+    for style in ("Executive brief", "Analyst deep-dive"):
+        out = summarize_many(ratios, news, "EUR", style=style)
+        assert list(out.index) == list(ratios)
+        for ticker, df in ratios.items():
+            assert out[ticker] == generate_summary(df, news.get(ticker), ticker, "EUR", style=style)
+
+
+def test_summaries_are_memoized(monkeypatch):
+    calls = []
+    real = summary.generate_summary
+    monkeypatch.setattr(summary, "generate_summary", lambda *a, **k: calls.append(1) or real(*a, **k))
+    df = _company(1, 8)
+    first = cached_summary(df, None, "AAA", "USD")
+    assert cached_summary(df.copy(), None, "AAA", "USD") == first and len(calls) == 1
+    cached_summary(df, None, "AAA", "USD", style="Analyst deep-dive")
+    # Rows older than the trend window do not affect the text
+    cached_summary(df.assign(roe=df["roe"].where(df.index >= 4, 9.0)), None, "AAA", "USD")
+    assert len(calls) == 2
+    df.loc[7, "roe"] = 0.5
+    cached_summary(df, None, "AAA", "USD")
+    assert len(calls) == 3